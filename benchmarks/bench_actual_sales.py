@@ -0,0 +1,74 @@
+"""
+Порівняння рушіїв compute_actual_sales: pandas (groupby/sort_values) та factorized (NumPy на кодах).
+Для найменшого розміру також перевіряє ActualSalesState: початковий стан (from_frame) збігається
+з compute_actual_sales, а дорахування останньої декади (refresh_state) — з повним перерахунком.
+Запуск з кореня репозиторію: python -m benchmarks.bench_actual_sales [кількість рядків ...]
+"""
+import gc
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import generate_sales_frame
+from core import data_processing, schema
+from core.incremental_sales import ActualSalesState, refresh_state
+
+DEFAULT_SIZES = [100_000, 1_000_000, 5_000_000]
+
+
+def run(df: pd.DataFrame, engine: str) -> tuple:
+    start = time.perf_counter()
+    result = data_processing.compute_actual_sales(df.copy(), engine=engine)
+    return result, time.perf_counter() - start
+
+
+def sorted_actual(actual: pd.DataFrame) -> pd.DataFrame:
+    columns = data_processing.ACTUAL_SALES_COLUMNS
+    return actual[columns].astype(str).sort_values(columns, ignore_index=True)
+
+
+def check_state(n_rows: int):
+    """Стан фактичних продажів: початковий розрахунок і дорахування останньої декади року."""
+    df = data_processing.prepare_sales_frame(schema.compact_sales_frame(generate_sales_frame(n_rows, categorical=True)))
+    last_decade = (df['month'] == 12) & (df['decade'] == 30)
+    df = pd.concat([df[~last_decade], df[last_decade]], ignore_index=True)
+    df['id'] = np.arange(1, len(df) + 1)
+    n_old = int((~last_decade).sum())
+
+    start = time.perf_counter()
+    full = ActualSalesState.from_frame(df, dataset_key="bench")
+    seed_time = time.perf_counter() - start
+    pd.testing.assert_frame_equal(sorted_actual(full.actual_sales()),
+                                  sorted_actual(data_processing.compute_actual_sales(df.copy())))
+
+    state = ActualSalesState.from_frame(df.iloc[:n_old], dataset_key="bench")
+    start = time.perf_counter()
+    refreshed = refresh_state(state, df, dataset_key="bench")
+    update_time = time.perf_counter() - start
+    assert refreshed is state, "останню декаду мало бути дораховано, а не перераховано"
+    pd.testing.assert_frame_equal(sorted_actual(refreshed.actual_sales()), sorted_actual(full.actual_sales()))
+    print(f"ActualSalesState, {n_rows} рядків: from_frame {seed_time:.2f} с, "
+          f"дорахування {len(df) - n_old} рядків {update_time:.2f} с; результати збігаються.")
+
+
+def main():
+    warnings.simplefilter("ignore")
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    print(f"{'рядків':>10} {'pandas, с':>10} {'factorized, с':>14} {'прискорення':>12}")
+    for n_rows in sizes:
+        # На вхід подається компактний DataFrame, як його повертає завантажувач
+        df = schema.compact_sales_frame(generate_sales_frame(n_rows, categorical=True))
+        expected, pandas_time = run(df, "pandas")
+        result, factorized_time = run(df, "factorized")
+        pd.testing.assert_frame_equal(expected, result)
+        print(f"{n_rows:>10} {pandas_time:>10.2f} {factorized_time:>14.2f} {pandas_time / factorized_time:>11.1f}x")
+        del df, expected, result
+        gc.collect()
+    check_state(min(sizes))
+
+
+if __name__ == "__main__":
+    main()
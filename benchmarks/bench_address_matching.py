@@ -0,0 +1,81 @@
+"""
+Порівняння зіставлення "золотих" адрес: Series.apply + pd.json_normalize та векторна нормалізація + join.
+Запуск з кореня репозиторію: python -m benchmarks.bench_address_matching [кількість рядків ...]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.address_matching import (
+    ADDRESS_COLUMN, build_golden_frame, match_golden_addresses, normalize_address
+)
+
+DEFAULT_SIZES = [10_000, 100_000, 300_000]
+N_GOLDEN = 20_000
+
+
+def get_golden_address(address: str, golden_map: dict) -> dict:
+    """Початкова реалізація з upload_page."""
+    lookup_key = normalize_address(address)
+    default_result = {'city': None, 'street': None, 'number': None, 'territory': None}
+    return golden_map.get(lookup_key, default_result)
+
+
+def old_path(addresses: pd.Series, golden_rows: list) -> pd.DataFrame:
+    golden_map = {
+        normalize_address(row.get(ADDRESS_COLUMN)): {
+            'city': row.get("Місто"), 'street': row.get("Вулиця"),
+            'number': str(row.get("Номер будинку")) if row.get("Номер будинку") is not None else None,
+            'territory': row.get("Територія")
+        } for row in golden_rows if row.get(ADDRESS_COLUMN)
+    }
+    return pd.json_normalize(addresses.apply(get_golden_address, golden_map=golden_map))
+
+
+def new_path(addresses: pd.Series, golden_rows: list) -> pd.DataFrame:
+    return match_golden_addresses(addresses, build_golden_frame(golden_rows))
+
+
+def synthetic_data(n_rows: int, seed: int = 0) -> tuple:
+    """Золоті адреси (з пропусками полів і дублікатами) та адреси з файлу з «брудним» написанням."""
+    rng = np.random.default_rng(seed)
+    golden_rows = []
+    for i in range(N_GOLDEN):
+        golden_rows.append({
+            ADDRESS_COLUMN: f"м. Місто {i % 300}, вул. Вулиця {i % 997}, {i}",
+            "Місто": f"Місто {i % 300}", "Вулиця": f"вул. Вулиця {i % 997}",
+            "Номер будинку": i if i % 7 else None, "Територія": None if i % 11 == 0 else f"T{i % 4}",
+        })
+    golden_rows += [{ADDRESS_COLUMN: None}, {ADDRESS_COLUMN: golden_rows[5][ADDRESS_COLUMN], "Місто": "Дубль"}]
+
+    picks = rng.integers(0, int(N_GOLDEN * 1.2), n_rows)
+    variants = np.array([
+        lambda s: s, lambda s: s.upper(), lambda s: f"  {s}\xa0", lambda s: s.replace(" ", "  \t"),
+    ], dtype=object)
+    addresses = [
+        variants[v](f"м. Місто {i % 300}, вул. Вулиця {i % 997}, {i}")
+        for i, v in zip(picks, rng.integers(0, len(variants), n_rows))
+    ]
+    addresses[:3] = [None, np.nan, 12]
+    return pd.Series(addresses, dtype=object), golden_rows
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    print(f"{'рядків':>10} {'apply, с':>10} {'join, с':>10} {'прискорення':>12}")
+    for n_rows in sizes:
+        addresses, golden_rows = synthetic_data(n_rows)
+        start = time.perf_counter()
+        expected = old_path(addresses, golden_rows)
+        old_time = time.perf_counter() - start
+        start = time.perf_counter()
+        result = new_path(addresses, golden_rows)
+        new_time = time.perf_counter() - start
+        pd.testing.assert_frame_equal(expected, result)
+        print(f"{n_rows:>10} {old_time:>10.2f} {new_time:>10.2f} {old_time / new_time:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
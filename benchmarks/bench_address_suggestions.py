@@ -0,0 +1,97 @@
+"""
+Повнота та затримка нечіткого пошуку адрес (GoldenAddressIndex) на синтетичних даних.
+Запити — "золоті" адреси з типовими помилками оператора: опечатки, інше скорочення
+типу вулиці, пропущене "м.". Для порівняння — повний перебір тих самих оцінок.
+Запуск з кореня репозиторію: python -m benchmarks.bench_address_suggestions [кількість золотих адрес]
+"""
+import sys
+import time
+
+import numpy as np
+
+from core.address_matching import GoldenAddressIndex, _ngrams
+
+DEFAULT_GOLDEN = 30_000
+N_QUERIES = 1_000
+N_BRUTE_FORCE = 100
+
+SYLLABLES = ["ко", "ва", "лен", "шев", "чен", "ка", "гру", "шев", "сько", "го", "фран", "ми", "ро", "да", "ли",
+             "со", "бор", "на", "пи", "ро", "го", "ва", "за", "мос", "тя", "ні", "кі", "пет", "лю", "ри"]
+STREET_TYPES = [("вул.", "вулиця"), ("пров.", "провулок"), ("просп.", "проспект"), ("пл.", "площа")]
+LETTERS = "абвгдеєжзиіїйклмнопрстуфхцчшщьюя"
+
+
+def _name(rng, parts: int) -> str:
+    return "".join(rng.choice(SYLLABLES, parts)).capitalize()
+
+
+def golden_addresses(n: int, rng) -> list:
+    cities = [_name(rng, 3) for _ in range(max(10, n // 200))]
+    streets = [_name(rng, int(rng.integers(2, 5))) for _ in range(max(50, n // 20))]
+    addresses = set()
+    while len(addresses) < n:
+        street_type = STREET_TYPES[rng.integers(len(STREET_TYPES))][0]
+        addresses.add(f"м. {rng.choice(cities)}, {street_type} {rng.choice(streets)}, {rng.integers(1, 200)}")
+    return sorted(addresses)
+
+
+def corrupt(address: str, rng) -> str:
+    """Опечатка (пропуск, заміна чи перестановка літери) та, можливо, інше написання типу вулиці."""
+    if rng.random() < 0.5:
+        for short, full in STREET_TYPES:
+            address = address.replace(short, full)
+    if rng.random() < 0.3:
+        address = address.replace("м. ", "")
+    chars = list(address)
+    letters = [i for i, c in enumerate(chars) if c.isalpha()]
+    i = letters[rng.integers(len(letters))]
+    kind = rng.integers(3)
+    if kind == 0:
+        del chars[i]
+    elif kind == 1:
+        chars[i] = LETTERS[rng.integers(len(LETTERS))]
+    elif i + 1 < len(chars):
+        chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    return "".join(chars)
+
+
+def brute_force(index: GoldenAddressIndex, gram_sets: list, address: str) -> str:
+    grams = _ngrams(address)
+    scores = [2 * len(grams & other) / (len(grams) + len(other)) for other in gram_sets]
+    return index.addresses[int(np.argmax(scores))]
+
+
+def main():
+    n_golden = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_GOLDEN
+    rng = np.random.default_rng(0)
+    golden = golden_addresses(n_golden, rng)
+
+    start = time.perf_counter()
+    index = GoldenAddressIndex(golden)
+    print(f"Індекс для {n_golden} адрес: {time.perf_counter() - start:.2f} с, n-грам: {len(index.postings)}")
+
+    targets = rng.integers(0, n_golden, N_QUERIES)
+    queries = [corrupt(golden[t], rng) for t in targets]
+
+    latencies, hits_1, hits_5 = [], 0, 0
+    for query, target in zip(queries, targets):
+        start = time.perf_counter()
+        found = [address for address, _ in index.suggest(query, limit=5)]
+        latencies.append(time.perf_counter() - start)
+        hits_1 += bool(found) and found[0] == golden[target]
+        hits_5 += golden[target] in found
+    latencies = np.array(latencies) * 1000
+    print(f"Запитів: {N_QUERIES}; recall@1 = {hits_1 / N_QUERIES:.3f}, recall@5 = {hits_5 / N_QUERIES:.3f}")
+    print(f"Затримка індексу: середня {latencies.mean():.2f} мс, p95 {np.percentile(latencies, 95):.2f} мс")
+
+    gram_sets = [_ngrams(address) for address in golden]
+    start = time.perf_counter()
+    agree = sum(brute_force(index, gram_sets, query) == index.suggest(query, limit=1)[0][0]
+                for query in queries[:N_BRUTE_FORCE] if index.suggest(query, limit=1))
+    brute_ms = (time.perf_counter() - start) / N_BRUTE_FORCE * 1000
+    print(f"Повний перебір: {brute_ms:.1f} мс на запит; збіг найкращого варіанту з індексом: "
+          f"{agree}/{N_BRUTE_FORCE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Агрегати вкладки "Загальний огляд": pandas по сирих рядках проти SQL на боці бази
+(локальна SQLite-заміна з тією ж схемою sales_data). Для кількох наборів фільтрів перевіряє,
+що KPI, зведення по продуктах і таблиця місто × продукт збігаються з calculate_main_kpis/pivot_table,
+і показує, скільки рядків довелося б передати в кожному випадку.
+Запуск з кореня репозиторію: python -m benchmarks.bench_aggregation [кількість рядків]
+"""
+import sys
+import time
+import warnings
+
+import pandas as pd
+
+from benchmarks.synthetic_data import generate_sales_frame
+from core import aggregation, data_processing, schema, ui_components
+from core.sales_cache import filter_sales_frame
+
+DEFAULT_ROWS = 200_000
+KPI_KEYS = ["total_quantity", "unique_products", "unique_clients", "avg_quantity_per_client", "top5_share"]
+
+# (територія, лінійка, місяці, міста, вулиці)
+CASES = [
+    ("Всі", "Всі", [], [], []),
+    ("T1", "Всі", ["05", "06"], [], []),
+    ("Всі", "Лінія 1", [], ["Місто 1", "Місто 2"], []),
+    ("T2", "Лінія 2", ["03"], [], ["вул. Вулиця 3"]),
+]
+
+
+def with_gaps(raw: pd.DataFrame) -> pd.DataFrame:
+    """Пропуски й зайві пробіли, як у реальних файлах, і місяць без останньої декади."""
+    raw = raw.copy()
+    raw.loc[::97, 'new_client'] = None
+    raw.loc[::131, 'city'] = " " + raw.loc[::131, 'city'].astype(str)
+    raw.loc[::173, 'street'] = None
+    return raw[~((raw['month'] == '03') & (raw['decade'] == '30'))].reset_index(drop=True)
+
+
+def pandas_overview(raw: pd.DataFrame, territory, line, months, cities, streets) -> tuple:
+    """Шлях сторінки: компактний кадр -> остання декада місяця -> локальні фільтри -> KPI і pivot."""
+    df = data_processing.prepare_sales_frame(schema.compact_sales_frame(
+        filter_sales_frame(raw, territory, line, months)))
+    latest = df[df['decade'] == df.groupby(['year', 'month'])['decade'].transform('max')]
+    display = ui_components.apply_filters(latest, cities, streets)
+    pivot = display.pivot_table(index='city', columns='product_name', values='quantity', aggfunc='sum',
+                                fill_value=0, observed=True)
+    return data_processing.calculate_main_kpis(display), pivot, len(df)
+
+
+def check(expected_kpis: dict, expected_pivot: pd.DataFrame, aggregates: aggregation.OverviewAggregates):
+    kpis = aggregation.overview_kpis(aggregates)
+    for key in KPI_KEYS:
+        assert kpis[key] == expected_kpis[key], (key, kpis[key], expected_kpis[key])
+    assert sorted(kpis["top_products"].tolist()) == sorted(expected_kpis["top_products"].tolist())
+    pivot = aggregation.city_product_pivot(aggregates)
+    expected_pivot = expected_pivot.rename(index=str, columns=str)
+    expected_pivot.index.name, expected_pivot.columns.name = pivot.index.name, pivot.columns.name
+    pd.testing.assert_frame_equal(pivot.sort_index().sort_index(axis=1),
+                                  expected_pivot.sort_index().sort_index(axis=1).astype('int64'),
+                                  check_index_type=False, check_column_type=False)
+
+
+def main():
+    warnings.simplefilter("ignore")
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    raw = with_gaps(generate_sales_frame(n_rows, region="Тестовий"))
+    connection = aggregation.create_sqlite_standin(raw)
+    backend = aggregation.SqlAggregation(connection)
+
+    print(f"{n_rows} рядків у SQLite-заміні sales_data")
+    print(f"{'фільтри':>40} {'сирих рядків':>13} {'рядків агрегатів':>17} {'pandas, с':>10} {'SQL, с':>7}")
+    for territory, line, months, cities, streets in CASES:
+        started = time.perf_counter()
+        expected_kpis, expected_pivot, raw_rows = pandas_overview(raw, territory, line, months, cities, streets)
+        pandas_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        aggregates = backend.overview_aggregates("Тестовий", territory, line, months, cities, streets)
+        sql_seconds = time.perf_counter() - started
+        check(expected_kpis, expected_pivot, aggregates)
+
+        label = f"{territory}/{line}/{','.join(months) or '*'}/{len(cities)}м/{len(streets)}в"
+        result_rows = len(aggregates.product_month) + len(aggregates.city_product) + 1
+        print(f"{label:>40} {raw_rows:>13} {result_rows:>17} {pandas_seconds:>10.2f} {sql_seconds:>7.2f}")
+    print("KPI, зведення по продуктах і таблиця місто × продукт збігаються з pandas.")
+
+    # Рядки, дописані після завантаження набору, не потрапляють в агрегати знімка (max_id)
+    max_id = int(raw['id'].max())
+    grown = aggregation.SqlAggregation(aggregation.create_sqlite_standin(
+        pd.concat([raw, raw.assign(id=raw['id'] + max_id, quantity=raw['quantity'] * 2)], ignore_index=True)))
+    for territory, line, months, cities, streets in CASES:
+        expected_kpis, expected_pivot, _ = pandas_overview(raw, territory, line, months, cities, streets)
+        check(expected_kpis, expected_pivot,
+              grown.overview_aggregates("Тестовий", territory, line, months, cities, streets, max_id=max_id))
+    print("Агрегати з max_id збігаються зі знімком набору після дописаних рядків.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Порівняння бутстрапу прогнозу: початковий цикл Python, точний порційний bootstrap_sums
+і його нормальне наближення для великих вибірок (BOOTSTRAP_EXACT_MAX_DRAWS).
+Межі 95% інтервалу наближення порівнюються з точним бутстрапом.
+Запуск з кореня репозиторію: python -m benchmarks.bench_bootstrap [кількість рядків місяця]
+"""
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.synthetic_data import PRODUCTS, generate_sales_frame
+from core.data_processing import BOOTSTRAP_EXACT_MAX_DRAWS, bootstrap_sums
+
+DEFAULT_ROWS = 40_000
+LOOP_ITERATIONS = 2_000
+BATCH_ITERATIONS = [1_000, 10_000, 100_000]
+EXACT_ITERATIONS = 10_000
+# Допустима відносна розбіжність меж 95% інтервалу наближення і точного бутстрапу
+INTERVAL_TOLERANCE = 0.005
+
+
+def loop_bootstrap(sales_data: np.ndarray, n_iterations: int) -> np.ndarray:
+    """Початкова реалізація: окрема вибірка індексів на кожну ітерацію."""
+    n_sales = len(sales_data)
+    sums = []
+    for _ in range(n_iterations):
+        indices = np.random.randint(0, n_sales, size=n_sales)
+        sums.append(sales_data[indices].sum())
+    return np.array(sums)
+
+
+def month_revenue(n_rows: int) -> np.ndarray:
+    """Дохід по рядках одного місяця регіону: кількість * ціна продукту."""
+    df = generate_sales_frame(n_rows * 12)
+    df = df[df['month'] == '01']
+    prices = dict(zip(PRODUCTS, np.random.default_rng(1).integers(50, 900, len(PRODUCTS)) * 1.0))
+    return (df['quantity'] * df['product_name'].map(prices)).to_numpy(dtype=float)
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    revenue = month_revenue(n_rows)
+    print(f"Рядків у місяці: {len(revenue)}, різних значень доходу: {len(np.unique(revenue))}")
+
+    start = time.perf_counter()
+    loop_bootstrap(revenue, LOOP_ITERATIONS)
+    loop_rate = LOOP_ITERATIONS / (time.perf_counter() - start)
+    print(f"{'цикл':>10} {LOOP_ITERATIONS:>8} ітерацій: {loop_rate:>12,.0f} ітер./с")
+
+    for n_iterations in BATCH_ITERATIONS:
+        start = time.perf_counter()
+        sums = bootstrap_sums(revenue, n_iterations, rng=np.random.default_rng(0))
+        elapsed = time.perf_counter() - start
+        path = "точний" if len(revenue) * n_iterations <= BOOTSTRAP_EXACT_MAX_DRAWS else "наближення"
+        print(f"{path:>10} {n_iterations:>8} ітерацій: {n_iterations / elapsed:>12,.0f} ітер./с "
+              f"({elapsed:.2f} с, x{n_iterations / elapsed / loop_rate:.0f})")
+
+    # Відтворюваність і узгодженість розподілу з аналітичним
+    again = bootstrap_sums(revenue, BATCH_ITERATIONS[-1], rng=np.random.default_rng(0))
+    assert np.array_equal(sums, again)
+    expected_std = revenue.std() * np.sqrt(len(revenue))
+    print(f"Середнє {sums.mean():,.0f} (очікується {revenue.sum():,.0f}), "
+          f"std {sums.std():,.0f} (очікується {expected_std:,.0f})")
+
+    # Межі 95% інтервалу: точний бутстрап проти наближення
+    start = time.perf_counter()
+    exact = bootstrap_sums(revenue, EXACT_ITERATIONS, rng=np.random.default_rng(1), exact_max_draws=np.inf)
+    elapsed = time.perf_counter() - start
+    exact_bounds = np.percentile(exact, [2.5, 97.5])
+    approx_bounds = np.percentile(sums, [2.5, 97.5])
+    print(f"{'точний':>10} {EXACT_ITERATIONS:>8} ітерацій: {elapsed:.2f} с; 95% інтервал "
+          f"{exact_bounds[0]:,.0f} - {exact_bounds[1]:,.0f}, наближення {approx_bounds[0]:,.0f} - {approx_bounds[1]:,.0f}")
+    assert np.allclose(approx_bounds, exact_bounds, rtol=INTERVAL_TOLERANCE), "наближення розходиться з бутстрапом"
+
+
+if __name__ == "__main__":
+    main()
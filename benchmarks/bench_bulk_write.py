@@ -0,0 +1,123 @@
+"""
+Пропускна здатність пакетного запису (core.bulk_writer) на локальній заміні PostgREST.
+Показує рядків/с для різних розмірів порції та кількості потоків, стійкість до збоїв
+і те, що повторне завантаження того самого файлу не подвоює кількості, а виправлені
+кількості доходять до локального сховища і стану фактичних продажів (за ревізією рядка),
+а порції, зафіксовані не по порядку, не губляться при синхронізації.
+Запуск з кореня репозиторію: python -m benchmarks.bench_bulk_write [кількість рядків]
+"""
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fake_postgrest import FakeSupabaseClient
+from benchmarks.synthetic_data import generate_sales_frame
+from core import local_store, schema
+from core.bulk_writer import write_rows
+from core.incremental_sales import ActualSalesState
+
+DEFAULT_ROWS = 50_000
+LATENCY = 0.05
+MAX_PAYLOAD_ROWS = 5_000
+CONFIGURATIONS = [(500, 1), (500, 4), (1_000, 8), (2_000, 8)]
+
+
+def upload_frame(n_rows: int) -> pd.DataFrame:
+    """Рядки у форматі, який сторінка завантаження надсилає в sales_data."""
+    df = generate_sales_frame(n_rows).drop(columns=["id"])
+    df["edrpou"] = np.where(df.index % 3 == 0, None, "12345678")
+    return df
+
+
+def check_corrected_upload(df: pd.DataFrame):
+    """Виправлений повторний файл: змінені рядки зберігають id, але sync і стан їх помічають."""
+    client = FakeSupabaseClient({"sales_data": []}, latency=0.0)
+    write_rows(client, df, batch_size=1_000, max_workers=8)
+    with tempfile.TemporaryDirectory() as store_dir:
+        local_store.STORE_DIR = store_dir
+        local_store.sync_region(client, "Тестовий")
+        state = ActualSalesState.from_frame(schema.compact_sales_frame(
+            local_store.read_sales("Тестовий", "Всі", "Всі", [])))
+
+        corrected = df.copy()
+        corrected.loc[::10, "quantity"] += 1
+        write_rows(client, corrected, batch_size=1_000, max_workers=8)
+        synced = local_store.sync_region(client, "Тестовий")
+        assert synced == len(corrected.index[::10]), synced
+        assert local_store.verify_region(client, "Тестовий"), "локальне сховище не містить виправлень"
+        local = local_store.read_sales("Тестовий", "Всі", "Всі", [])
+        assert local["quantity"].sum() == corrected["quantity"].sum()
+        assert not state.covers(schema.compact_sales_frame(local)), "стан не помітив змінених рядків"
+    print(f"Виправлений файл: {synced} змінених рядків дочитано в локальне сховище, стан перераховується")
+
+
+def hide_rows(client, ids: set) -> list:
+    """Прибирає рядки з таблиці, ніби їхня порція ще не зафіксована; повертає їх для restore_rows."""
+    table = client.tables["sales_data"]
+    hidden = [row for row in table if row["id"] in ids]
+    table[:] = [row for row in table if row["id"] not in ids]
+    client._filter_cache, client._unique_index = {}, {}
+    return hidden
+
+
+def restore_rows(client, rows: list):
+    """Фіксує приховану порцію: рядки з'являються зі своїми (меншими) id і ревізіями."""
+    client.tables["sales_data"].extend(rows)
+    client._filter_cache, client._unique_index = {}, {}
+
+
+def check_out_of_order_commits(df: pd.DataFrame):
+    """
+    Порція, зафіксована після пізнішої: її id і ревізії нижчі за позначки синхронізації.
+    У межах SYNC_LAG рядки дочитуються, далі — розбіжність кількості і перебудова регіону.
+    """
+    client = FakeSupabaseClient({"sales_data": []}, latency=0.0)
+    write_rows(client, df, batch_size=1_000, max_workers=8)
+    high = max(row["id"] for row in client.tables["sales_data"])
+    with tempfile.TemporaryDirectory() as store_dir:
+        local_store.STORE_DIR = store_dir
+        for ids, label in ((set(range(high - 800, high - 300)), "у межах запасу"),
+                           (set(range(1, 200)), "за межами запасу")):
+            hidden = hide_rows(client, ids)
+            local_store.sync_region(client, "Тестовий")
+            restore_rows(client, hidden)
+            local_store.sync_region(client, "Тестовий")
+            assert local_store.verify_region(client, "Тестовий"), f"пізню порцію {label} втрачено"
+            print(f"Порція, зафіксована не по порядку ({label}, {len(hidden)} рядків): дочитано")
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    df = upload_frame(n_rows)
+
+    print(f"{'порція':>8} {'потоків':>8} {'рядків/с':>10} {'повторів':>9} {'не записано':>12}")
+    for batch_size, max_workers in CONFIGURATIONS:
+        client = FakeSupabaseClient({"sales_data": []}, latency=LATENCY, failure_rate=0.05,
+                                    max_payload_rows=MAX_PAYLOAD_ROWS)
+        result = write_rows(client, df, batch_size=batch_size, max_workers=max_workers, backoff=0.05)
+        print(f"{batch_size:>8} {max_workers:>8} {result['rows_per_second']:>10,.0f} {result['retries']:>9} "
+              f"{result['rows_failed']:>12}")
+
+    # Одна велика вставка, як раніше, упирається в обмеження розміру запиту
+    client = FakeSupabaseClient({"sales_data": []}, latency=LATENCY, max_payload_rows=MAX_PAYLOAD_ROWS)
+    result = write_rows(client, df, batch_size=n_rows, max_retries=0)
+    print(f"Один запит на {n_rows} рядків: записано {result['rows_written']}, "
+          f"помилка: {result['failed_batches'][0][2] if result['failed_batches'] else '-'}")
+
+    # Повторне завантаження того самого файлу оновлює рядки, а не додає нові
+    client = FakeSupabaseClient({"sales_data": []}, latency=0.0)
+    for _ in range(2):
+        write_rows(client, df, batch_size=1_000, max_workers=8)
+    table = client.tables["sales_data"]
+    assert len(table) == len(df)
+    assert sum(row["quantity"] for row in table) == df["quantity"].sum()
+    print(f"Після двох завантажень: {len(table)} рядків, сума кількостей не змінилась")
+
+    check_corrected_upload(df.head(20_000))
+    check_out_of_order_commits(df.head(20_000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Проєкція колонок sales_data під подання сторінки аналізу: байти відповіді, час завантаження
+і пам'ять кадру для кожного подання порівняно з вибіркою всіх колонок, а також вартість
+дочитування колонок, коли пізніше відкривається подання, якому їх бракує.
+Запуск з кореня репозиторію: python -m benchmarks.bench_column_projection [кількість рядків]
+"""
+import sys
+import time
+import warnings
+
+from benchmarks.fake_postgrest import FakeSupabaseClient
+from benchmarks.synthetic_data import generate_sales_rows
+from core import data_access, schema
+from core.sales_cache import FILTER_COLUMNS
+
+DEFAULT_ROWS = 100_000
+LATENCY = 0.02
+
+# Ті самі набори колонок, що оголошені в pages_logic/sales_page.py (без імпорту Streamlit)
+PAGE_COLUMNS = ['product_name', 'quantity', 'city', 'street', 'house_number', 'year', 'month', 'decade']
+VIEWS = {
+    "усі колонки": None,
+    "огляд": PAGE_COLUMNS + ['new_client'],
+    "адреси": PAGE_COLUMNS + ['distributor', 'new_client'],
+    "дохід/прогноз": PAGE_COLUMNS,
+}
+
+
+def load(client, columns):
+    client.bytes_received = 0
+    started = time.perf_counter()
+    df = data_access.load_sales_data("Тестовий", "Всі", "Всі", [], client=client, use_local_store=False,
+                                     columns=columns)
+    return df, client.bytes_received / 1024 ** 2, time.perf_counter() - started
+
+
+def main():
+    warnings.simplefilter("ignore")
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    client = FakeSupabaseClient({"sales_data": generate_sales_rows(n_rows, region="Тестовий")}, latency=LATENCY)
+
+    print(f"{n_rows} рядків, затримка запиту {LATENCY * 1000:.0f} мс")
+    print(f"{'подання':>14} {'колонок':>8} {'МБ відповіді':>13} {'завантаження, с':>16} {'кадр, МБ':>9}")
+    frames = {}
+    for view, columns in VIEWS.items():
+        columns = None if columns is None else columns + FILTER_COLUMNS
+        df, wire_mb, seconds = load(client, columns)
+        frames[view] = df
+        print(f"{view:>14} {len(df.columns):>8} {wire_mb:>13.1f} {seconds:>16.2f} {schema.frame_memory_mb(df):>9.1f}")
+
+    # Огляд відкрито першим, потім — подання адрес: дочитуються лише id і distributor
+    client.bytes_received = 0
+    started = time.perf_counter()
+    extended = data_access.backfill_sales_columns(
+        frames["огляд"], "Тестовий", "Всі", "Всі", [], VIEWS["адреси"], client=client, use_local_store=False)
+    seconds = time.perf_counter() - started
+    print(f"Дочитування огляд -> адреси: {client.bytes_received / 1024 ** 2:.1f} МБ, {seconds:.2f} с")
+
+    expected = frames["усі колонки"][extended.columns]
+    assert extended.astype(str).equals(expected.astype(str)), "дочитані колонки не збігаються з повною вибіркою"
+    print("Дочитаний кадр збігається з повною вибіркою.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Бенчмарк паралельного завантаження sales_data.
+Запуск з кореня репозиторію: python -m benchmarks.bench_fetch_concurrency
+"""
+import time
+
+from benchmarks.fake_postgrest import FakeSupabaseClient
+from benchmarks.synthetic_data import generate_sales_rows
+from core import sales_queries
+
+N_ROWS = 40_000
+LATENCY = 0.05  # 50 мс на запит, типовий час відповіді Supabase
+
+
+def main():
+    rows = generate_sales_rows(N_ROWS, region="Тестовий")
+    client = FakeSupabaseClient({"sales_data": rows}, latency=LATENCY)
+    columns = [c.strip() for c in sales_queries.SALES_SELECT_QUERY.split(",")]
+    expected = [{c: row[c] for c in columns} for row in rows]
+
+    print(f"{N_ROWS} рядків, затримка {LATENCY * 1000:.0f} мс на запит")
+    print(f"{'workers':>8} {'час, с':>8} {'запитів':>8}")
+    for workers in (1, 2, 4, 8, 16):
+        client.request_count = 0
+        start = time.perf_counter()
+        data = sales_queries.fetch_sales_rows(client, "Тестовий", "Всі", "Всі", [], max_workers=workers)
+        elapsed = time.perf_counter() - start
+        assert data == expected
+        print(f"{workers:>8} {elapsed:>8.2f} {client.request_count:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Локальні фільтри вкладки "Деталізація по адресах" на повному регіоні:
+попередній шлях (сортування унікальних міст і вулиць на кожен rerun, isin по кадру рядків
+і по таблиці фактичних продажів) проти індексу фільтрів (core/filter_index.py),
+побудованого один раз на набір даних. Для кожного набору фільтрів перевіряє, що списки
+міст і вулиць, наявність рядків і відфільтровані фактичні продажі збігаються.
+Запуск з кореня репозиторію: python -m benchmarks.bench_filter_index [кількість рядків]
+"""
+import sys
+import time
+import warnings
+
+import pandas as pd
+
+from benchmarks.bench_aggregation import with_gaps
+from benchmarks.synthetic_data import generate_sales_frame
+from core import data_processing, schema, ui_components
+from core.filter_index import FilterIndex
+from core.incremental_sales import ActualSalesState
+
+DEFAULT_ROWS = 1_000_000
+REPEATS = 5
+
+# (міста, вулиці) — послідовні взаємодії з фільтрами; останнє місто не існує в наборі
+INTERACTIONS = [
+    ([], []),
+    (["Місто 1"], []),
+    (["Місто 1", "Місто 2"], ["вул. Вулиця 3", "вул. Вулиця 7"]),
+    ([], ["вул. Вулиця 5"]),
+    (["Місто 3", "Місто 999"], []),
+]
+
+
+def isin_path(df_full: pd.DataFrame, actual: pd.DataFrame, cities, streets) -> tuple:
+    """Що сторінка робила на кожну взаємодію до індексу."""
+    unique_cities = sorted(c for c in df_full['city'].dropna().unique().tolist() if c != '')
+    source = df_full[df_full['city'].isin(cities)] if cities else df_full
+    unique_streets = sorted(s for s in source['street'].dropna().unique().tolist() if s != '')
+    has_rows = not ui_components.apply_filters(df_full, cities, streets).empty
+    return unique_cities, unique_streets, has_rows, ui_components.apply_filters(actual, cities, streets)
+
+
+def index_path(row_filters: FilterIndex, state: ActualSalesState, cities, streets) -> tuple:
+    """Те саме з індексів."""
+    has_rows = row_filters.count(cities, streets) > 0
+    filtered = state.filter_index().apply(state.actual_sales(), cities, streets)
+    return row_filters.cities, row_filters.streets(cities), has_rows, filtered
+
+
+def best_of(fn, *args) -> tuple:
+    times = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - started)
+    return min(times) * 1000, result
+
+
+def main():
+    warnings.simplefilter("ignore")
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    raw = generate_sales_frame(n_rows, region="Тестовий", categorical=True, n_cities=20)
+    # Пропуски й пробіли в місті та вулиці — лише в текстових колонках, не в category
+    raw = with_gaps(raw.astype({'city': str, 'street': str, 'new_client': str}))
+    df_full = data_processing.prepare_sales_frame(schema.compact_sales_frame(raw))
+    del raw
+    state = ActualSalesState.from_frame(df_full)
+    actual = state.actual_sales()
+
+    started = time.perf_counter()
+    row_filters = FilterIndex(df_full)
+    state.filter_index()
+    build_seconds = time.perf_counter() - started
+    print(f"{n_rows} рядків, {len(actual)} рядків фактичних продажів; індекси: "
+          f"{row_filters.memory_mb + state.filter_index().memory_mb:.1f} МБ, "
+          f"побудова {build_seconds:.2f} с (один раз на набір)")
+    print(f"{'фільтри':>22} {'isin, мс':>9} {'індекс, мс':>11}")
+    for cities, streets in INTERACTIONS:
+        isin_ms, expected = best_of(isin_path, df_full, actual, cities, streets)
+        index_ms, result = best_of(index_path, row_filters, state, cities, streets)
+        assert result[:3] == expected[:3], "списки фільтрів або наявність рядків не збігаються"
+        pd.testing.assert_frame_equal(result[3], expected[3])
+        label = f"{len(cities)} міст, {len(streets)} вулиць"
+        print(f"{label:>22} {isin_ms:>9.1f} {index_ms:>11.1f}")
+    print("Списки фільтрів, наявність рядків і відфільтровані фактичні продажі збігаються з isin.")
+
+
+if __name__ == "__main__":
+    main()
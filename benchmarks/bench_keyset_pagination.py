@@ -0,0 +1,58 @@
+"""
+Порівняння offset- та keyset-пагінації sales_data.
+Запуск з кореня репозиторію: python -m benchmarks.bench_keyset_pagination
+"""
+from benchmarks.fake_postgrest import FakeSupabaseClient
+from benchmarks.synthetic_data import generate_sales_rows
+from core import sales_queries
+
+N_ROWS = 50_000
+LATENCY = 0.01
+OFFSET_COST = 1e-6  # 1 мкс на кожен пропущений рядок
+
+
+def offset_scan(client) -> list:
+    """Стара логіка: .range(offset, offset + 999) без order()."""
+    rows, offset = [], 0
+    while True:
+        page = client.table("sales_data").select(sales_queries.SALES_SELECT_QUERY) \
+            .eq("region", "Тестовий").range(offset, offset + sales_queries.PAGE_SIZE - 1).execute().data
+        rows.extend(page)
+        if len(page) < sales_queries.PAGE_SIZE:
+            return rows
+        offset += sales_queries.PAGE_SIZE
+
+
+def keyset_scan(client) -> list:
+    return sales_queries.fetch_rows_keyset(
+        lambda: client.table("sales_data").select(sales_queries.SALES_SELECT_QUERY).eq("region", "Тестовий")
+    )
+
+
+def describe(name: str, timings: list):
+    quarter = max(1, len(timings) // 4)
+    print(f"{name:>8}: сторінок {len(timings)}, перші {quarter}: {sum(timings[:quarter]) / quarter * 1000:.1f} мс/стор, "
+          f"останні {quarter}: {sum(timings[-quarter:]) / quarter * 1000:.1f} мс/стор, всього {sum(timings):.2f} с")
+
+
+def main():
+    rows = generate_sales_rows(N_ROWS, region="Тестовий")
+    client = FakeSupabaseClient({"sales_data": rows}, latency=LATENCY, offset_cost=OFFSET_COST)
+
+    client.request_times = []
+    offset_rows = offset_scan(client)
+    describe("offset", client.request_times)
+
+    client.request_times = []
+    keyset_rows = keyset_scan(client)
+    describe("keyset", client.request_times)
+
+    # На "тихій" таблиці обидва способи мають повертати ідентичні рядки
+    assert keyset_rows == sorted(offset_rows, key=lambda row: row["id"])
+    parallel_rows = sales_queries.fetch_sales_rows(client, "Тестовий", "Всі", "Всі", [])
+    assert parallel_rows == keyset_rows
+    print("Результати keyset, паралельного keyset та offset-сканування збігаються.")
+
+
+if __name__ == "__main__":
+    main()
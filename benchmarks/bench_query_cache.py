@@ -0,0 +1,82 @@
+"""
+Кеш запитів продажів (core/sales_cache.py) у потоці сторінки: data_access.load_sales_dataset,
+як його викликає кнопка "Отримати дані".
+1) Широкий запит регіону, потім вужчі (місяці, територія, лінійка) — вужчі обслуговуються
+   фільтрацією збереженого кадру: до бази йдуть лише запити версії даних.
+2) Після завантаження нових рядків версія змінюється — записи регіону скидаються, набір перечитується.
+Кожна відповідь порівнюється з прямою вибіркою з бази.
+Запуск з кореня репозиторію: python -m benchmarks.bench_query_cache [кількість рядків]
+"""
+import sys
+import tempfile
+import time
+import warnings
+
+import pandas as pd
+
+from benchmarks.bench_rollups import to_rows
+from benchmarks.fake_postgrest import FakeSupabaseClient
+from benchmarks.synthetic_data import generate_sales_frame
+from core import bulk_writer, data_access, local_store
+from core.dataset_store import DatasetStore
+from core.sales_cache import SalesQueryCache
+
+DEFAULT_ROWS = 200_000
+LATENCY = 0.02
+REGION = "Тестовий"
+
+# (територія, лінійка, місяці) у порядку взаємодії: спершу широкий запит, далі вужчі
+REQUESTS = [
+    ("Всі", "Всі", []),
+    ("Всі", "Всі", ["05", "06"]),
+    ("Всі", "Всі", ["06"]),
+    ("T1", "Всі", ["06"]),
+    ("T1", "Лінія 1", []),
+]
+
+
+def sorted_frame(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values('id', ignore_index=True).astype(str)
+
+
+def load(store, cache, client, territory, line, months) -> tuple:
+    requests = client.request_count
+    started = time.perf_counter()
+    handle = data_access.load_sales_dataset(store, cache, REGION, territory, line, months, client=client)
+    return handle, client.request_count - requests, time.perf_counter() - started
+
+
+def main():
+    warnings.simplefilter("ignore")
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    raw = generate_sales_frame(n_rows, region=REGION)
+    client = FakeSupabaseClient({"sales_data": to_rows(raw)}, latency=LATENCY)
+    store, cache = DatasetStore(), SalesQueryCache()
+    local_store.STORE_DIR = tempfile.mkdtemp()
+
+    print(f"{n_rows} рядків, затримка запиту {LATENCY * 1000:.0f} мс")
+    print(f"{'запит':>26} {'рядків':>8} {'запитів':>8} {'с':>6}  кеш")
+    handles = []
+    for territory, line, months in REQUESTS:
+        subset_hits = cache.subset_hits
+        handle, requests, seconds = load(store, cache, client, territory, line, months)
+        expected = data_access.load_sales_data(REGION, territory, line, months, client=client, use_local_store=False)
+        pd.testing.assert_frame_equal(sorted_frame(handle.frame), sorted_frame(expected))
+        source = "звуження" if cache.subset_hits > subset_hits else "база"
+        label = f"{territory}/{line}/{','.join(months) or '*'}"
+        print(f"{label:>26} {len(handle.frame):>8} {requests:>8} {seconds:>6.2f}  {source}")
+        handles.append(handle)
+    assert cache.subset_hits == len(REQUESTS) - 1, "вужчі запити мали обслуговуватися з кешу"
+
+    upload = raw[raw['month'] == '06'].head(500).drop(columns=['id']).assign(adding="2025_06_30", decade="30")
+    bulk_writer.write_rows(client, upload)
+    handle, requests, seconds = load(store, cache, client, "Всі", "Всі", ["06"])
+    expected = data_access.load_sales_data(REGION, "Всі", "Всі", ["06"], client=client, use_local_store=False)
+    pd.testing.assert_frame_equal(sorted_frame(handle.frame), sorted_frame(expected))
+    print(f"Після завантаження 500 рядків: набір перечитано ({requests} запитів, {seconds:.2f} с), "
+          f"версія набору {handle.version}")
+    print("Відповіді кешу збігаються з прямою вибіркою з бази.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Зведення sales_rollup: підтримка під час завантаження, збіг зі сторінкою і час завантаження огляду.
+1) Регіон без одного місяця перебудовується з сирих рядків, потім файли декад цього місяця
+   "завантажуються" не по порядку з refresh_partitions після кожного — verify_region має збігтися.
+   Збій заміни розділу лишає попередні рядки цілими і знімає покриття: load_rollup для цього
+   місяця повертає None, доки розділ не перераховано; так само — місяць, покритий лише за один із років.
+2) Без фільтра за вулицею агрегати огляду зі зведення збігаються з pandas по сирих рядках,
+   а прирости — з compute_actual_sales.
+3) Час завантаження огляду: сирі рядки проти зведення для кількох розмірів регіону.
+Запуск з кореня репозиторію: python -m benchmarks.bench_rollups [кількість рядків]
+"""
+import sys
+import time
+import warnings
+
+import pandas as pd
+
+from benchmarks.bench_aggregation import CASES, check, pandas_overview, with_gaps
+from benchmarks.fake_postgrest import FakeSupabaseClient
+from benchmarks.synthetic_data import generate_sales_frame
+from core import aggregation, bulk_writer, data_access, data_processing, rollups, schema
+from core.sales_cache import FILTER_COLUMNS, filter_sales_frame
+
+DEFAULT_ROWS = 400_000
+N_CITIES = 20
+LATENCY = 0.02
+OVERVIEW_COLUMNS = ['product_name', 'quantity', 'city', 'street', 'house_number', 'year', 'month', 'decade',
+                    'new_client'] + FILTER_COLUMNS
+
+
+def to_rows(df: pd.DataFrame) -> list:
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict(orient="records")
+
+
+def check_maintenance(raw: pd.DataFrame):
+    """Перебудова без червня, потім декади червня в порядку 10, 30, 20 — кожна з оновленням розділу."""
+    june = raw['month'] == '06'
+    client = FakeSupabaseClient({"sales_data": to_rows(raw[~june])}, latency=0)
+    rollups.rebuild_region(client, "Тестовий")
+    for decade in ("10", "30", "20"):
+        upload = raw[june & (raw['decade'] == decade)].drop(columns=['id'])
+        bulk_writer.write_rows(client, upload)
+        rollups.refresh_partitions(client, rollups.upload_partitions(upload))
+    assert rollups.verify_region(client, "Тестовий"), "зведення після завантажень не збігаються з перебудовою"
+    keys = len(client.tables[rollups.ROLLUP_TABLE])
+    print(f"Оновлення при завантаженні: {len(raw)} сирих рядків -> {keys} рядків зведення, verify OK")
+
+    stored = rollups.load_rollup(client, "Тестовий", "Всі", "Всі", ["06"])
+    client.failure_rate = 1.0
+    summary = rollups.refresh_partitions(client, [("Тестовий", 2025, 6)])
+    client.failure_rate = 0.0
+    assert summary["rows_failed"] > 0, "збій заміни розділу не повідомлено"
+    assert rollups.load_rollup(client, "Тестовий", "Всі", "Всі", ["06"]) is None, "непокритий розділ прочитано"
+    assert rollups.load_rollup(client, "Тестовий", "Всі", "Всі", ["05"]) is not None
+    assert len(client.tables[rollups.ROLLUP_TABLE]) == keys, "збій заміни змінив рядки зведення"
+    rollups.refresh_partitions(client, [("Тестовий", 2025, 6)])
+    pd.testing.assert_frame_equal(rollups.load_rollup(client, "Тестовий", "Всі", "Всі", ["06"]), stored)
+    print("Збій заміни розділу: рядки не змінились, покриття знято; після повтору зведення місяця те саме")
+
+    # Травень 2024 записано без оновлення зведень: травень 2025 покритий, але діапазон — ні
+    upload = raw[raw['month'] == '05'].drop(columns=['id']).assign(year='2024')
+    bulk_writer.write_rows(client, upload)
+    assert rollups.missing_partitions(client, "Тестовий", ["05"]) == [(2024, 5)]
+    assert rollups.load_rollup(client, "Тестовий", "Всі", "Всі", ["05"]) is None, "частково покритий місяць прочитано"
+    assert rollups.load_rollup(client, "Тестовий", "Всі", "Всі", []) is None, "частково покритий регіон прочитано"
+    assert rollups.load_rollup(client, "Тестовий", "Всі", "Всі", ["06"]) is not None
+    rollups.refresh_partitions(client, rollups.upload_partitions(upload))
+    assert rollups.verify_region(client, "Тестовий"), "зведення 2024 року не збігаються з перебудовою"
+    print("Місяць, покритий лише за один рік: load_rollup повертає None, доки розділ не перераховано")
+
+
+def check_page(raw: pd.DataFrame):
+    rollup = rollups.build_rollup(raw)
+    for territory, line, months, cities, streets in CASES:
+        if streets:
+            continue
+        expected_kpis, expected_pivot, _ = pandas_overview(raw, territory, line, months, cities, streets)
+        selected = filter_sales_frame(rollup, territory, line, [int(m) for m in months])
+        latest = rollups.latest_decade_rows(selected)
+        latest = latest[latest['city'].isin(cities)] if cities else latest
+        check(expected_kpis, expected_pivot,
+              aggregation.frame_aggregates(latest, unique_clients=expected_kpis["unique_clients"]))
+
+    actual = data_processing.compute_actual_sales(schema.compact_sales_frame(raw))
+    actual = actual[actual['actual_quantity'] > 0]
+    expected = actual.groupby(['product_name', 'month', 'decade'], observed=True)['actual_quantity'].sum()
+    expected.index = expected.index.set_levels(
+        [expected.index.levels[0].astype(str), expected.index.levels[1].astype(int),
+         expected.index.levels[2].astype(int)])
+    stored = rollup.groupby(['product_name', 'month', 'decade'])['actual_quantity'].sum()
+    stored = stored[stored > 0]
+    pd.testing.assert_series_equal(stored.sort_index(), expected.sort_index().astype('int64'),
+                                   check_names=False, check_index_type=False)
+    totals = rollups.period_totals(data_processing.prepare_sales_frame(raw))
+    assert rollups.period_totals(rollup).equals(totals), "суми по декадах зведення не збігаються з рядками"
+    print("Агрегати огляду (без фільтра за вулицею) і прирости збігаються з pandas по сирих рядках.")
+
+
+def load_times(n_rows: int) -> tuple:
+    raw = generate_sales_frame(n_rows, region="Тестовий", n_cities=N_CITIES)
+    rollup = rollups._table_rows(rollups.build_rollup(raw))
+    rollup.insert(0, 'id', range(1, len(rollup) + 1))
+    coverage = rollup[['region', 'year', 'month']].drop_duplicates()
+    client = FakeSupabaseClient({"sales_data": to_rows(raw), rollups.ROLLUP_TABLE: to_rows(rollup),
+                                 rollups.COVERAGE_TABLE: to_rows(coverage)}, latency=LATENCY)
+
+    started = time.perf_counter()
+    df = data_processing.prepare_sales_frame(data_access.load_sales_data(
+        "Тестовий", "Всі", "Всі", [], client=client, use_local_store=False, columns=OVERVIEW_COLUMNS))
+    latest = df[df['decade'] == df.groupby(['year', 'month'])['decade'].transform('max')]
+    aggregation.frame_aggregates(latest)
+    raw_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    stored = rollups.load_rollup(client, "Тестовий", "Всі", "Всі", [])
+    aggregation.frame_aggregates(rollups.latest_decade_rows(stored), unique_clients=0)
+    rollup_seconds = time.perf_counter() - started
+    return len(rollup), raw_seconds, rollup_seconds
+
+
+def main():
+    warnings.simplefilter("ignore")
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    raw = with_gaps(generate_sales_frame(n_rows // 4, region="Тестовий", n_cities=N_CITIES))
+    check_maintenance(raw)
+    check_page(raw)
+
+    print(f"Завантаження огляду, {N_CITIES} міст, затримка запиту {LATENCY * 1000:.0f} мс")
+    print(f"{'сирих рядків':>13} {'ключів зведення':>16} {'сирі рядки, с':>14} {'зведення, с':>12}")
+    for size in (n_rows // 4, n_rows // 2, n_rows):
+        keys, raw_seconds, rollup_seconds = load_times(size)
+        print(f"{size:>13} {keys:>16} {raw_seconds:>14.2f} {rollup_seconds:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Затримка однієї взаємодії з фільтрами вкладки "Загальний огляд" на повному регіоні:
+попередній шлях сторінки (transform('max'), відфільтровані копії, дохід по рядках, groupby/pivot_table)
+проти зрізу куба продажів (core/sales_cube.py), побудованого один раз на набір даних.
+Для кожного набору фільтрів перевіряє, що агрегати, динаміка й дохід збігаються.
+Запуск з кореня репозиторію: python -m benchmarks.bench_sales_cube [кількість рядків]
+"""
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import PRODUCTS, generate_sales_frame
+from core import aggregation, data_processing, schema, ui_components
+from core.price_index import PriceIndex
+from core.sales_cube import SalesCube
+
+DEFAULT_ROWS = 1_000_000
+REPEATS = 5
+
+# (міста, вулиці) — послідовні взаємодії з фільтрами
+INTERACTIONS = [
+    ([], []),
+    (["Місто 1", "Місто 2"], []),
+    (["Місто 1", "Місто 2"], ["вул. Вулиця 3", "вул. Вулиця 7"]),
+    ([], ["вул. Вулиця 5"]),
+]
+
+
+def price_index() -> PriceIndex:
+    """Ціни на частину продуктів і місяців (решта — NaN або as-of заповнення)."""
+    rng = np.random.default_rng(1)
+    rows = [(product, month, round(float(rng.uniform(50, 500)), 2))
+            for product in list(PRODUCTS)[:50] for month in (1, 3, 4, 7, 9)]
+    return PriceIndex.from_frame(pd.DataFrame(rows, columns=['product_name', 'month', 'price']))
+
+
+def row_path(df_full: pd.DataFrame, prices: PriceIndex, cities, streets) -> tuple:
+    """Що сторінка робила на кожну взаємодію до куба."""
+    df_full_with_revenue = prices.add_revenue(df_full)
+    is_latest = df_full['decade'] == df_full.groupby(['year', 'month'])['decade'].transform('max')
+    df_for_overview = df_full[is_latest]
+    max_decade = int(df_for_overview['decade'].max())
+    df_latest_decade = df_full_with_revenue[is_latest & (df_full['decade'] == max_decade)]
+    sorted(c for c in df_for_overview['city'].dropna().unique().tolist() if c != '')
+    sorted(s for s in df_for_overview['street'].dropna().unique().tolist() if s != '')
+    df_display = ui_components.apply_filters(df_for_overview, cities, streets)
+    overview = aggregation.frame_aggregates(df_display)
+    aggregation.overview_kpis(overview)
+    aggregation.city_product_pivot(overview)
+    dynamics = ui_components.apply_filters(df_full_with_revenue, cities, streets)
+    dynamics = dynamics.groupby(['year', 'month', 'decade'], observed=True)[['quantity', 'revenue']].sum()
+    return overview, dynamics, df_latest_decade['revenue'].sum()
+
+
+def cube_path(cube: SalesCube, prices: PriceIndex, cities, streets) -> tuple:
+    """Те саме зі зрізів куба."""
+    locations = cube.locations
+    sorted(c for c in locations['city'].unique().tolist() if c != '')
+    sorted(s for s in locations['street'].unique().tolist() if s != '')
+    overview = cube.overview(cities, streets)
+    aggregation.overview_kpis(overview)
+    aggregation.city_product_pivot(overview)
+    dynamics = cube.dynamics(prices, cities, streets).set_index(['year', 'month', 'decade'])
+    return overview, dynamics, cube.latest_decade_revenue(prices)
+
+
+def best_of(fn, *args) -> tuple:
+    times = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - started)
+    return min(times) * 1000, result
+
+
+def check(expected: tuple, actual: tuple):
+    expected_overview, expected_dynamics, expected_revenue = expected
+    overview, dynamics, revenue = actual
+    for name in ('product_month', 'city_product'):
+        left = getattr(overview, name)
+        right = getattr(expected_overview, name)
+        keys = [c for c in left.columns if c != 'quantity']
+        pd.testing.assert_frame_equal(left.sort_values(keys, ignore_index=True),
+                                      right.sort_values(keys, ignore_index=True), check_dtype=False)
+    assert overview.unique_clients == expected_overview.unique_clients
+    expected_dynamics = expected_dynamics.reset_index().astype({'year': int, 'month': int, 'decade': int})
+    dynamics = dynamics.reset_index().astype({'year': int, 'month': int, 'decade': int})
+    pd.testing.assert_frame_equal(dynamics, expected_dynamics, check_dtype=False, rtol=1e-9)
+    assert np.isclose(revenue, expected_revenue, rtol=1e-9)
+
+
+def main():
+    warnings.simplefilter("ignore")
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    raw = generate_sales_frame(n_rows, region="Тестовий", categorical=True, n_cities=20)
+    df_full = data_processing.prepare_sales_frame(schema.compact_sales_frame(raw))
+    del raw
+    prices = price_index()
+
+    started = time.perf_counter()
+    cube = SalesCube.from_frame(df_full)
+    build_seconds = time.perf_counter() - started
+    print(f"{n_rows} рядків; куб: {cube.by_city.size} клітинок місто × продукт × період × декада, "
+          f"{len(cube.cells['quantity'])} клітинок з вулицею, "
+          f"{cube.memory_mb:.1f} МБ, побудова {build_seconds:.2f} с (один раз на набір)")
+    print(f"{'фільтри':>22} {'рядки, мс':>10} {'куб, мс':>8}")
+    for cities, streets in INTERACTIONS:
+        row_ms, expected = best_of(row_path, df_full, prices, cities, streets)
+        cube_ms, actual = best_of(cube_path, cube, prices, cities, streets)
+        check(expected, actual)
+        label = f"{len(cities)} міст, {len(streets)} вулиць"
+        print(f"{label:>22} {row_ms:>10.1f} {cube_ms:>8.1f}")
+    print("Агрегати, динаміка й дохід зрізів куба збігаються з розрахунком по рядках.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Пікова пам'ять N одночасних сесій з тим самим набором продажів:
+    копії   — як раніше: кожна сесія отримує власну копію з st.cache_data і робить глибокі копії на сторінці;
+    спільне — DatasetStore: один кадр і одна підготовка на процес, у сесіях лише copy-on-write копії.
+Пам'ять рахується через tracemalloc (NumPy реєструє свої буфери в ньому).
+Запуск з кореня репозиторію: python -m benchmarks.bench_shared_store [рядків] [сесій ...]
+"""
+import gc
+import pickle
+import sys
+import tracemalloc
+import warnings
+
+import pandas as pd
+
+from benchmarks.synthetic_data import generate_sales_frame
+from core import data_processing, schema
+from core.dataset_store import DatasetStore
+
+DEFAULT_ROWS = 200_000
+DEFAULT_SESSIONS = [1, 4, 16]
+
+
+def page_frames(df_full: pd.DataFrame) -> list:
+    """Кадри, які сторінка тримає під час виконання (після підготовки df_full)."""
+    df_full_with_revenue = df_full.copy(deep=False)
+    max_decade_per_month = df_full.groupby(['year', 'month'])['decade'].transform('max')
+    df_for_overview = df_full[df_full['decade'] == max_decade_per_month]
+    return [df_full, df_full_with_revenue, df_for_overview]
+
+
+def legacy_session(cached: pd.DataFrame) -> list:
+    # st.cache_data повертає кожному викликачу розпакований pickle-дублікат
+    session_df = pickle.loads(pickle.dumps(cached))
+    df_full = data_processing.create_full_address(session_df.copy())
+    for col in ('year', 'month', 'decade'):
+        df_full[col] = pd.to_numeric(df_full[col], errors='coerce')
+    df_full_with_revenue = df_full.copy()
+    max_decade_per_month = df_full.groupby(['year', 'month'])['decade'].transform('max')
+    df_for_overview = df_full[df_full['decade'] == max_decade_per_month].copy()
+    return [session_df, df_full, df_full_with_revenue, df_for_overview]
+
+
+def shared_session(store: DatasetStore, loaded: pd.DataFrame) -> list:
+    handle = store.put(("Тестовий", "Всі", "Всі", ()), loaded)
+    return [handle, handle.frame] + page_frames(handle.derive('sales_page', data_processing.prepare_sales_frame))
+
+
+def measure(n_sessions: int, start_session) -> float:
+    gc.collect()
+    tracemalloc.start()
+    sessions = [start_session() for _ in range(n_sessions)]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sessions
+    return peak / 1024 ** 2
+
+
+def main():
+    warnings.simplefilter("ignore")
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    session_counts = [int(arg) for arg in sys.argv[2:]] or DEFAULT_SESSIONS
+    cached = schema.compact_sales_frame(generate_sales_frame(n_rows, categorical=True))
+    print(f"Набір: {n_rows} рядків, {schema.frame_memory_mb(cached):.1f} МБ")
+    print(f"{'сесій':>6} {'копії, МБ':>10} {'спільне, МБ':>12} {'економія':>9}")
+    for n_sessions in session_counts:
+        legacy_mb = measure(n_sessions, lambda: legacy_session(cached))
+        store = DatasetStore()
+        # Кожна сесія приносить власний щойно завантажений кадр; сховище залишає лише перший
+        shared_mb = measure(n_sessions, lambda: shared_session(store, cached.copy()))
+        print(f"{n_sessions:>6} {legacy_mb:>10.1f} {shared_mb:>12.1f} {legacy_mb / shared_mb:>8.1f}x")
+        del store
+        gc.collect()
+
+
+if __name__ == "__main__":
+    main()
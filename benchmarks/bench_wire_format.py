@@ -0,0 +1,94 @@
+"""
+Порівняння форматів масового читання sales_data: JSON (масив словників) і CSV (text/csv).
+Для кожного формату — байти відповіді, час декодування сторінок у DataFrame і пікова RSS
+процесу під час декодування (окремий дочірній процес на кожен вимір).
+Запуск з кореня репозиторію: python -m benchmarks.bench_wire_format [кількість рядків]
+"""
+import json
+import multiprocessing
+import sys
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+from benchmarks.fake_postgrest import FakeQuery, FakeSupabaseClient
+from benchmarks.synthetic_data import generate_sales_rows
+from core import schema, sales_queries
+
+DEFAULT_ROWS = 200_000
+
+
+def serialize_pages(rows: list, wire_format: str) -> list:
+    """Тіла відповідей по сторінках PAGE_SIZE, як їх віддає сервер."""
+    columns = sales_queries.SALES_COLUMNS
+    pages = []
+    for start in range(0, len(rows), sales_queries.PAGE_SIZE):
+        page = [{c: row.get(c) for c in columns} for row in rows[start:start + sales_queries.PAGE_SIZE]]
+        pages.append(FakeQuery._to_csv(page, columns) if wire_format == "csv" else json.dumps(page, ensure_ascii=False))
+    return pages
+
+
+def decode(pages: list, wire_format: str) -> pd.DataFrame:
+    """Клієнтська частина: розбір тіл сторінок і побудова кадру (як у sales_queries)."""
+    if wire_format == "csv":
+        df = pa.concat_tables([sales_queries.decode_csv_page(page) for page in pages]).to_pandas()
+        df['quantity'] = df['quantity'].fillna(0).astype(int)
+        return df
+    rows = []
+    for page in pages:
+        rows.extend(json.loads(page))
+    return sales_queries.rows_to_sales_frame(rows)
+
+
+def _status_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1])
+    return 0
+
+
+def _measure_child(pages: list, wire_format: str, queue):
+    baseline = _status_kb("VmRSS:")
+    started = time.perf_counter()
+    df = decode(pages, wire_format)
+    seconds = time.perf_counter() - started
+    queue.put((seconds, (_status_kb("VmHWM:") - baseline) / 1024, schema.frame_memory_mb(df)))
+
+
+def measure(pages: list, wire_format: str) -> tuple:
+    """(секунди, приріст пікової RSS у МБ, розмір кадру у МБ) — у новому процесі без успадкованої купи."""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_measure_child, args=(pages, wire_format, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    rows = generate_sales_rows(n_rows, region="Тестовий")
+
+    # Обидва шляхи через той самий клієнт мають дати однаковий кадр після компактної схеми
+    client = FakeSupabaseClient({"sales_data": rows}, latency=0, serialize=True)
+    frames = {fmt: sales_queries.fetch_sales_frame(client, "Тестовий", "Всі", "Всі", [], wire_format=fmt)
+              for fmt in ("json", "csv")}
+    pd.testing.assert_frame_equal(schema.compact_sales_frame(frames["json"]), schema.compact_sales_frame(frames["csv"]),
+                                  check_categorical=False)
+    del frames
+
+    print(f"{n_rows} рядків, сторінки по {sales_queries.PAGE_SIZE}")
+    print(f"{'формат':>7} {'МБ відповіді':>13} {'декодування, с':>15} {'пік RSS, МБ':>12} {'кадр, МБ':>9}")
+    for wire_format in ("json", "csv"):
+        pages = serialize_pages(rows, wire_format)
+        wire_mb = sum(len(page.encode("utf-8")) for page in pages) / 1024 ** 2
+        seconds, peak_mb, frame_mb = measure(pages, wire_format)
+        print(f"{wire_format:>7} {wire_mb:>13.1f} {seconds:>15.2f} {peak_mb:>12.1f} {frame_mb:>9.1f}")
+        del pages
+
+
+if __name__ == "__main__":
+    main()
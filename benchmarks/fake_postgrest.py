@@ -0,0 +1,328 @@
+"""
+Локальна заміна PostgREST/Supabase для бенчмарків.
+Підтримує підмножину API supabase-py (table/select/eq/in_/gt/lte/order/range/limit/csv/insert/upsert/delete/execute)
+і додає штучну мережеву затримку на кожен запит. З функцій бази (rpc) емулюється
+sales_rollup_replace_partition (sql/sales_rollup.sql).
+"""
+import bisect
+import csv
+import io
+import json
+import random
+import threading
+import time
+
+
+# Таблиця з колонкою revision (sql/sales_data_revision.sql)
+REVISION_TABLE = "sales_data"
+
+
+class FakeAPIError(Exception):
+    """Аналог postgrest.exceptions.APIError для штучних збоїв запису."""
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+        self.error = None
+
+
+class FakeQuery:
+    def __init__(self, client, table_name: str):
+        self.client = client
+        self.table_name = table_name
+        self.columns = None
+        self.count_method = None
+        self.filters = []
+        self.bounds = []
+        self.order_by = None
+        self.order_desc = False
+        self.offset = 0
+        self.limit_value = None
+        self.write = None
+        self.csv_format = False
+
+    def select(self, *columns, count=None):
+        names = [c.strip() for part in columns for c in part.split(",") if c.strip()]
+        self.columns = None if names in ([], ["*"]) else names
+        self.count_method = count
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(("eq", column, value))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(("in", column, frozenset(values)))
+        return self
+
+    def gt(self, column, value):
+        self.bounds.append(("gt", column, value))
+        return self
+
+    def lte(self, column, value):
+        self.bounds.append(("lte", column, value))
+        return self
+
+    def order(self, column, desc: bool = False):
+        self.order_by = column
+        self.order_desc = desc
+        return self
+
+    def limit(self, size: int):
+        self.limit_value = size
+        return self
+
+    def csv(self):
+        """Відповідь у форматі text/csv (як Accept: text/csv у PostgREST): рядок із заголовком."""
+        self.csv_format = True
+        return self
+
+    def insert(self, rows):
+        self.write = (list(rows), None)
+        return self
+
+    def upsert(self, rows, on_conflict: str = ""):
+        self.write = (list(rows), on_conflict or None)
+        return self
+
+    def delete(self):
+        self.write = (None, None)
+        return self
+
+    def range(self, start: int, end: int):
+        self.offset = start
+        self.limit_value = end - start + 1
+        return self
+
+    @staticmethod
+    def _check(row, op, column, value) -> bool:
+        if op == "eq":
+            return row.get(column) == value
+        if op == "in":
+            return row.get(column) in value
+        raise ValueError(f"Непідтримуваний фільтр: {op}")
+
+    def _matching_rows(self) -> list:
+        # Результат фільтрації кешується, щоб час "сервера" не залежав від Python-циклу
+        rows = self.client.tables.get(self.table_name, [])
+        key = (self.table_name, len(rows), tuple(self.filters), self.order_by)
+        with self.client._lock:
+            cached = self.client._filter_cache.get(key)
+        if cached is None:
+            cached = [row for row in rows if all(self._check(row, *f) for f in self.filters)]
+            keys = None
+            if self.order_by is not None:
+                cached = sorted(cached, key=lambda row: row[self.order_by])
+                keys = [row[self.order_by] for row in cached]
+            cached = (cached, keys)
+            with self.client._lock:
+                self.client._filter_cache[key] = cached
+        return cached
+
+    def _apply_bounds(self, rows: list, keys: list) -> list:
+        lo, hi = 0, len(rows)
+        for op, column, value in self.bounds:
+            if column == self.order_by:
+                # Аналог індексного пошуку: бінарний пошук по відсортованих ключах
+                if op == "gt":
+                    lo = max(lo, bisect.bisect_right(keys, value))
+                else:
+                    hi = min(hi, bisect.bisect_right(keys, value))
+        rows = rows[lo:hi]
+        for op, column, value in self.bounds:
+            if column == self.order_by:
+                continue
+            if op == "gt":
+                rows = [row for row in rows if row[column] > value]
+            else:
+                rows = [row for row in rows if row[column] <= value]
+        return rows
+
+    @staticmethod
+    def _conflict_key(row, on_conflict: str) -> tuple:
+        # on_conflict може містити кілька колонок через кому (складений унікальний ключ)
+        return tuple(row.get(c) for c in on_conflict.split(","))
+
+    def _execute_delete(self) -> FakeResponse:
+        with self.client._lock:
+            table = self.client.tables.setdefault(self.table_name, [])
+            deleted = [row for row in table if all(self._check(row, *f) for f in self.filters)]
+            table[:] = [row for row in table if not all(self._check(row, *f) for f in self.filters)]
+            self.client._unique_index = {k: v for k, v in self.client._unique_index.items() if k[0] != self.table_name}
+            self.client._filter_cache = {k: v for k, v in self.client._filter_cache.items() if k[0] != self.table_name}
+        return FakeResponse(deleted)
+
+    def _execute_write(self) -> FakeResponse:
+        rows, on_conflict = self.write
+        self.client.wait()
+        if rows is None:
+            return self._execute_delete()
+        if self.client.max_payload_rows is not None and len(rows) > self.client.max_payload_rows:
+            raise FakeAPIError(f"Request entity too large: {len(rows)} rows")
+        with self.client._lock:
+            if self.client.random.random() < self.client.failure_rate:
+                raise FakeAPIError("Штучний збій запиту")
+            table = self.client.tables.setdefault(self.table_name, [])
+            positions = self.client._unique_index.setdefault((self.table_name, on_conflict), {
+                self._conflict_key(row, on_conflict): i for i, row in enumerate(table)
+            }) if on_conflict else None
+            written = []
+            revisions = self.table_name == REVISION_TABLE
+            for row in rows:
+                row = dict(row)
+                key = self._conflict_key(row, on_conflict) if positions is not None else None
+                if positions is not None and key in positions:
+                    existing = table[positions[key]]
+                    changed = any(existing.get(c) != v for c, v in row.items())
+                    existing.update(row)
+                    if revisions and changed:
+                        # Як тригер sql/sales_data_revision.sql: змінений рядок отримує нову ревізію
+                        existing["revision"] = self.client.next_revision()
+                    written.append(dict(existing))
+                    continue
+                self.client._next_id += 1
+                row.setdefault("id", self.client._next_id)
+                if revisions:
+                    row["revision"] = self.client.next_revision()
+                table.append(row)
+                if positions is not None:
+                    positions[key] = len(table) - 1
+                written.append(dict(row))
+            # Дані таблиці змінились — кешовані результати фільтрації більше не дійсні
+            self.client._filter_cache = {k: v for k, v in self.client._filter_cache.items() if k[0] != self.table_name}
+        return FakeResponse(written)
+
+    def execute(self) -> FakeResponse:
+        if self.write is not None:
+            return self._execute_write()
+        started = time.perf_counter()
+        self.client.wait(skipped_rows=self.offset)
+        rows = self._apply_bounds(*self._matching_rows())
+        if self.order_desc:
+            rows = rows[::-1]
+        count = len(rows) if self.count_method else None
+        end = None if self.limit_value is None else self.offset + self.limit_value
+        rows = rows[self.offset:end]
+        columns = self.columns if self.columns is not None else list(rows[0]) if rows else []
+        if self.csv_format:
+            data = self._to_csv(rows, columns)
+            received = len(data.encode("utf-8"))
+        else:
+            data = [{c: row.get(c) for c in columns} for row in rows]
+            received = 0
+            if self.client.serialize:
+                # Як справжній клієнт: тіло відповіді — JSON-текст, який розбирається на стороні застосунку
+                body = json.dumps(data, ensure_ascii=False)
+                received = len(body.encode("utf-8"))
+                data = json.loads(body)
+        with self.client._lock:
+            self.client.request_times.append(time.perf_counter() - started)
+            self.client.bytes_received += received
+        return FakeResponse(data, count)
+
+    @staticmethod
+    def _to_csv(rows: list, columns: list) -> str:
+        # PostgREST записує NULL як порожнє поле, а заголовок — завжди, навіть для порожньої сторінки
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(columns)
+        writer.writerows([["" if row.get(c) is None else row.get(c) for c in columns] for row in rows])
+        return buffer.getvalue()
+
+
+class FakeRpc:
+    """Виклик функції бази: виконується атомарно (під блокуванням), збій не змінює таблиць."""
+
+    def __init__(self, client, function: str, params: dict):
+        self.client = client
+        self.function = function
+        self.params = params
+
+    def execute(self) -> FakeResponse:
+        handler = getattr(self, "_" + self.function, None)
+        if handler is None:
+            raise FakeAPIError(f"Could not find the function {self.function}")
+        self.client.wait()
+        with self.client._lock:
+            if self.client.random.random() < self.client.failure_rate:
+                raise FakeAPIError("Штучний збій запиту")
+            data = handler(**self.params)
+            self.client._filter_cache = {}
+            self.client._unique_index = {}
+        return FakeResponse(data)
+
+    def _sales_rollup_replace_partition(self, p_region, p_year, p_month, p_rows) -> int:
+        def key(row):
+            return tuple(row[c] for c in ("territory", "product_line", "product_name", "city", "decade"))
+
+        partition = (p_region, p_year, p_month)
+        incoming = {key(row): row for row in p_rows if (row["region"], row["year"], row["month"]) == partition}
+        table = self.client.tables.setdefault("sales_rollup", [])
+        kept = []
+        for row in table:
+            if (row["region"], row["year"], row["month"]) != partition:
+                kept.append(row)
+            elif key(row) in incoming:
+                # Upsert зберігає id наявного ключа
+                row.update(incoming.pop(key(row)))
+                kept.append(row)
+        for row in incoming.values():
+            self.client._next_id += 1
+            kept.append({"id": self.client._next_id, **row})
+        table[:] = kept
+        coverage = self.client.tables.setdefault("sales_rollup_coverage", [])
+        coverage[:] = [row for row in coverage if (row["region"], row["year"], row["month"]) != partition]
+        coverage.append({"region": p_region, "year": p_year, "month": p_month, "refreshed_at": time.time()})
+        return len([row for row in p_rows if (row["region"], row["year"], row["month"]) == partition])
+
+
+class FakeSupabaseClient:
+    """
+    Клієнт, що зберігає таблиці у пам'яті.
+    latency — затримка одного запиту в секундах;
+    offset_cost — додаткова затримка на кожен пропущений через OFFSET рядок
+    (Postgres мусить прочитати й відкинути ці рядки);
+    failure_rate — частка запитів на запис, що завершуються помилкою;
+    max_payload_rows — найбільша кількість рядків в одному запиті на запис;
+    serialize — JSON-відповіді проходять через json.dumps/json.loads (розмір рахується в bytes_received).
+    """
+
+    def __init__(self, tables: dict, latency: float = 0.05, offset_cost: float = 0.0,
+                 failure_rate: float = 0.0, max_payload_rows: int = None, seed: int = 0, serialize: bool = False):
+        self.tables = tables
+        self.latency = latency
+        self.offset_cost = offset_cost
+        self.failure_rate = failure_rate
+        self.max_payload_rows = max_payload_rows
+        self.serialize = serialize
+        self.bytes_received = 0
+        self.random = random.Random(seed)
+        self._unique_index = {}
+        self._next_id = max((row.get("id", 0) for rows in tables.values() for row in rows), default=0)
+        # Ревізії рядків (послідовність sales_data_revision_seq): наявні рядки нумеруються за порядком
+        self._revision = 0
+        for row in tables.get(REVISION_TABLE, []):
+            row.setdefault("revision", self.next_revision())
+        self.request_count = 0
+        self.request_times = []
+        self._lock = threading.Lock()
+        self._filter_cache = {}
+
+    def next_revision(self) -> int:
+        self._revision += 1
+        return self._revision
+
+    def wait(self, skipped_rows: int = 0):
+        with self._lock:
+            self.request_count += 1
+        delay = self.latency + skipped_rows * self.offset_cost
+        if delay:
+            time.sleep(delay)
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, function: str, params: dict) -> FakeRpc:
+        return FakeRpc(self, function, params)
@@ -0,0 +1,78 @@
+"""Генерація синтетичних даних sales_data для бенчмарків."""
+import numpy as np
+import pandas as pd
+
+# 60 умовних SKU, як у типовому регіоні
+PRODUCTS = {f"Продукт {i} №30": "Лінія 1" if i % 2 else "Лінія 2" for i in range(60)}
+
+
+def _labels(prefix: str, n: int) -> np.ndarray:
+    return np.array([f"{prefix}{i}" for i in range(n)], dtype=object)
+
+
+def generate_sales_frame(n_rows: int, region: str = "Тестовий", seed: int = 0,
+                         categorical: bool = False, n_cities: int = None) -> pd.DataFrame:
+    """
+    Повертає DataFrame у форматі таблиці sales_data (текстові значення — рядки, як у базі).
+    categorical=True будує текстові колонки одразу як category — так можна згенерувати
+    мільйони рядків без гігабайтів Python-рядків.
+    n_cities — кількість міст (за замовчуванням росте з кількістю адрес).
+    """
+    rng = np.random.default_rng(seed)
+    products = np.array(list(PRODUCTS), dtype=object)
+    n_addresses = max(10, n_rows // 40)
+    n_cities = n_cities or max(3, n_addresses // 50)
+
+    address_city = rng.integers(0, n_cities, n_addresses)
+    address_street = rng.integers(0, 30, n_addresses)
+    address_house = rng.integers(1, 120, n_addresses)
+
+    a = rng.integers(0, n_addresses, n_rows)
+    p = rng.integers(0, len(products), n_rows)
+    month = rng.integers(1, 13, n_rows)
+    decade_code = rng.integers(0, 3, n_rows)
+
+    months = np.array([f"{m:02d}" for m in range(1, 13)], dtype=object)
+    decades = np.array(["10", "20", "30"], dtype=object)
+    cities = _labels("Місто ", n_cities)
+    streets = _labels("вул. Вулиця ", 30)
+    houses = np.array([str(h) for h in range(120)], dtype=object)
+    addresses = np.array([f"{cities[address_city[i]]}, {streets[address_street[i]]}, {address_house[i]}"
+                          for i in range(n_addresses)], dtype=object)
+    addings = np.array([f"2025_{m}_{d}" for m in months for d in decades], dtype=object)
+    lines = np.array(["Лінія 2", "Лінія 1"], dtype=object)
+
+    text = {
+        "distributor": (_labels("Дистриб'ютор ", 4), rng.integers(0, 4, n_rows)),
+        "client": (_labels("Клієнт ", n_addresses), a),
+        "new_client": (_labels("Аптека ", 500), a % 500),
+        "product_name": (products, p),
+        "city": (cities, address_city[a]),
+        "street": (streets, address_street[a]),
+        "house_number": (houses, address_house[a]),
+        "territory": (_labels("T", 4), address_city[a] % 4),
+        "adding": (addings, (month - 1) * 3 + decade_code),
+        "product_line": (lines, p % 2),
+        "delivery_address": (addresses, a),
+        "year": (np.array(["2025"], dtype=object), np.zeros(n_rows, dtype=np.int64)),
+        "month": (months, month - 1),
+        "decade": (decades, decade_code),
+        "region": (np.array([region], dtype=object), np.zeros(n_rows, dtype=np.int64)),
+    }
+
+    data = {"id": np.arange(1, n_rows + 1), "quantity": rng.integers(1, 20, n_rows)}
+    for col, (values, codes) in text.items():
+        data[col] = pd.Categorical(values)[codes] if categorical else values[codes]
+
+    columns = ["id", "distributor", "client", "new_client", "product_name", "quantity", "city", "street",
+               "house_number", "territory", "adding", "product_line", "delivery_address", "year", "month",
+               "decade", "region"]
+    return pd.DataFrame(data)[columns]
+
+
+def generate_sales_rows(n_rows: int, region: str = "Тестовий", seed: int = 0, n_cities: int = None) -> list:
+    """Ті самі дані у вигляді списку словників, як їх повертає Supabase."""
+    df = generate_sales_frame(n_rows, region=region, seed=seed, n_cities=n_cities)
+    df["id"] = df["id"].astype(object)
+    df["quantity"] = df["quantity"].astype(object)
+    return df.to_dict(orient="records")
@@ -0,0 +1,141 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Колонка з адресою в таблиці golden_addres та у файлі завантаження
+ADDRESS_COLUMN = "Факт.адреса доставки"
+
+# Поля результату зіставлення та відповідні колонки таблиці golden_addres
+GOLDEN_FIELDS = {'city': 'Місто', 'street': 'Вулиця', 'number': 'Номер будинку', 'territory': 'Територія'}
+
+
+def normalize_address(address: str) -> str:
+    """
+    Більш надійно очищує і стандартизує рядок адреси.
+    Видаляє невидимі символи, зайві пробіли та приводить до нижнього регістру.
+    """
+    if not isinstance(address, str):
+        address = str(address)
+
+    address = address.replace('\xa0', ' ')
+    address = re.sub(r'\s+', ' ', address)
+    return address.lower().strip()
+
+
+def _factorize_normalized(addresses: pd.Series) -> tuple:
+    """
+    Повертає (codes, keys): нормалізовані унікальні адреси keys і номер ключа для кожного рядка.
+    Очищуються лише унікальні значення, тож повтори адрес нічого не коштують.
+    """
+    values = addresses.astype(object).to_numpy()
+    codes, uniques = pd.factorize(values)
+    keys = (
+        pd.Series(uniques, dtype=object).astype(str)
+        .str.replace('\xa0', ' ', regex=False)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.lower()
+        .str.strip()
+        .to_numpy(dtype=object)
+    )
+    # Пропуски factorize не нумерує; None і NaN дають різні рядки ('none' / 'nan'), як у normalize_address
+    missing = np.flatnonzero(codes == -1)
+    if len(missing):
+        codes[missing] = len(keys) + np.arange(len(missing))
+        keys = np.concatenate([keys, np.array([normalize_address(values[i]) for i in missing], dtype=object)])
+    return codes, keys
+
+
+def normalize_address_series(addresses: pd.Series) -> pd.Series:
+    """Векторний варіант normalize_address з тим самим результатом."""
+    codes, keys = _factorize_normalized(addresses)
+    return pd.Series(keys[codes], index=addresses.index, dtype=object)
+
+
+def build_golden_frame(golden_rows: list) -> pd.DataFrame:
+    """
+    Будує таблицю "золотих" адрес з індексом за нормалізованою адресою.
+    Як і словник golden_map, при повторі ключа перемагає останній запис.
+    """
+    rows = [row for row in golden_rows if row.get(ADDRESS_COLUMN)]
+    columns = {field: [row.get(column) for row in rows] for field, column in GOLDEN_FIELDS.items()}
+    columns['number'] = [str(value) if value is not None else None for value in columns['number']]
+    golden = pd.DataFrame({field: pd.Series(values, dtype=object) for field, values in columns.items()})
+    # Оригінальне написання адреси — для підказок нечіткого пошуку
+    golden['address'] = pd.Series([row.get(ADDRESS_COLUMN) for row in rows], dtype=object)
+    golden.index = normalize_address_series(pd.Series([row.get(ADDRESS_COLUMN) for row in rows], dtype=object))
+    return golden[~golden.index.duplicated(keep='last')]
+
+
+def match_golden_addresses(addresses: pd.Series, golden: pd.DataFrame) -> pd.DataFrame:
+    """
+    Зіставляє адреси з "золотими" одним join за нормалізованим ключем.
+    Повертає колонки city, street, number, territory (None, якщо адресу не знайдено)
+    з індексом 0..n-1, як раніше pd.json_normalize.
+    """
+    codes, keys = _factorize_normalized(addresses)
+    # Позиція в golden для кожного рядка; -1 вказує на додатковий порожній (None) рядок у кінці
+    positions = golden.index.get_indexer(keys)[codes]
+    # Будуємо кадр зі списків Python — типи колонок виводяться так само, як у pd.json_normalize
+    return pd.DataFrame({
+        field: np.append(golden[field].to_numpy(dtype=object), None)[positions].tolist() for field in GOLDEN_FIELDS
+    })
+
+
+# --- Нечіткий пошук для адрес, яких немає в еталонному списку ---
+
+# Довжина символьних n-грам індексу
+NGRAM_SIZE = 3
+
+# Мінімальна схожість (коефіцієнт Дайса за n-грамами), з якою адреса пропонується як варіант
+SUGGESTION_MIN_SCORE = 0.5
+
+
+def _ngrams(address: str, size: int = NGRAM_SIZE) -> set:
+    """Множина символьних n-грам нормалізованої адреси без розділових знаків."""
+    text = ' ' + re.sub(r'[\s.,;:"\'()-]+', ' ', normalize_address(address)).strip() + ' '
+    return {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+
+
+class GoldenAddressIndex:
+    """
+    Інвертований індекс символьних n-грам "золотих" адрес.
+    Для запиту рахує кількість спільних n-грам з кожним кандидатом (лише за списками
+    n-грам запиту, без перебору всіх адрес) і ранжує кандидатів за коефіцієнтом Дайса.
+    """
+
+    def __init__(self, addresses: list, ngram_size: int = NGRAM_SIZE):
+        self.ngram_size = ngram_size
+        self.addresses = np.asarray(list(addresses), dtype=object)
+        postings = {}
+        sizes = np.empty(len(self.addresses), dtype=np.int32)
+        for i, address in enumerate(self.addresses):
+            grams = _ngrams(address, ngram_size)
+            sizes[i] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self.sizes = sizes
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def suggest(self, address: str, limit: int = 5, min_score: float = SUGGESTION_MIN_SCORE) -> list:
+        """Повертає до limit пар (золота адреса, схожість), відсортованих за спаданням схожості."""
+        grams = _ngrams(address, self.ngram_size)
+        lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not lists:
+            return []
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.addresses))
+        scores = 2 * shared / (len(grams) + self.sizes)
+        candidates = np.flatnonzero(scores >= min_score)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(self.addresses[i], float(scores[i])) for i in candidates]
+
+    def suggest_frame(self, addresses: pd.Series, min_score: float = SUGGESTION_MIN_SCORE) -> pd.DataFrame:
+        """Найкращий варіант для кожної адреси: колонки suggestion та score (None, якщо нічого не знайдено)."""
+        codes, uniques = pd.factorize(addresses.astype(object), use_na_sentinel=False)
+        best = []
+        for address in uniques:
+            found = self.suggest(address, limit=1, min_score=min_score)
+            best.append(found[0] if found else (None, None))
+        return pd.DataFrame([best[code] for code in codes], columns=['suggestion', 'score'], index=addresses.index)
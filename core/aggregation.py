@@ -0,0 +1,222 @@
+"""
+Агрегати вкладки "Загальний огляд": KPI, зведення по продуктах і таблиця місто × продукт.
+
+Усі показники будуються з трьох агрегатів (OverviewAggregates), які може порахувати будь-який бекенд:
+    frame_aggregates   — pandas по вже завантажених рядках (запасний шлях) або по рядках
+                         зведення sales_rollup (core/rollups.py);
+    SqlAggregation     — SQL-запит до бази з таблицею sales_data (локальна SQLite-заміна для тестів
+                         і бенчмарків, create_sqlite_standin);
+    RpcAggregation     — функція Postgres з sql/sales_overview_aggregates.sql через Supabase RPC
+                         (усі три агрегати одним викликом).
+У базу передаються фільтри набору (регіон, територія, лінійка, місяці) і локальні фільтри
+(міста, вулиці); назад повертаються лише агрегати. Рядки огляду — остання декада кожного місяця.
+"""
+import sqlite3
+from dataclasses import dataclass
+
+import pandas as pd
+
+from core import sales_queries
+from core.sales_cache import ALL
+
+# Текстові колонки, які в компактній схемі очищено (strip, пропуск -> '') — SQL робить те саме
+_CLEANED = "TRIM(COALESCE({col}, ''))"
+
+
+@dataclass
+class OverviewAggregates:
+    product_month: pd.DataFrame  # product_name, month, quantity
+    city_product: pd.DataFrame   # city, product_name, quantity
+    unique_clients: int          # кількість пар (клієнт, адреса)
+
+
+def count_unique_clients(df: pd.DataFrame) -> int:
+    """Кількість пар (клієнт, адреса) у рядках огляду."""
+    return int(df.drop_duplicates(subset=['new_client', 'full_address']).shape[0]) if not df.empty else 0
+
+
+def frame_aggregates(df: pd.DataFrame, unique_clients: int = None) -> OverviewAggregates:
+    """
+    Агрегати з рядків огляду (остання декада кожного місяця з уже застосованими фільтрами).
+    unique_clients передається, якщо в рядках немає клієнтів і адрес (рядки зведення).
+    """
+    product_month = (df.groupby(['product_name', 'month'], observed=True)['quantity'].sum()
+                     .reset_index())
+    city_product = (df.groupby(['city', 'product_name'], observed=True)['quantity'].sum()
+                    .reset_index())
+    if unique_clients is None:
+        unique_clients = count_unique_clients(df)
+    return OverviewAggregates(_normalize(product_month), _normalize(city_product), unique_clients)
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    # Однакові типи для всіх бекендів: текст — str, month — int, quantity — int64
+    df = df.copy()
+    for col in df.columns:
+        if col == 'quantity':
+            df[col] = pd.to_numeric(df[col]).fillna(0).astype('int64')
+        elif col == 'month':
+            df[col] = pd.to_numeric(df[col]).astype('int64')
+        else:
+            df[col] = df[col].astype(str)
+    return df.reset_index(drop=True)
+
+
+def product_totals(aggregates: OverviewAggregates) -> pd.Series:
+    """Кількість по продуктах за спаданням (як groupby('product_name')['quantity'].sum() у calculate_main_kpis)."""
+    return (aggregates.product_month.groupby('product_name')['quantity'].sum()
+            .sort_values(ascending=False))
+
+
+def overview_kpis(aggregates: OverviewAggregates) -> dict:
+    """Ті самі KPI, що й data_processing.calculate_main_kpis, але з агрегатів."""
+    product_sales = product_totals(aggregates)
+    total_quantity = int(product_sales.sum())
+    unique_clients = aggregates.unique_clients
+    top5_total = product_sales.head(5).sum()
+    return {
+        "total_quantity": total_quantity,
+        "unique_products": int(len(product_sales)),
+        "unique_clients": unique_clients,
+        "avg_quantity_per_client": total_quantity / unique_clients if unique_clients else 0,
+        "top5_share": (top5_total / total_quantity * 100) if total_quantity else 0,
+        "top_products": product_sales.head(5),
+        "rev_top_products": product_sales.sort_values(ascending=True).head(5)
+    }
+
+
+def city_product_pivot(aggregates: OverviewAggregates) -> pd.DataFrame:
+    """Таблиця місто × продукт (як pivot_table(..., aggfunc='sum', fill_value=0)) з рядками за спаданням суми."""
+    # groupby + unstack дає ту саму таблицю, що й pivot_table, але в кілька разів швидше
+    pivot = (aggregates.city_product.groupby(['city', 'product_name'])['quantity'].sum()
+             .unstack(fill_value=0))
+    if pivot.empty:
+        return pivot
+    return pivot.loc[pivot.sum(axis=1).sort_values(ascending=False).index]
+
+
+def _overview_sql(territory: str, line: str, months, cities, streets, placeholder: str = "?",
+                  max_id: int = None) -> tuple:
+    """
+    SQL з CTE overview_rows (рядки останньої декади кожного місяця після всіх фільтрів) і параметри.
+    max_id — лише рядки з id <= max_id (знімок набору даних).
+    Логіка збігається з функціями в sql/sales_overview_aggregates.sql.
+    """
+    def in_list(values):
+        return ", ".join([placeholder] * len(values))
+
+    conditions, params = ["region = " + placeholder], []
+    if territory != ALL:
+        conditions.append("territory = " + placeholder)
+        params.append(territory)
+    if line != ALL:
+        conditions.append("product_line = " + placeholder)
+        params.append(line)
+    if months:
+        conditions.append(f"month IN ({in_list(months)})")
+        params.extend(months)
+    if max_id is not None:
+        conditions.append("id <= " + placeholder)
+        params.append(max_id)
+    local_conditions = []
+    if cities:
+        local_conditions.append(f"city IN ({in_list(cities)})")
+        params.extend(cities)
+    if streets:
+        local_conditions.append(f"street IN ({in_list(streets)})")
+        params.extend(streets)
+
+    sql = f"""
+        WITH filtered AS (
+            SELECT
+                {_CLEANED.format(col='product_name')} AS product_name,
+                {_CLEANED.format(col='city')} AS city,
+                {_CLEANED.format(col='street')} AS street,
+                {_CLEANED.format(col='new_client')} AS new_client,
+                TRIM({_CLEANED.format(col='city')} || ', ' || {_CLEANED.format(col='street')} || ', '
+                     || {_CLEANED.format(col='house_number')}, ' ,') AS full_address,
+                CAST(year AS INTEGER) AS year, CAST(month AS INTEGER) AS month,
+                CAST(decade AS INTEGER) AS decade, COALESCE(quantity, 0) AS quantity
+            FROM sales_data
+            WHERE {" AND ".join(conditions)}
+              AND year IS NOT NULL AND month IS NOT NULL AND decade IS NOT NULL
+        ),
+        latest AS (
+            SELECT year, month, MAX(decade) AS decade FROM filtered GROUP BY year, month
+        ),
+        overview_rows AS (
+            SELECT filtered.* FROM filtered
+            JOIN latest ON filtered.year = latest.year AND filtered.month = latest.month
+                       AND filtered.decade = latest.decade
+            {"WHERE " + " AND ".join(local_conditions) if local_conditions else ""}
+        )
+    """
+    return sql, params
+
+
+class SqlAggregation:
+    """Агрегати огляду SQL-запитами через DB-API з'єднання (SQLite-заміна бази)."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def _query(self, sql: str, params: list) -> pd.DataFrame:
+        return pd.read_sql_query(sql, self.connection, params=params)
+
+    def overview_aggregates(self, region_name: str, territory: str, line: str, months, cities=None,
+                            streets=None, max_id: int = None) -> OverviewAggregates:
+        base, params = _overview_sql(territory, line, months, cities, streets, max_id=max_id)
+        params = [region_name] + params
+        product_month = self._query(
+            base + "SELECT product_name, month, SUM(quantity) AS quantity FROM overview_rows "
+                   "GROUP BY product_name, month", params)
+        city_product = self._query(
+            base + "SELECT city, product_name, SUM(quantity) AS quantity FROM overview_rows "
+                   "GROUP BY city, product_name", params)
+        unique_clients = self._query(
+            base + "SELECT COUNT(*) AS n FROM (SELECT DISTINCT new_client, full_address FROM overview_rows) AS pairs",
+            params)
+        return OverviewAggregates(_normalize(product_month), _normalize(city_product),
+                                  int(unique_clients['n'].iloc[0]))
+
+
+class RpcAggregation:
+    """Агрегати огляду функцією Postgres sales_overview_aggregates (sql/sales_overview_aggregates.sql)."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def overview_aggregates(self, region_name: str, territory: str, line: str, months, cities=None,
+                            streets=None, max_id: int = None) -> OverviewAggregates:
+        params = {
+            "p_region": region_name, "p_territory": territory, "p_line": line,
+            "p_months": list(months or []), "p_cities": list(cities or []), "p_streets": list(streets or []),
+            "p_max_id": max_id
+        }
+        data = self.client.rpc("sales_overview_aggregates", params).execute().data or {}
+        product_month = pd.DataFrame(data.get("product_month") or [], columns=['product_name', 'month', 'quantity'])
+        city_product = pd.DataFrame(data.get("city_product") or [], columns=['city', 'product_name', 'quantity'])
+        return OverviewAggregates(_normalize(product_month), _normalize(city_product),
+                                  int(data.get("unique_clients") or 0))
+
+
+def create_sqlite_standin(df: pd.DataFrame, path: str = ":memory:") -> sqlite3.Connection:
+    """
+    Локальна заміна бази: таблиця sales_data з колонками SALES_SELECT_QUERY
+    (id, quantity, revision — цілі, решта — текст, як у таблиці Supabase і локальному Parquet-сховищі).
+    """
+    connection = sqlite3.connect(path, check_same_thread=False)
+    columns = sales_queries.SALES_COLUMNS
+    definitions = ", ".join(
+        f"{c} INTEGER PRIMARY KEY" if c == "id" else f"{c} INTEGER" if c in ("quantity", "revision") else f"{c} TEXT"
+        for c in columns
+    )
+    connection.execute(f"CREATE TABLE sales_data ({definitions})")
+    rows = df.reindex(columns=columns).astype(object).where(df.reindex(columns=columns).notna(), None)
+    connection.executemany(
+        f"INSERT INTO sales_data ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        rows.itertuples(index=False, name=None)
+    )
+    connection.execute("CREATE INDEX sales_data_region ON sales_data (region, month)")
+    connection.commit()
+    return connection
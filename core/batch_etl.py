@@ -0,0 +1,188 @@
+"""
+Пакетна обробка каталогу файлів дистриб'юторів без Streamlit.
+
+Кожен .xlsx/.xls файл проходить той самий конвеєр, що й сторінка завантаження
+(регіони, "золоті" адреси, довідник клієнтів, лінія продукту, період з назви файлу).
+Файли обробляються паралельно в пулі процесів. Для кожного файлу записуються:
+    <stem>.parquet                   — стандартизовані рядки у форматі sales_data (крім --no-parquet)
+    <stem>.unmatched_addresses.csv   — адреси, не знайдені в еталонному списку, з підказками
+    <stem>.unmatched_clients.csv     — клієнти, не знайдені в довіднику
+З --insert після запису всіх файлів перераховуються зведення sales_rollup (core/rollups.py)
+для зачеплених місяців.
+
+Командний рядок (з кореня репозиторію):
+    python -m core.batch_etl ФАЙЛИ/ --output out/ [--no-parquet] [--insert] [--workers 4]
+"""
+import argparse
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from core import bulk_writer, reference_data, rollups, upload_pipeline
+from core.address_matching import ADDRESS_COLUMN
+from core.products import PRODUCTS_DICT
+from core.supabase_client import create_client_from_config
+
+EXCEL_EXTENSIONS = (".xlsx", ".xls")
+
+# Клієнт Supabase окремого процесу пулу (створюється ініціалізатором)
+_client = None
+
+
+def _init_worker(reference_lock=None):
+    global _client
+    _client = create_client_from_config()
+    # "Золоті" адреси регіону будує один процес, решта читають його файл з дискового кешу
+    reference_data.use_process_lock(reference_lock)
+
+
+def list_input_files(input_dir: str) -> list:
+    return sorted(
+        os.path.join(input_dir, name) for name in os.listdir(input_dir)
+        if name.lower().endswith(EXCEL_EXTENSIONS) and not name.startswith("~$")
+    )
+
+
+def load_regions(client) -> dict:
+    """Довідник регіонів {назва: id}."""
+    return {row["name"]: row["id"] for row in client.table("region").select("id,name").execute().data}
+
+
+def standardize_file(client, path: str, region_ids: dict, client_map: dict,
+                     products_dict: dict = PRODUCTS_DICT) -> tuple:
+    """
+    Стандартизує один файл за всіма відомими регіонами.
+    Повертає (result_df, suggestions, невідомі регіони).
+    """
+    with open(path, "rb") as f:
+        df = upload_pipeline.read_workbook(f.read())
+    missing = upload_pipeline.missing_columns(df)
+    if missing:
+        raise ValueError(f"У файлі відсутні колонки: {', '.join(missing)}")
+
+    parts = upload_pipeline.split_by_region(df)
+    unknown_regions = [region for region in parts if region not in region_ids]
+    parts = {region: part for region, part in parts.items() if region in region_ids}
+    results = upload_pipeline.standardize_regions(
+        parts, lambda region: reference_data.get_golden_reference(client, region_ids[region]),
+        client_map, os.path.basename(path), products_dict
+    )
+    result_df, suggestions = upload_pipeline.combine_results(results)
+    return result_df, suggestions, unknown_regions
+
+
+def unmatched_reports(result_df: pd.DataFrame, suggestions: pd.DataFrame) -> tuple:
+    """Звіти про незнайдені адреси (з кількістю рядків і підказкою) та незнайдених клієнтів."""
+    if result_df.empty:
+        return pd.DataFrame(), pd.DataFrame()
+    addresses = result_df.loc[result_df['City'].isna(), ['Регіон', ADDRESS_COLUMN]].join(suggestions)
+    addresses = (addresses.groupby(['Регіон', ADDRESS_COLUMN], dropna=False)
+                 .agg(rows=(ADDRESS_COLUMN, 'size'), suggestion=('suggestion', 'first'), score=('score', 'first'))
+                 .reset_index())
+    clients = result_df.loc[result_df['new_client'].isna() & result_df['Клієнт'].notna(), ['Регіон', 'Клієнт']]
+    clients = clients.groupby(['Регіон', 'Клієнт']).size().rename('rows').reset_index()
+    return addresses, clients
+
+
+def _write_parquet(sales_rows: pd.DataFrame, path: str):
+    # Колонки Excel бувають змішаного типу — у Parquet зберігаємо їх як текст
+    sales_rows = sales_rows.copy()
+    for col in sales_rows.columns:
+        if col == "quantity":
+            sales_rows[col] = pd.to_numeric(sales_rows[col], errors='coerce')
+        else:
+            sales_rows[col] = sales_rows[col].astype("string")
+    sales_rows.to_parquet(path, index=False)
+
+
+def process_file(path: str, output_dir: str, region_ids: dict, client_map: dict, write_parquet: bool = True,
+                 insert: bool = False, client=None) -> dict:
+    """Обробляє один файл і записує результати. Повертає підсумок для звіту."""
+    client = client if client is not None else _client
+    stem = os.path.splitext(os.path.basename(path))[0]
+    summary = {"file": os.path.basename(path), "rows": 0, "unmatched_addresses": 0, "unmatched_clients": 0,
+               "rows_written": 0, "unknown_regions": [], "partitions": [], "error": None}
+    try:
+        result_df, suggestions, summary["unknown_regions"] = standardize_file(client, path, region_ids, client_map)
+        summary["rows"] = len(result_df)
+
+        addresses, clients = unmatched_reports(result_df, suggestions)
+        addresses.to_csv(os.path.join(output_dir, f"{stem}.unmatched_addresses.csv"), index=False, encoding="utf-8-sig")
+        clients.to_csv(os.path.join(output_dir, f"{stem}.unmatched_clients.csv"), index=False, encoding="utf-8-sig")
+        summary["unmatched_addresses"] = int(addresses["rows"].sum()) if not addresses.empty else 0
+        summary["unmatched_clients"] = int(clients["rows"].sum()) if not clients.empty else 0
+
+        if result_df.empty:
+            return summary
+        sales_rows = upload_pipeline.to_sales_rows(result_df)
+        if write_parquet:
+            _write_parquet(sales_rows, os.path.join(output_dir, f"{stem}.parquet"))
+        if insert:
+            written = bulk_writer.write_rows(client, sales_rows)
+            summary["rows_written"] = written["rows_written"]
+            summary["partitions"] = rollups.upload_partitions(sales_rows)
+            if written["failed_batches"]:
+                summary["error"] = f"не записано {written['rows_failed']} рядків"
+    except Exception as e:
+        summary["error"] = str(e)
+    return summary
+
+
+def run_directory(input_dir: str, output_dir: str, write_parquet: bool = True, insert: bool = False,
+                  max_workers: int = None) -> list:
+    """Обробляє всі файли каталогу в пулі процесів. Повертає список підсумків по файлах."""
+    os.makedirs(output_dir, exist_ok=True)
+    files = list_input_files(input_dir)
+    if not files:
+        return []
+
+    # Довідники регіонів і клієнтів читаються один раз; "золоті" адреси процеси беруть з дискового кешу
+    client = create_client_from_config()
+    region_ids = load_regions(client)
+    client_map = reference_data.get_client_map(client)
+
+    summaries = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(multiprocessing.Lock(),)) as executor:
+        futures = [
+            executor.submit(process_file, path, output_dir, region_ids, client_map, write_parquet, insert)
+            for path in files
+        ]
+        for future in as_completed(futures):
+            summary = future.result()
+            summaries.append(summary)
+            status = f"помилка: {summary['error']}" if summary["error"] else "OK"
+            print(f"{summary['file']}: {summary['rows']} рядків, незнайдених адрес {summary['unmatched_addresses']}, "
+                  f"клієнтів {summary['unmatched_clients']}, записано {summary['rows_written']} — {status}")
+
+    # Зведення оновлюються один раз після всіх файлів: декади одного місяця з різних процесів
+    # не перераховують той самий розділ одночасно
+    partitions = sorted({p for summary in summaries for p in summary.pop("partitions")})
+    if partitions:
+        refreshed = rollups.refresh_partitions(client, partitions)
+        print(f"Зведення: оновлено розділів {refreshed['partitions']}, рядків {refreshed['rows_written']}"
+              + (f", не записано {refreshed['rows_failed']}" if refreshed["rows_failed"] else ""))
+    return sorted(summaries, key=lambda s: s["file"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетна стандартизація файлів дистриб'юторів")
+    parser.add_argument("input_dir", help="каталог з .xlsx/.xls файлами")
+    parser.add_argument("--output", default="etl_output", help="каталог для Parquet і звітів")
+    parser.add_argument("--no-parquet", action="store_true", help="не записувати стандартизовані рядки у Parquet")
+    parser.add_argument("--insert", action="store_true", help="записати рядки в sales_data (upsert)")
+    parser.add_argument("--workers", type=int, default=None, help="кількість процесів")
+    args = parser.parse_args()
+
+    summaries = run_directory(args.input_dir, args.output, write_parquet=not args.no_parquet, insert=args.insert,
+                              max_workers=args.workers)
+    pd.DataFrame(summaries).to_csv(os.path.join(args.output, "summary.csv"), index=False, encoding="utf-8-sig")
+    failed = [s for s in summaries if s["error"]]
+    print(f"Файлів: {len(summaries)}, з помилками: {len(failed)}")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
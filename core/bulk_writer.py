@@ -0,0 +1,110 @@
+"""
+Пакетний запис оброблених рядків у sales_data.
+
+Рядки надсилаються порціями (batch_size) у кілька потоків (max_workers); невдала порція
+повторюється з експоненційною затримкою. Кожен рядок має детермінований відбиток
+row_fingerprint (файл adding + ідентичність рядка в джерелі), а запис виконується як upsert
+за цим відбитком, тому повторне завантаження того самого файлу не подвоює кількості.
+Виправлений повторним файлом рядок зберігає свій id, але отримує нову ревізію (тригер
+з sql/sales_data_revision.sql) — за нею зміну дочитують локальне сховище і фактичні продажі.
+Потрібна унікальна колонка row_fingerprint у таблиці (див. sql/sales_data_row_fingerprint.sql).
+"""
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+SALES_TABLE = "sales_data"
+FINGERPRINT_COLUMN = "row_fingerprint"
+
+# Поля, що визначають рядок у файлі дистриб'ютора (кількість навмисно не входить:
+# виправлена кількість у повторному файлі оновлює рядок, а не додає новий)
+FINGERPRINT_KEY_COLUMNS = ["adding", "region", "distributor", "edrpou", "client", "delivery_address", "product_name"]
+
+BATCH_SIZE = 500
+WRITE_MAX_WORKERS = 4
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 0.5
+
+
+def add_row_fingerprints(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Додає колонку row_fingerprint: SHA-1 від полів FINGERPRINT_KEY_COLUMNS
+    та порядкового номера серед однакових за цими полями рядків файлу.
+    """
+    df = df.copy()
+    key_columns = [col for col in FINGERPRINT_KEY_COLUMNS if col in df.columns]
+    keys = df[key_columns].astype(object).where(df[key_columns].notna(), '').astype(str)
+    identity = keys.agg('\x1f'.join, axis=1) if key_columns else pd.Series('', index=df.index)
+    occurrence = identity.groupby(identity, sort=False).cumcount().astype(str)
+    df[FINGERPRINT_COLUMN] = [
+        hashlib.sha1(f"{key}\x1e{n}".encode("utf-8")).hexdigest() for key, n in zip(identity, occurrence)
+    ]
+    return df
+
+
+def _batch_records(df: pd.DataFrame, start: int, stop: int) -> list:
+    batch = df.iloc[start:stop]
+    # Замінюємо NaN на None, що є еквівалентом NULL в базі даних
+    return batch.astype(object).where(pd.notna(batch), None).to_dict(orient='records')
+
+
+def _write_batch(client, table_name: str, df: pd.DataFrame, start: int, stop: int,
+                 max_retries: int, backoff: float, on_conflict: str) -> tuple:
+    """Записує одну порцію з повторами. Повертає (кількість рядків, спроб, помилка або None)."""
+    records = _batch_records(df, start, stop)
+    for attempt in range(max_retries + 1):
+        try:
+            client.table(table_name).upsert(records, on_conflict=on_conflict).execute()
+            return len(records), attempt + 1, None
+        except Exception as e:
+            if attempt == max_retries:
+                return 0, attempt + 1, e
+            time.sleep(backoff * 2 ** attempt)
+
+
+def write_rows(client, df: pd.DataFrame, table_name: str = SALES_TABLE, batch_size: int = BATCH_SIZE,
+               max_workers: int = WRITE_MAX_WORKERS, max_retries: int = MAX_RETRIES,
+               backoff: float = BACKOFF_SECONDS, progress=None, on_conflict: str = FINGERPRINT_COLUMN) -> dict:
+    """
+    Записує df у таблицю порціями з обмеженим паралелізмом і повторами.
+    Upsert виконується за on_conflict (колонки через кому); для row_fingerprint
+    колонка додається, якщо її ще немає.
+    progress(записано_рядків, всього_рядків) викликається після кожної порції.
+    Повертає словник зі статистикою: rows_written, rows_failed, batches, retries,
+    failed_batches (список (перший рядок, останній рядок + 1, помилка)), seconds, rows_per_second.
+    """
+    if on_conflict == FINGERPRINT_COLUMN and FINGERPRINT_COLUMN not in df.columns:
+        df = add_row_fingerprints(df)
+
+    started = time.perf_counter()
+    bounds = [(start, min(start + batch_size, len(df))) for start in range(0, len(df), batch_size)]
+    rows_written, retries, failed_batches = 0, 0, []
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(_write_batch, client, table_name, df, start, stop, max_retries, backoff,
+                            on_conflict): (start, stop)
+            for start, stop in bounds
+        }
+        for future in futures:
+            written, attempts, error = future.result()
+            rows_written += written
+            retries += attempts - 1
+            if error is not None:
+                start, stop = futures[future]
+                failed_batches.append((start, stop, error))
+            if progress is not None:
+                progress(rows_written, len(df))
+
+    seconds = time.perf_counter() - started
+    return {
+        "rows_written": rows_written,
+        "rows_failed": sum(stop - start for start, stop, _ in failed_batches),
+        "batches": len(bounds),
+        "retries": retries,
+        "failed_batches": failed_batches,
+        "seconds": seconds,
+        "rows_per_second": rows_written / seconds if seconds else 0.0,
+    }
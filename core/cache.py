@@ -0,0 +1,124 @@
+"""
+Кеш для шару доступу до даних без прив'язки до Streamlit.
+
+Будь-який бекенд реалізує get/set/clear; get повертає MISSING, якщо значення немає.
+    MemoryCache — LRU у пам'яті процесу (обмеження за кількістю записів і часом життя);
+    DiskCache   — pickle-файли в каталозі (переживає перезапуск і спільний для процесів);
+    NoCache     — нічого не зберігає (для разових скриптів і бенчмарків).
+"""
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+def make_key(*parts) -> str:
+    """Стабільний ключ кешу з довільних значень (списки й кортежі однакового вмісту дають той самий ключ)."""
+    def normalize(value):
+        if isinstance(value, (list, tuple)):
+            return tuple(normalize(v) for v in value)
+        return value
+    return hashlib.sha1(repr(normalize(parts)).encode("utf-8")).hexdigest()
+
+
+class Cache:
+    """Інтерфейс кешу."""
+
+    def get(self, key: str):
+        raise NotImplementedError
+
+    def set(self, key: str, value):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def get_or_compute(self, key: str, compute):
+        """Повертає значення з кешу або обчислює compute() і зберігає результат."""
+        value = self.get(key)
+        if value is MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+
+class NoCache(Cache):
+    def get(self, key: str):
+        return MISSING
+
+    def set(self, key: str, value):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryCache(Cache):
+    """LRU-кеш у пам'яті: не більше max_entries записів, кожен живе не довше ttl секунд (None — без обмеження)."""
+
+    def __init__(self, max_entries: int = 32, ttl: float = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskCache(Cache):
+    """Кеш у каталозі directory: один pickle-файл на ключ; ttl рахується від часу запису файлу."""
+
+    def __init__(self, directory: str, ttl: float = None):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            if self.ttl is not None and time.time() - os.path.getmtime(path) > self.ttl:
+                return MISSING
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return MISSING
+
+    def set(self, key: str, value):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f)
+        os.replace(tmp_path, self._path(key))
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(".pkl"):
+                    os.remove(os.path.join(self.directory, name))
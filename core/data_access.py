@@ -0,0 +1,166 @@
+"""
+Шар доступу до даних без Streamlit: продажі та ціни з Supabase.
+
+Клієнт і кеш передаються явно (client=None — спільний клієнт з core.supabase_client,
+cache=None — без кешу). Помилки не показуються в інтерфейсі, а передаються викликачу;
+Streamlit-обгортки з показом помилок і st.cache_data — у core/data_loader.py.
+"""
+import logging
+
+import pandas as pd
+
+from core import local_store, rollups, sales_queries, schema
+from core.cache import NoCache, make_key
+from core.dataset_store import DatasetHandle, DatasetStore
+from core.price_index import MONTHS, PriceIndex
+from core.sales_cache import SalesQueryCache
+from core.supabase_client import get_client
+
+# Якщо True, дані регіону читаються з локального Parquet-сховища,
+# а з Supabase дочитуються лише нові рядки (див. core/local_store.py)
+USE_LOCAL_STORE = True
+
+ALL_REGIONS = "Оберіть регіон..."
+
+logger = logging.getLogger(__name__)
+
+
+def load_sales_data(region_name: str, territory: str, line: str, months: list, client=None, cache=None,
+                    max_workers: int = sales_queries.FETCH_MAX_WORKERS,
+                    use_local_store: bool = USE_LOCAL_STORE, columns=None, up_to_id=None) -> pd.DataFrame:
+    """
+    Завантажує дані з таблиці sales_data (паралельна пагінація, фільтри) у компактній схемі.
+    Для обраного регіону спершу синхронізує локальне сховище і читає дані з нього.
+    columns — лише ці колонки (id додається завжди; None — усі), up_to_id — лише рядки з id <= up_to_id.
+    """
+    cache = cache if cache is not None else NoCache()
+    key = make_key("sales", region_name, territory, line, sorted(months or []),
+                   sales_queries.select_columns(columns), up_to_id)
+
+    def compute():
+        sales_client = client if client is not None else get_client()
+        if use_local_store and region_name and region_name != ALL_REGIONS:
+            local_store.sync_region(sales_client, region_name, max_workers=max_workers)
+            df = local_store.read_sales(region_name, territory, line, months, columns=columns, up_to_id=up_to_id)
+        else:
+            df = sales_queries.fetch_sales_frame(
+                sales_client, region_name, territory, line, months, max_workers=max_workers,
+                up_to_id=up_to_id, columns=columns
+            )
+
+        # Компактна схема (category + малі цілі типи) суттєво зменшує пам'ять на сесію
+        compact_df = schema.compact_sales_frame(df)
+        # Звіт рахує глибокий обсяг обох кадрів, тож будується лише з увімкненим DEBUG
+        if not df.empty and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(schema.memory_report(df, compact_df))
+        return compact_df
+
+    return cache.get_or_compute(key, compute)
+
+
+def load_sales_dataset(store: DatasetStore, sales_cache: SalesQueryCache, region_name: str, territory: str,
+                       line: str, months: list, columns=None, client=None,
+                       max_workers: int = sales_queries.FETCH_MAX_WORKERS) -> DatasetHandle | None:
+    """
+    Дескриптор спільного набору продажів у store (ключ — SalesQueryCache.make_key).
+    Наявний набір використовується, доки не минув ttl сховища і не змінилась версія даних регіону
+    (sales_queries.sales_data_version — легкі запити замість повного читання). Інакше кадр береться
+    з кешу запитів sales_cache (зокрема фільтрацією ширшого кадру) або з бази і замінює набір для всіх сесій.
+    columns — колонки, потрібні викликачу (None — усі). None, якщо даних немає.
+    """
+    sales_client = client if client is not None else get_client()
+    data_version = sales_queries.sales_data_version(sales_client, region_name)
+    key = SalesQueryCache.make_key(region_name, territory, line, months)
+    handle = store.get(key, data_version)
+    if handle is not None:
+        return handle
+    # Кадри регіону в кеші запитів скидаються лише тоді, коли змінилась версія даних
+    sales_cache.sync_version(region_name, data_version)
+    df = sales_cache.get_or_load(
+        region_name, territory, line, months,
+        lambda: load_sales_data(region_name, territory, line, months, client=sales_client,
+                                max_workers=max_workers, columns=columns),
+        columns=columns
+    )
+    if df.empty:
+        return None
+    return store.put(key, df, data_version=data_version)
+
+
+def backfill_sales_columns(df: pd.DataFrame, region_name: str, territory: str, line: str, months: list,
+                           columns, client=None, max_workers: int = sales_queries.FETCH_MAX_WORKERS,
+                           use_local_store: bool = USE_LOCAL_STORE) -> pd.DataFrame:
+    """
+    Дочитує до вже завантаженого кадру колонки columns, яких у ньому немає.
+    Читаються лише id і відсутні колонки рядків з id <= max(df.id); значення приєднуються за id.
+    Повертає новий кадр (вхідний не змінюється) або df, якщо всі колонки вже є.
+    """
+    missing = [c for c in sales_queries.select_columns(columns) if c not in df.columns]
+    if not missing or df.empty:
+        return df
+    extra = load_sales_data(region_name, territory, line, months, client=client, max_workers=max_workers,
+                            use_local_store=use_local_store, columns=missing, up_to_id=int(df['id'].max()))
+    if extra.empty:
+        extra = pd.DataFrame(columns=['id'] + missing)
+    # Рядки, яких уже немає в базі, отримують пропуск
+    values = extra.set_index('id')[missing].reindex(df['id'])
+    df = df.copy(deep=False)
+    for col in missing:
+        df[col] = values[col].array
+    return df
+
+
+def load_sales_rollup(region_name: str, territory: str, line: str, months: list, client=None,
+                      cache=None) -> pd.DataFrame | None:
+    """
+    Зведення продажів (sales_rollup, див. core/rollups.py) з тими ж фільтрами, що й load_sales_data.
+    None — зведення покривають не всі розділи запитаного діапазону.
+    """
+    cache = cache if cache is not None else NoCache()
+    key = make_key("rollup", region_name, territory, line, sorted(months or []))
+    return cache.get_or_compute(key, lambda: rollups.load_rollup(
+        client if client is not None else get_client(), region_name, territory, line, list(months or [])))
+
+
+def load_price_data(region_id: int, months: list, client=None, cache=None) -> pd.DataFrame:
+    """Завантажує дані про ціни з таблиці 'price' для вказаного регіону та місяців."""
+    if not months or not region_id:
+        return pd.DataFrame()
+    cache = cache if cache is not None else NoCache()
+
+    def compute():
+        numeric_months = [int(m) for m in months]
+        price_client = client if client is not None else get_client()
+        # Keyset-пагінація: один запит без неї обрізався б лімітом рядків PostgREST (max-rows)
+        rows = sales_queries.fetch_rows_keyset(
+            lambda: price_client.table("price").select("id, product_name, price, month")
+            .eq("region_id", region_id).in_("month", numeric_months))
+
+        if not rows:
+            return pd.DataFrame()
+
+        # Для повторів продукту в місяці діє ціна з найбільшим id
+        price_df = pd.DataFrame(rows).drop(columns=['id'])
+        price_df = price_df.drop_duplicates(subset=['product_name', 'month'], keep='last')
+        price_df['price'] = pd.to_numeric(price_df['price'], errors='coerce')
+        price_df['month'] = pd.to_numeric(price_df['month'], errors='coerce').astype('Int64')
+        return price_df
+
+    return cache.get_or_compute(make_key("price", region_id, sorted(months)), compute)
+
+
+def load_price_index(region_id: int, client=None, cache=None) -> PriceIndex:
+    """Індекс цін регіону за всі місяці (один запит на регіон; див. core/price_index.py)."""
+    cache = cache if cache is not None else NoCache()
+    return cache.get_or_compute(
+        make_key("price_index", region_id),
+        lambda: PriceIndex.from_frame(load_price_data(region_id, list(MONTHS), client=client))
+    )
+
+
+def load_territories(region_id, client=None) -> list:
+    """Території регіону: список словників з name та technical_name."""
+    if not region_id:
+        return []
+    territory_client = client if client is not None else get_client()
+    return territory_client.table("territory").select("name, technical_name").eq("region_id", region_id).execute().data
@@ -1,85 +1,152 @@
+"""
+Streamlit-обгортки над core.data_access: кешування (st.cache_data, спільний кеш продажів,
+спільне сховище наборів даних) і показ помилок в інтерфейсі.
+Логіка завантаження живе в core.data_access і не залежить від Streamlit.
+"""
+import logging
+import os
+
 import streamlit as st
 import pandas as pd
 from utils import supabase
+from core import aggregation, data_access, dataset_store, sales_cache, sales_queries
+from core.dataset_store import DatasetHandle, DatasetStore
+from core.price_index import PriceIndex
+from core.sales_cache import SalesQueryCache
 
+logger = logging.getLogger(__name__)
 
-@st.cache_data(ttl=3600)
-def fetch_all_sales_data(region_name: str, territory: str, line: str, months: list) -> pd.DataFrame:
+# Де рахувати агрегати вкладки "Загальний огляд": "pandas" — по завантажених рядках,
+# "rpc" — функціями бази з sql/sales_overview_aggregates.sql (при помилці — запасний шлях pandas)
+AGGREGATION_BACKEND = os.environ.get("SALES_AGGREGATION_BACKEND", "pandas")
+
+
+@st.cache_resource
+def get_sales_cache() -> SalesQueryCache:
+    """Спільний для всіх сесій кеш продажів з обмеженням пам'яті (SALES_CACHE_MAX_MB)."""
+    return SalesQueryCache(max_mb=float(os.environ.get("SALES_CACHE_MAX_MB", sales_cache.SALES_CACHE_MAX_MB)))
+
+
+@st.cache_resource
+def get_dataset_store() -> DatasetStore:
+    """Спільне для всіх сесій сховище наборів даних з обмеженням пам'яті (DATASET_STORE_MAX_MB)."""
+    return DatasetStore(max_mb=float(os.environ.get("DATASET_STORE_MAX_MB", dataset_store.DATASET_STORE_MAX_MB)))
+
+
+def _projection(columns):
+    # Колонки фільтрів потрібні спільному кешу, щоб відповідати на вужчі запити з ширшого кадру
+    return None if columns is None else list(dict.fromkeys(list(columns) + sales_cache.FILTER_COLUMNS))
+
+
+def fetch_all_sales_data(region_name: str, territory: str, line: str, months: list,
+                         max_workers: int = sales_queries.FETCH_MAX_WORKERS, columns=None) -> pd.DataFrame:
     """
-    Завантажує дані з таблиці sales_data, використовуючи пагінацію та фільтри.
+    Завантажує дані з таблиці sales_data, використовуючи паралельну пагінацію та фільтри.
+    max_workers обмежує кількість одночасних запитів до Supabase.
+    columns — колонки, потрібні викликачу (None — усі); завантажується лише їх об'єднання з колонками фільтрів.
+    Запит, що є підмножиною вже завантаженого (та сама область, вужчі територія/лінійка/місяці),
+    обслуговується з кешу фільтрацією в пам'яті. Результат спільний для сесій — не змінювати на місці.
     """
-    all_data = []
-    offset = 0
-    page_size = 1000
-
-    select_query = "distributor,client,new_client, product_name, quantity, city, street, house_number, territory, adding, product_line, delivery_address, year, month, decade, region"
-
-    while True:
-        try:
-            query = supabase.table("sales_data").select(select_query).range(offset, offset + page_size - 1)
-
-            # Фільтруємо за назвою регіону, якщо вона обрана
-            if region_name and region_name != "Оберіть регіон...":
-                query = query.eq('region', region_name)
-
-            # Існуючі фільтри
-            if territory != "Всі":
-                query = query.eq("territory", territory)
-            if line != "Всі":
-                query = query.eq("product_line", line)
-            if months:
-                query = query.in_("month", months)
-
-            response = query.execute()
-
-            if response.data:
-                all_data.extend(response.data)
-                if len(response.data) < page_size:
-                    break
-                offset += page_size
-            else:
-                break
-        except Exception as e:
-            st.error(f"Помилка при завантаженні даних про продажі з Supabase: {e}")
-            return pd.DataFrame()
-
-    if not all_data:
+    columns = _projection(columns)
+    try:
+        return get_sales_cache().get_or_load(
+            region_name, territory, line, months,
+            lambda: data_access.load_sales_data(region_name, territory, line, months, client=supabase,
+                                                max_workers=max_workers, columns=columns),
+            columns=columns
+        )
+    except Exception as e:
+        st.error(f"Помилка при завантаженні даних про продажі з Supabase: {e}")
         return pd.DataFrame()
 
-    df = pd.DataFrame(all_data)
-    df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce').fillna(0).astype(int)
-    return df
-
 
-@st.cache_data(ttl=3600)
-def fetch_price_data(region_id: int, months: list[str]) -> pd.DataFrame:
+def load_sales_dataset(region_name: str, territory: str, line: str, months: list,
+                       columns=None) -> DatasetHandle | None:
     """
-    Завантажує дані про ціни з таблиці 'price' для вказаного регіону та місяців.
+    Дескриптор спільного набору продажів для сесії: однакові запити різних сесій
+    посилаються на один кадр у пам'яті. None, якщо даних немає або сталася помилка.
+    columns — колонки, потрібні першому поданню; решта дочитується через ensure_sales_columns.
+    Набір перезавантажується, лише коли минув ttl сховища або змінилась версія даних регіону
+    (див. data_access.load_sales_dataset).
     """
-    if not months or not region_id:
-        return pd.DataFrame()
+    try:
+        handle = data_access.load_sales_dataset(
+            get_dataset_store(), get_sales_cache(), region_name, territory, line, months,
+            columns=_projection(columns), client=supabase)
+    except Exception as e:
+        st.error(f"Помилка при завантаженні даних про продажі з Supabase: {e}")
+        return None
+    if handle is not None and columns is not None:
+        ensure_sales_columns(handle, columns)
+    return handle
 
+
+def ensure_sales_columns(handle: DatasetHandle, columns) -> bool:
+    """
+    Дочитує до спільного набору колонки, яких у ньому ще немає (лише id і ці колонки, за id).
+    Повертає False, якщо дочитати не вдалося.
+    """
+    region_name, territory, line, months = handle.key
     try:
-        numeric_months = [int(m) for m in months]
+        handle.update(lambda df: data_access.backfill_sales_columns(
+            df, region_name, territory, line, list(months), _projection(columns), client=supabase))
+        return True
+    except Exception as e:
+        st.error(f"Помилка при дочитуванні колонок продажів з Supabase: {e}")
+        return False
 
-        query = supabase.table("price").select("product_name, price, month")
 
-        # Додано фільтр за регіоном
-        query = query.eq("region_id", region_id)
-        query = query.in_("month", numeric_months)
+@st.cache_data(ttl=3600)
+def fetch_price_index(region_id: int) -> PriceIndex:
+    """
+    Індекс цін регіону (продукт × місяць з as-of заповненням) — один запит до 'price' на регіон,
+    спільний для всіх вкладок сторінки.
+    """
+    try:
+        return data_access.load_price_index(region_id, client=supabase)
+    except Exception as e:
+        st.error(f"Помилка при завантаженні цін з Supabase: {e}")
+        return PriceIndex.from_frame(pd.DataFrame())
 
-        response = query.execute()
 
-        if not response.data:
-            return pd.DataFrame()
+@st.cache_data(ttl=600)
+def fetch_overview_aggregates(region_name: str, territory: str, line: str, months: tuple, cities: tuple,
+                              streets: tuple, max_id: int) -> aggregation.OverviewAggregates | None:
+    """
+    Агрегати огляду, пораховані в базі (лише коли AGGREGATION_BACKEND == "rpc"), за рядками
+    з id <= max_id — тим самим знімком, що й завантажений набір даних (max_id входить у ключ кешу).
+    None — бекенд вимкнено або виклик не вдався; тоді сторінка рахує агрегати в pandas.
+    """
+    if AGGREGATION_BACKEND != "rpc":
+        return None
+    try:
+        return aggregation.RpcAggregation(supabase).overview_aggregates(
+            region_name, territory, line, list(months), list(cities), list(streets), max_id=max_id)
+    except Exception:
+        logger.warning("Агрегати огляду з бази недоступні, рахуємо локально", exc_info=True)
+        return None
+
 
-        price_df = pd.DataFrame(response.data)
-        price_df = price_df.drop_duplicates(subset=['product_name', 'month'], keep='last')
-        price_df['price'] = pd.to_numeric(price_df['price'], errors='coerce')
-        price_df['month'] = pd.to_numeric(price_df['month'], errors='coerce').astype('Int64')
+@st.cache_data(ttl=600)
+def fetch_sales_rollup(region_name: str, territory: str, line: str, months: tuple,
+                       data_version) -> pd.DataFrame | None:
+    """
+    Зведення продажів для набору даних (core/rollups.py); data_version — версія даних набору
+    (DatasetStore.data_version), входить у ключ кешу, щоб після зміни даних зведення читалися заново.
+    None — зведення неповні або недоступні; тоді сторінка рахує показники із сирих рядків.
+    """
+    try:
+        return data_access.load_sales_rollup(region_name, territory, line, list(months), client=supabase)
+    except Exception:
+        logger.warning("Зведення продажів недоступні, рахуємо із сирих рядків", exc_info=True)
+        return None
 
-        return price_df
 
+@st.cache_data(ttl=3600)
+def load_territories_for_region(region_id):
+    """Завантажує території для конкретного регіону."""
+    try:
+        return data_access.load_territories(region_id, client=supabase)
     except Exception as e:
-        st.error(f"Помилка при завантаженні цін з Supabase: {e}")
-        return pd.DataFrame()
+        st.error(f"Помилка завантаження територій: {e}")
+        return []
@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
-from datetime import date, timedelta
-from workalendar.europe import Ukraine  # Бібліотека для розрахунку робочих днів в Україні
+
+from core import work_calendar
 
 
 # --- Існуючі функції без змін ---
@@ -17,65 +17,91 @@ def create_full_address(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def prepare_sales_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Кадр для сторінки аналізу: колонка 'full_address' і числові year/month/decade.
+    Вхідний кадр не змінюється — колонки додаються до поверхневої копії (copy-on-write).
+    """
+    df = create_full_address(df.copy(deep=False))
+    for col in ('year', 'month', 'decade'):
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
 # --- ОНОВЛЕНА ФУНКЦІЯ compute_actual_sales ---
 
-def compute_actual_sales(df: pd.DataFrame) -> pd.DataFrame:
+ACTUAL_SALES_COLUMNS = ['distributor', 'product_name', 'full_address', 'year', 'month', 'decade', 'actual_quantity', 'new_client']
+# Ключі агрегації в межах декади (порядок як у groupby)
+ACTUAL_SALES_GROUP_KEYS = ['distributor', 'product_name', 'full_address', 'year', 'month', 'decade', 'new_client']
+# Порядок сортування для обчислення різниці між декадами (декада — останній ключ)
+ACTUAL_SALES_SORT_KEYS = ['distributor', 'product_name', 'full_address', 'year', 'month', 'new_client', 'decade']
+
+
+def prepare_actual_sales_input(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Очищує текстові поля, будує 'full_address', відкидає рядки без адреси
+    та перетворює 'decade' на число. Змінює переданий DataFrame.
+    """
+    # --- КРОК ОЧИЩЕННЯ ДАНИХ ---
+    # Примусово видаляємо зайві пробіли з ключових текстових полів.
+    text_cols_to_clean = ['distributor', 'product_name', 'city', 'street', 'house_number', 'new_client']
+    for col in text_cols_to_clean:
+        if col in df.columns:
+            df[col] = df[col].fillna('').astype(str).str.strip()
+
+    # Створення повної адреси відбувається ПІСЛЯ очищення її компонентів
+    df = create_full_address(df)
+    df = df[df['full_address'] != '']
+    # Перетворюємо 'decade' на числовий тип для коректного сортування
+    df['decade'] = pd.to_numeric(df['decade'], errors='coerce').fillna(0).astype(int)
+    return df
+
+
+def compute_actual_sales(df: pd.DataFrame, engine: str = "factorized") -> pd.DataFrame:
     """
     Розраховує "чисті" продажі між декадами з виправленою логікою.
     Ця версія враховує дистриб'ютора та клієнта, щоб розрахунки велися окремо для кожного,
     і включає ретельну очистку текстових полів.
     Припускається, що 'quantity' у вхідному DataFrame є КУМУЛЯТИВНОЮ сумою продажів
     до кінця відповідної декади.
+    engine="factorized" рахує на цілочисельних кодах ключів у NumPy,
+    engine="pandas" — початкова реалізація через groupby/sort_values (результат ідентичний).
     """
     # Початкова перевірка на наявність критично важливих колонок
     required_cols = ['decade', 'distributor', 'product_name', 'quantity', 'year', 'month', 'city', 'street', 'house_number', 'new_client']
     for col in required_cols:
         if col not in df.columns:
             print(f"Попередження: Відсутня необхідна колонка '{col}'. Повертаю порожній DataFrame.")
-            return pd.DataFrame(
-                columns=['distributor', 'product_name', 'full_address', 'year', 'month', 'decade', 'actual_quantity', 'new_client'])
+            return pd.DataFrame(columns=ACTUAL_SALES_COLUMNS)
 
     if df.empty:
         print("Попередження: Вхідний DataFrame порожній. Повертаю порожній DataFrame.")
-        return pd.DataFrame(
-            columns=['distributor', 'product_name', 'full_address', 'year', 'month', 'decade', 'actual_quantity', 'new_client'])
+        return pd.DataFrame(columns=ACTUAL_SALES_COLUMNS)
 
-    # --- КРОК ОЧИЩЕННЯ ДАНИХ ---
-    # Примусово видаляємо зайві пробіли з ключових текстових полів.
-    text_cols_to_clean = ['distributor', 'product_name', 'city', 'street', 'house_number', 'new_client']
-    for col in text_cols_to_clean:
-        if col in df.columns:
-            df[col] = df[col].fillna('').astype(str).str.strip()
+    if engine == "factorized":
+        result = _actual_sales_factorized(df)
+        if result is not None:
+            return result
 
-    # Створення повної адреси відбувається ПІСЛЯ очищення її компонентів
-    df = create_full_address(df)
-    df = df[df['full_address'] != '']
-    # Перетворюємо 'decade' на числовий тип для коректного сортування
-    df['decade'] = pd.to_numeric(df['decade'], errors='coerce').fillna(0).astype(int)
+    df = prepare_actual_sales_input(df)
 
     # Додаткова перевірка: чи містить колонка 'distributor' лише порожні рядки після очищення?
     if (df['distributor'] == '').all():
         print("Попередження: Колонка 'distributor' не містить значущих даних. Повертаю порожній DataFrame.")
-        return pd.DataFrame(
-            columns=['distributor', 'product_name', 'full_address', 'year', 'month', 'decade', 'actual_quantity', 'new_client'])
+        return pd.DataFrame(columns=ACTUAL_SALES_COLUMNS)
 
     # КРОК: Агрегуємо продажі в межах декади (сума всіх замовлень в декаді)
-    df = df.groupby(
-        ['distributor', 'product_name', 'full_address', 'year', 'month', 'decade', 'new_client'],
-        as_index=False
-    )['quantity'].sum()
+    df = df.groupby(ACTUAL_SALES_GROUP_KEYS, as_index=False)['quantity'].sum()
 
     # Тепер aggregated_df — це просто df після агрегації
     aggregated_df = df
 
     # Крок 2: Сортуємо дані для коректного обчислення "чистих" продажів.
-    aggregated_df = aggregated_df.sort_values(
-        by=['distributor', 'product_name', 'full_address', 'year', 'month', 'new_client', 'decade']
-    )
+    aggregated_df = aggregated_df.sort_values(by=ACTUAL_SALES_SORT_KEYS)
 
     # Крок 3: Обчислюємо кумулятивну суму попередньої декади для віднімання.
     aggregated_df['prev_decade_quantity'] = aggregated_df.groupby(
-        ['distributor', 'product_name', 'full_address', 'year', 'month', 'new_client']
+        ACTUAL_SALES_SORT_KEYS[:-1]
     )['quantity'].shift(1).fillna(0)
 
     # Крок 4: Розраховуємо фактичні продажі за декаду.
@@ -84,9 +110,7 @@ def compute_actual_sales(df: pd.DataFrame) -> pd.DataFrame:
     )
 
     # Вибираємо та перейменовуємо потрібні колонки для фінального результату
-    result = aggregated_df[[
-        'distributor', 'product_name', 'full_address', 'year', 'month', 'decade', 'actual_quantity', 'new_client'
-    ]]
+    result = aggregated_df[ACTUAL_SALES_COLUMNS]
 
     # Перетворюємо 'decade' назад у рядок, щоб відповідати очікуваному формату виводу.
     result['decade'] = result['decade'].astype(str)
@@ -95,70 +119,282 @@ def compute_actual_sales(df: pd.DataFrame) -> pd.DataFrame:
     return result[result['actual_quantity'] != 0]
 
 
+def _factorize_cleaned(values) -> tuple:
+    """
+    Коди та відсортовані унікальні значення колонки після очищення fillna('') + str + strip.
+    Рядкові операції виконуються лише над унікальними значеннями, а не над кожним рядком.
+    """
+    codes, uniques = pd.factorize(values)
+    cleaned = pd.Series(uniques).astype(str).str.strip().to_numpy(dtype=object)
+    # Останній елемент '' відповідає пропускам (код -1)
+    cleaned_codes, cleaned_uniques = pd.factorize(np.append(cleaned, ''), sort=True)
+    return cleaned_codes[codes], np.asarray(cleaned_uniques, dtype=object)
+
+
+def _factorize_full_address(df: pd.DataFrame) -> tuple:
+    """Коди full_address, побудовані лише для унікальних комбінацій (місто, вулиця, будинок)."""
+    parts = [_factorize_cleaned(df[col]) for col in ['city', 'street', 'house_number']]
+    combined = np.zeros(len(df), dtype=np.int64)
+    for part_codes, part_values in parts:
+        combined = combined * len(part_values) + part_codes
+    combo_codes, combos = pd.factorize(combined)
+
+    # Розкладаємо унікальні комбінації назад на значення частин адреси
+    pieces = []
+    for part_codes, part_values in reversed(parts):
+        pieces.append(pd.Series(part_values[combos % len(part_values)]))
+        combos = combos // len(part_values)
+    house, street, city = pieces
+    addresses = (city + ", " + street + ", " + house).str.strip(' ,').to_numpy(dtype=object)
+
+    address_codes, address_values = pd.factorize(addresses, sort=True)
+    return address_codes[combo_codes], np.asarray(address_values, dtype=object)
+
+
+def actual_sales_seed(df: pd.DataFrame, attributes: list) -> tuple | None:
+    """
+    Початковий стан інкрементального розрахунку (core/incremental_sales.py) одним проходом
+    факторизованого рушія: (фактичні продажі — як compute_actual_sales плюс очищені колонки
+    attributes з першого рядка групи; знімок серій — SERIES-ключі, остання декада і її кумулятивна кількість).
+    None — рушій не застосовний до кадру (див. _actual_sales_factorized) або в кадрі немає значущих рядків.
+    """
+    if df.empty or any(col not in df.columns for col in ['quantity', 'decade', 'year', 'month']):
+        return None
+    return _actual_sales_factorized(df, attributes=attributes, snapshot=True)
+
+
+def _actual_sales_factorized(df: pd.DataFrame, attributes: list = (), snapshot: bool = False):
+    """
+    Та сама логіка, що й у compute_actual_sales, але на цілочисельних кодах.
+    Кожен ключ факторизується один раз (sort=True зберігає порядок сортування значень),
+    очищення та побудова full_address виконуються над унікальними значеннями,
+    коди об'єднуються в один int64-ключ, а сума за декаду та різниця з попередньою
+    декадою рахуються NumPy на відсортованому масиві.
+    Повертає None (і тоді використовується pandas-реалізація), якщо комбінований ключ
+    не вміщується в int64 або 'quantity' має nullable-тип.
+    attributes і snapshot — див. actual_sales_seed (тоді None і для кадру без значущих рядків).
+    """
+    if not isinstance(df['quantity'].dtype, np.dtype):
+        return None
+
+    codes, values = {}, {}
+    for col in ['distributor', 'product_name', 'new_client']:
+        codes[col], values[col] = _factorize_cleaned(df[col])
+
+    if 'full_address' in df.columns:
+        codes['full_address'], address_values = pd.factorize(df['full_address'], sort=True)
+        values['full_address'] = np.asarray(address_values, dtype=object)
+    else:
+        codes['full_address'], values['full_address'] = _factorize_full_address(df)
+
+    for col in ['year', 'month']:
+        codes[col], values[col] = pd.factorize(df[col], sort=True)
+
+    # Декада -> число (пропуски = 0), як pd.to_numeric(...).fillna(0).astype(int)
+    decade_codes, decade_raw = pd.factorize(df['decade'])
+    decade_numbers = pd.to_numeric(pd.Series(np.asarray(decade_raw, dtype=object)), errors='coerce')
+    decade_numbers = np.append(decade_numbers.fillna(0).astype(int).to_numpy(), 0)
+    decade_sorted_codes, values['decade'] = pd.factorize(decade_numbers, sort=True)
+    codes['decade'] = decade_sorted_codes[decade_codes]
+
+    sizes = {col: max(len(values[col]), 1) for col in ACTUAL_SALES_SORT_KEYS}
+    if np.prod([float(n) for n in sizes.values()]) >= 2 ** 62:
+        return None
+
+    # Аналог df[df['full_address'] != ''] (пропуски в адресі на цьому кроці залишаються)
+    address_codes = codes['full_address']
+    has_address = (address_codes < 0) | (values['full_address'] != '')[address_codes]
+    if (values['distributor'][codes['distributor'][has_address]] == '').all():
+        if snapshot:
+            return None
+        print("Попередження: Колонка 'distributor' не містить значущих даних. Повертаю порожній DataFrame.")
+        return pd.DataFrame(columns=ACTUAL_SALES_COLUMNS)
+
+    # groupby за замовчуванням відкидає рядки з пропусками в ключах
+    valid = has_address & (address_codes >= 0) & (codes['year'] >= 0) & (codes['month'] >= 0)
+    positions = np.flatnonzero(valid)
+    if positions.size == 0:
+        return None if snapshot else pd.DataFrame(columns=ACTUAL_SALES_COLUMNS)
+
+    def combine(keys, rows):
+        combined = np.zeros(rows.size, dtype=np.int64)
+        for col in keys:
+            combined = combined * sizes[col] + codes[col][rows]
+        return combined
+
+    sort_key = combine(ACTUAL_SALES_SORT_KEYS, positions)
+    order = np.argsort(sort_key, kind='stable')
+    sort_key = sort_key[order]
+    rows = positions[order]
+
+    # Межі груп (однаковий повний ключ) на відсортованому масиві
+    starts = np.flatnonzero(np.r_[True, sort_key[1:] != sort_key[:-1]])
+    quantity = df['quantity'].to_numpy()[rows]
+    if np.issubdtype(quantity.dtype, np.integer):
+        quantity = quantity.astype(np.int64)
+    else:
+        # як і groupby.sum, пропуски вважаються нулями
+        quantity = np.nan_to_num(pd.to_numeric(quantity, errors='coerce').astype(float))
+    group_quantity = np.add.reduceat(quantity, starts)
+
+    # Серія — той самий ключ без декади; різниця рахується лише всередині серії
+    series_key = sort_key[starts] // sizes['decade']
+    new_series = np.r_[True, series_key[1:] != series_key[:-1]]
+    prev_quantity = np.where(new_series, 0, np.r_[0, group_quantity[:-1]])
+    actual_quantity = group_quantity.astype(float) - prev_quantity
+
+    # Мітки індексу як у groupby(as_index=False): номер групи в порядку ACTUAL_SALES_GROUP_KEYS
+    first_rows = rows[starts]
+    group_rank = np.empty(starts.size, dtype=np.int64)
+    group_rank[np.argsort(combine(ACTUAL_SALES_GROUP_KEYS, first_rows))] = np.arange(starts.size)
+
+    def key_columns(keys, group_rows, labels) -> pd.DataFrame:
+        frame = pd.DataFrame(index=labels)
+        for col in keys:
+            if col in ('year', 'month'):
+                # Рік і місяць зберігають свій тип; object-колонки groupby перетворює через Index
+                column = df[col].iloc[group_rows]
+                frame[col] = pd.Index(column.to_numpy()) if column.dtype == object else column.set_axis(labels)
+            elif col == 'decade':
+                frame[col] = values[col][codes[col][group_rows]].astype(str)
+            else:
+                frame[col] = values[col][codes[col][group_rows]]
+        return frame
+
+    keep = actual_quantity != 0
+    result = key_columns(ACTUAL_SALES_GROUP_KEYS, first_rows[keep], group_rank[keep])
+    result['actual_quantity'] = actual_quantity[keep]
+    # Атрибути адреси (місто, вулиця) — очищене значення першого рядка групи, як groupby 'first'
+    for col in attributes:
+        attribute_codes, attribute_values = _factorize_cleaned(df[col])
+        result[col] = attribute_values[attribute_codes[first_rows[keep]]]
+    result = result[ACTUAL_SALES_COLUMNS + list(attributes)]
+    if not snapshot:
+        return result
+
+    # Остання декада кожної серії та її кумулятивна кількість
+    last = np.r_[new_series[1:], True]
+    series_keys = ACTUAL_SALES_SORT_KEYS[:-1]
+    last_snapshot = key_columns(series_keys, first_rows[last], np.arange(int(last.sum())))
+    last_snapshot['decade'] = values['decade'][codes['decade'][first_rows[last]]]
+    last_snapshot['quantity'] = group_quantity[last]
+    return result, last_snapshot
+
+
 # --- Решта ваших оригінальних функцій залишаються без змін ---
 
+# Верхня межа пам'яті для однієї порції бутстрап-вибірок (матриця індексів або лічильників)
+BOOTSTRAP_MEMORY_BUDGET = 64 * 1024 ** 2
+
+# Скільки індексів вибірки (рядків * ітерацій) генерується точно; ~0.2 с при ~10 нс на індекс.
+# Понад цю межу суми беруться з нормального наближення (ЦГТ), якщо рядків не менше BOOTSTRAP_NORMAL_MIN_ROWS
+BOOTSTRAP_EXACT_MAX_DRAWS = 20_000_000
+BOOTSTRAP_NORMAL_MIN_ROWS = 1_000
+
+# У скільки разів одна категорія мультиноміального розподілу дорожча за один індекс вибірки
+_MULTINOMIAL_COST_RATIO = 30
+
+
+def bootstrap_sums(values: np.ndarray, n_iterations: int, rng: np.random.Generator = None,
+                   memory_budget: int = BOOTSTRAP_MEMORY_BUDGET,
+                   exact_max_draws: int = BOOTSTRAP_EXACT_MAX_DRAWS) -> np.ndarray:
+    """
+    Повертає суми n_iterations бутстрап-вибірок (з поверненням, розміром len(values)).
+
+    Вибірки генеруються порціями в межах memory_budget байт. Якщо різних значень
+    набагато менше, ніж рядків, замість матриці індексів генеруються мультиноміальні
+    лічильники повторень кожного значення — розподіл сум той самий, а роботи менше.
+    Якщо ж точна генерація дорожча за exact_max_draws індексів, а рядків не менше
+    BOOTSTRAP_NORMAL_MIN_ROWS, суми беруться з нормального розподілу з тими самими середнім
+    і дисперсією (n * mean, n * var): для сум тисяч рядків це наближення бутстрапу з похибкою
+    порядку 1/sqrt(n), а 100 000 ітерацій займають мілісекунди.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n == 0 or n_iterations <= 0:
+        return np.zeros(max(n_iterations, 0))
+    rng = rng if rng is not None else np.random.default_rng()
+
+    unique_values, counts = np.unique(values, return_counts=True)
+    use_multinomial = len(unique_values) * _MULTINOMIAL_COST_RATIO < n
+    width = len(unique_values) if use_multinomial else n
+    if width * (_MULTINOMIAL_COST_RATIO if use_multinomial else 1) * n_iterations > exact_max_draws \
+            and n >= BOOTSTRAP_NORMAL_MIN_ROWS:
+        return rng.normal(n * values.mean(), np.sqrt(n) * values.std(), size=n_iterations)
+    chunk = max(1, min(n_iterations, memory_budget // (width * 8)))
+
+    sums = np.empty(n_iterations)
+    for start in range(0, n_iterations, chunk):
+        size = min(chunk, n_iterations - start)
+        if use_multinomial:
+            sums[start:start + size] = rng.multinomial(n, counts / n, size=size) @ unique_values
+        else:
+            sums[start:start + size] = values[rng.integers(0, n, size=(size, n))].sum(axis=1)
+    return sums
+
+
+def bootstrap_group_sums(codes: np.ndarray, columns: list, n_groups: int, n_iterations: int,
+                         rng: np.random.Generator = None, memory_budget: int = BOOTSTRAP_MEMORY_BUDGET) -> list:
+    """
+    Стратифікований бутстрап для всіх груп одним проходом.
+    Рядки кожної групи (codes — номер групи 0..n_groups-1) перевибираються з поверненням
+    у межах своєї групи; для кожної колонки з columns повертається матриця сум
+    розміром (n_iterations, n_groups).
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    order = np.argsort(codes, kind='stable')
+    sizes = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    columns = [np.asarray(col, dtype=float)[order] for col in columns]
+
+    # Для кожної позиції відсортованого масиву — початок і розмір її групи
+    row_start = np.repeat(starts, sizes)
+    row_size = np.repeat(sizes, sizes)
+    present = sizes > 0
+
+    n = len(codes)
+    results = [np.zeros((n_iterations, n_groups)) for _ in columns]
+    if n == 0:
+        return results
+    chunk = max(1, min(n_iterations, memory_budget // (n * 8 * (len(columns) + 1))))
+    for first in range(0, n_iterations, chunk):
+        size = min(chunk, n_iterations - first)
+        indices = row_start + (rng.random((size, n)) * row_size).astype(np.int64)
+        for values, result in zip(columns, results):
+            result[first:first + size, present] = np.add.reduceat(values[indices], starts[present], axis=1)
+    return results
+
+
 def calculate_forecast_with_bootstrap(df_for_current_month: pd.DataFrame, last_decade: int, year: int, month: int,
-                                      n_iterations: int = 1000) -> dict:
+                                      n_iterations: int = 1000, rng: np.random.Generator = None) -> dict:
     """
     Розраховує загальний прогноз та довірчий інтервал з використанням методу бутстрапу.
+    Для відтворюваного результату передайте rng = np.random.default_rng(seed).
     """
     if df_for_current_month.empty or last_decade >= 30:
         return {}
 
-    cal = Ukraine()
-
-    try:
-        start_date = date(year, month, 1)
-        end_date_of_period = date(year, month, last_decade)
-    except ValueError:
+    workdays = work_calendar.workdays_passed_and_left(year, month, last_decade)
+    if workdays is None:
         return {}
-
-    workdays_passed = 0
-    current_day = start_date
-    while current_day <= end_date_of_period:
-        if cal.is_working_day(current_day):
-            workdays_passed += 1
-        current_day += timedelta(days=1)
+    workdays_passed, workdays_left = workdays
 
     if workdays_passed <= 0:
         return {}
 
-    if month == 12:
-        first_day_of_next_month = date(year + 1, 1, 1)
-    else:
-        first_day_of_next_month = date(year, month + 1, 1)
-    last_day_of_month = first_day_of_next_month - timedelta(days=1)
-
-    workdays_left = 0
-    if end_date_of_period < last_day_of_month:
-        current_day = end_date_of_period + timedelta(days=1)
-        while current_day <= last_day_of_month:
-            if cal.is_working_day(current_day):
-                workdays_left += 1
-            current_day += timedelta(days=1)
-
     total_revenue_so_far = df_for_current_month['revenue'].sum()
     total_quantity_so_far = df_for_current_month['quantity'].sum()
 
-    bootstrap_forecasts_revenue = []
-    sales_data = df_for_current_month['revenue'].values
-    n_sales = len(sales_data)
-
-    if n_sales == 0:
+    sales_data = df_for_current_month['revenue'].to_numpy(dtype=float)
+    if len(sales_data) == 0:
         return {}
 
-    for _ in range(n_iterations):
-        indices = np.random.randint(0, n_sales, size=n_sales)
-        bootstrap_sample = sales_data[indices]
-        sample_revenue = bootstrap_sample.sum()
-        sample_daily_revenue_rate = sample_revenue / workdays_passed
-        forecast_r = sample_revenue + (workdays_left * sample_daily_revenue_rate)
-        bootstrap_forecasts_revenue.append(forecast_r)
-
-    conf_interval_revenue = (
-        np.percentile(bootstrap_forecasts_revenue, 2.5),
-        np.percentile(bootstrap_forecasts_revenue, 97.5)
-    )
+    # Прогноз кожної симуляції: дохід вибірки + робочі дні, що лишились, * денний темп вибірки
+    sample_revenue = bootstrap_sums(sales_data, n_iterations, rng=rng)
+    bootstrap_forecasts_revenue = sample_revenue + workdays_left * (sample_revenue / workdays_passed)
+
+    lower, upper = np.percentile(bootstrap_forecasts_revenue, [2.5, 97.5])
+    conf_interval_revenue = (lower, upper)
 
     return {
         "point_forecast_revenue": total_revenue_so_far + (workdays_left * (total_revenue_so_far / workdays_passed)),
@@ -171,15 +407,18 @@ def calculate_forecast_with_bootstrap(df_for_current_month: pd.DataFrame, last_d
 
 
 def calculate_product_level_forecast(df_for_current_month: pd.DataFrame, workdays_passed: int,
-                                     workdays_left: int) -> pd.DataFrame:
+                                     workdays_left: int, n_iterations: int = 1000,
+                                     rng: np.random.Generator = None) -> pd.DataFrame:
     """
-    Розраховує точковий прогноз доходу та кількості для кожного продукту.
+    Розраховує точковий прогноз доходу та кількості для кожного продукту
+    і 95% довірчі інтервали до них (бутстрап усіх продуктів одним проходом).
     """
     if df_for_current_month.empty or workdays_passed <= 0:
         return pd.DataFrame()
 
     # 1. Агрегуємо фактичні дані по кожному продукту
-    product_summary = df_for_current_month.groupby('product_name').agg(
+    grouped = df_for_current_month.groupby('product_name', observed=True)
+    product_summary = grouped.agg(
         quantity_so_far=('quantity', 'sum'),
         revenue_so_far=('revenue', 'sum')
     ).reset_index()
@@ -194,6 +433,18 @@ def calculate_product_level_forecast(df_for_current_month: pd.DataFrame, workday
     product_summary['forecast_revenue'] = product_summary['revenue_so_far'] + (
             product_summary['daily_revenue_rate'] * workdays_left)
 
+    # 4. Довірчі інтервали: рядки перевибираються в межах свого продукту, прогноз масштабується так само
+    quantity_sums, revenue_sums = bootstrap_group_sums(
+        grouped.ngroup().to_numpy(),
+        [df_for_current_month['quantity'].to_numpy(dtype=float), df_for_current_month['revenue'].to_numpy(dtype=float)],
+        n_groups=len(product_summary), n_iterations=n_iterations, rng=rng
+    )
+    scale = 1 + workdays_left / workdays_passed
+    for name, sums in (('forecast_quantity', quantity_sums), ('forecast_revenue', revenue_sums)):
+        lower, upper = np.percentile(sums * scale, [2.5, 97.5], axis=0)
+        product_summary[f'{name}_low'] = lower
+        product_summary[f'{name}_high'] = upper
+
     return product_summary.sort_values(by='forecast_revenue', ascending=False)
 
 
@@ -227,7 +478,7 @@ def calculate_main_kpis(df: pd.DataFrame) -> dict:
     unique_products = df['product_name'].nunique()
     unique_clients = df.drop_duplicates(subset=['new_client', 'full_address']).shape[0]
     avg_quantity_per_client = total_quantity / unique_clients if unique_clients else 0
-    product_sales = df.groupby('product_name')['quantity'].sum().sort_values(ascending=False)
+    product_sales = df.groupby('product_name', observed=True)['quantity'].sum().sort_values(ascending=False)
     top5_total = product_sales.head(5).sum()
     top5_share = (top5_total / total_quantity * 100) if total_quantity else 0
 
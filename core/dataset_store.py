@@ -0,0 +1,240 @@
+"""
+Спільне для всіх сесій сховище наборів даних.
+
+Кожен набір (наприклад, результат запиту до sales_data) зберігається в процесі один раз,
+а сесії отримують на нього дескриптори (DatasetHandle). Поки на набір є живі дескриптори,
+його не витісняють; набори без дескрипторів витісняються від найдавніше використаних,
+коли загальний обсяг перевищує max_mb. Дескриптор звільняється автоматично, коли його
+перестає тримати сесія (наприклад, після нового запиту або завершення сесії).
+
+Набори незмінні: дескриптор видає поверхневу копію кадру, а copy-on-write pandas гарантує,
+що зміни в сесії (нові колонки, присвоєння) не торкаються спільних даних. Похідні кадри
+(derive) теж спільні — підготовка сторінки виконується один раз на набір, а не на кожну сесію;
+похідним може бути й незмінний об'єкт з властивістю memory_mb (наприклад, core.sales_cube.SalesCube).
+Похідне можна будувати з іншого похідного (source) — обидва належать тому самому кадру набору.
+Набір можна розширити (update), наприклад дочитаними колонками: кадр у сховищі замінюється новим,
+а похідні кадри перебудовуються при наступному зверненні.
+
+Набір старіший за ttl секунд або з іншою версією даних джерела (data_version, наприклад
+sales_queries.sales_data_version) для get() — промах: викликач завантажує дані заново і замінює
+набір (put) під тим самим ключем. Дескриптори сесій лишаються чинними й бачать
+новий кадр; version дескриптора змінюється з кожним перезавантаженням, тож кеші, що залежать
+від вмісту набору, ключуються (key, version).
+Спільні кадри покладаються на copy-on-write: у pandas 2 його вмикає застосунок (home.py).
+"""
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+
+from core.schema import frame_memory_mb
+
+DATASET_STORE_MAX_MB = 2048
+# Час життя набору, с (як st.cache_data(ttl=3600) до спільного сховища)
+DATASET_STORE_TTL = 3600
+
+
+def _memory_mb(derived) -> float:
+    return frame_memory_mb(derived) if isinstance(derived, pd.DataFrame) else derived.memory_mb
+
+
+class DatasetHandle:
+    """Посилання сесії на спільний набір даних. Кадр не змінювати на місці — лише через копії."""
+
+    def __init__(self, store: "DatasetStore", key):
+        self.key = key
+        self._store = store
+        weakref.finalize(self, store._release, key)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Поверхнева копія спільного кадру (дані не копіюються)."""
+        return self._store.frame(self.key).copy(deep=False)
+
+    @property
+    def version(self) -> int:
+        """Номер завантаження набору: збільшується, коли набір перезавантажують (put з replace=True)."""
+        return self._store.version(self.key)
+
+    def update(self, update):
+        """Замінює спільний кадр на update(кадр) — див. DatasetStore.update."""
+        self._store.update(self.key, update)
+
+    def derive(self, name: str, build, source: tuple = None):
+        """
+        Спільний похідний кадр (або незмінний об'єкт) build(кадр), обчислюється один раз на набір.
+        source — (ім'я, build[, source]) похідного, яке build отримує замість кадру набору.
+        """
+        derived = self._store.derive(self.key, name, build, source)
+        return derived.copy(deep=False) if isinstance(derived, pd.DataFrame) else derived
+
+
+class DatasetStore:
+    """Незмінні набори даних з підрахунком посилань і обмеженням загального обсягу (max_mb)."""
+
+    def __init__(self, max_mb: float = DATASET_STORE_MAX_MB, ttl: float = DATASET_STORE_TTL):
+        self.max_mb = max_mb
+        self.ttl = ttl
+        # ключ -> {"frame", "derived", "mb", "refs", "lock", "loaded_at", "version", "data_version"}
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _expired(self, entry: dict) -> bool:
+        return self.ttl is not None and time.monotonic() - entry["loaded_at"] > self.ttl
+
+    @staticmethod
+    def _outdated(entry: dict, data_version) -> bool:
+        return data_version is not None and entry["data_version"] != data_version
+
+    def put(self, key, df: pd.DataFrame, replace: bool = False, data_version=None) -> DatasetHandle:
+        """
+        Реєструє набір під ключем key і повертає дескриптор.
+        Якщо свіжий набір з таким ключем і тією ж версією даних уже є, повертається дескриптор на нього,
+        а df відкидається. Застарілий набір, набір з іншою data_version або будь-який при replace=True
+        замінюється на df: похідні скидаються, version збільшується, наявні дескриптори бачать новий кадр.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = {"frame": df, "derived": {}, "mb": frame_memory_mb(df), "refs": 0,
+                                      "lock": threading.Lock(), "loaded_at": time.monotonic(), "version": 1,
+                                      "data_version": data_version}
+            elif replace or self._expired(entry) or self._outdated(entry, data_version):
+                entry.update(frame=df, derived={}, mb=frame_memory_mb(df), loaded_at=time.monotonic(),
+                             version=entry["version"] + 1, data_version=data_version)
+            return self._acquire(key)
+
+    def get(self, key, data_version=None):
+        """
+        Дескриптор на наявний свіжий набір або None (набору немає, він старіший за ttl
+        або завантажений з іншої версії даних, ніж data_version; None — версію не перевіряти).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry) or self._outdated(entry, data_version):
+                if entry["refs"] == 0:
+                    del self._entries[key]
+                return None
+            return self._acquire(key)
+
+    def get_or_load(self, key, load) -> DatasetHandle:
+        """Дескриптор на набір key; якщо його немає — load() і реєстрація результату."""
+        handle = self.get(key)
+        return handle if handle is not None else self.put(key, load())
+
+    def frame(self, key) -> pd.DataFrame:
+        """Спільний кадр набору key (не змінювати на місці)."""
+        with self._lock:
+            return self._entries[key]["frame"]
+
+    def version(self, key) -> int:
+        with self._lock:
+            return self._entries[key]["version"]
+
+    def data_version(self, key):
+        """Версія даних джерела, з якої завантажено набір key (None — набору немає або версія невідома)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry["data_version"] if entry else None
+
+    def update(self, key, update):
+        """
+        Замінює кадр набору key на update(кадр). Якщо update повертає той самий об'єкт, нічого не змінюється.
+        Оновлення одного набору виконуються по черзі, тож update бачить результат попереднього.
+        """
+        with self._lock:
+            entry = self._entries[key]
+        with entry["lock"]:
+            while True:
+                frame = entry["frame"]
+                new_frame = update(frame)
+                if new_frame is frame:
+                    return
+                with self._lock:
+                    # Набір могли перезавантажити (put), поки виконувався update, — тоді повторюємо на новому кадрі
+                    if entry["frame"] is not frame:
+                        continue
+                    entry["frame"] = new_frame
+                    entry["derived"] = {}
+                    entry["mb"] = frame_memory_mb(new_frame)
+                    self._evict()
+                    return
+
+    def derive(self, key, name: str, build, source: tuple = None):
+        """
+        Похідний кадр набору key під іменем name (обчислюється один раз і рахується в обсяг сховища).
+        source — (ім'я, build[, source]) похідного, з якого будується цей, замість самого кадру.
+        """
+        with self._lock:
+            entry = self._entries[key]
+            frame = entry["frame"]
+        return self._derive_for(key, entry, frame, name, build, source)
+
+    def _derive_for(self, key, entry: dict, frame: pd.DataFrame, name: str, build, source: tuple = None):
+        """Похідне саме для кадру frame: ланцюжок source будується з того самого кадру, навіть якщо його замінять."""
+        with self._lock:
+            derived = entry["derived"].get(name) if entry["frame"] is frame else None
+        if derived is None:
+            if source is None:
+                base = frame.copy(deep=False)
+            else:
+                base = self._derive_for(key, entry, frame, *source)
+                base = base.copy(deep=False) if isinstance(base, pd.DataFrame) else base
+            derived = build(base)
+            with self._lock:
+                # Кадр могли замінити (update), поки будувався похідний — тоді результат не зберігаємо
+                if entry["frame"] is frame and self._entries.get(key) is entry:
+                    if name not in entry["derived"]:
+                        entry["derived"][name] = derived
+                        entry["mb"] += _memory_mb(derived)
+                        self._evict()
+                    derived = entry["derived"][name]
+        return derived
+
+    def refcount(self, key) -> int:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry["refs"] if entry else 0
+
+    @property
+    def total_mb(self) -> float:
+        with self._lock:
+            return sum(entry["mb"] for entry in self._entries.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"datasets": len(self._entries), "total_mb": self.total_mb,
+                    "referenced": sum(1 for entry in self._entries.values() if entry["refs"] > 0)}
+
+    def clear(self):
+        """Видаляє всі набори без живих дескрипторів."""
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry["refs"] == 0]:
+                del self._entries[key]
+
+    def _acquire(self, key) -> DatasetHandle:
+        entry = self._entries[key]
+        entry["refs"] += 1
+        self._entries.move_to_end(key)
+        handle = DatasetHandle(self, key)
+        self._evict()
+        return handle
+
+    def _release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["refs"] -= 1
+                self._evict()
+
+    def _evict(self):
+        # Витісняємо лише набори, на які не посилається жодна сесія
+        for key in list(self._entries):
+            if self.total_mb <= self.max_mb:
+                break
+            if self._entries[key]["refs"] == 0:
+                del self._entries[key]
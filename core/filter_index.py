@@ -0,0 +1,101 @@
+"""
+Інвертований індекс локальних фільтрів міста й вулиці.
+
+Будується один раз на кадр (набір даних): для кожного коду міста і вулиці — відсортовані позиції
+його рядків, плюс відсортована ієрархія місто -> вулиці для каскадних списків фільтрів.
+Застосування будь-якої комбінації фільтрів — об'єднання діапазонів позицій і їх перетин,
+без isin по текстових колонках. Без фільтрів повертається сам кадр, суцільний діапазон
+позицій — зріз iloc (copy-on-write, дані не копіюються); інакше вибираються лише потрібні рядки.
+"""
+import numpy as np
+import pandas as pd
+
+_EMPTY = np.zeros(0, dtype=np.int64)
+
+
+def _grouped_positions(values) -> tuple:
+    """Відсортовані мітки, позиції рядків, згруповані за кодом мітки, межі груп і коди рядків."""
+    codes, labels = pd.factorize(values, sort=True)
+    codes = codes.astype(np.int64)
+    # Стабільне сортування — позиції всередині групи лишаються зростаючими
+    order = np.argsort(codes, kind='stable')
+    offsets = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+    return np.asarray(labels, dtype=object), order, offsets, codes
+
+
+class FilterIndex:
+    """
+    Позиції рядків кадру за містом і вулицею та ієрархія місто -> вулиці.
+    Незмінний; пропуски й порожні рядки не потрапляють у списки фільтрів.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.n_rows = len(df)
+        self._city_labels, self._city_order, self._city_offsets, city_codes = _grouped_positions(df['city'])
+        self._street_labels, self._street_order, self._street_offsets, street_codes = (
+            _grouped_positions(df['street']))
+        self._city_code = {label: code for code, label in enumerate(self._city_labels)}
+        self._street_code = {label: code for code, label in enumerate(self._street_labels)}
+
+        # Ієрархія: коди вулиць кожного міста (коди зростають разом з мітками, тож списки вже відсортовані)
+        shown_streets = np.array([s != '' for s in self._street_labels], dtype=bool)
+        valid = (city_codes >= 0) & (street_codes >= 0)
+        pairs = np.unique(city_codes[valid] * len(self._street_labels) + street_codes[valid])
+        pair_city, pair_street = np.divmod(pairs, len(self._street_labels))
+        keep = shown_streets[pair_street]
+        pair_city, pair_street = pair_city[keep], pair_street[keep]
+        bounds = np.searchsorted(pair_city, np.arange(len(self._city_labels) + 1))
+        self._city_streets = [pair_street[bounds[code]:bounds[code + 1]] for code in range(len(self._city_labels))]
+
+        self.cities = [c for c in self._city_labels.tolist() if c != '']
+        self._all_streets = self._street_labels[shown_streets].tolist()
+
+    @property
+    def memory_mb(self) -> float:
+        arrays = [self._city_order, self._city_offsets, self._street_order, self._street_offsets] + self._city_streets
+        return sum(a.nbytes for a in arrays) / 1024 ** 2
+
+    def streets(self, cities=None) -> list:
+        """Відсортовані вулиці обраних міст; без вибору — усі вулиці."""
+        if not cities:
+            return list(self._all_streets)
+        codes = [self._city_code[c] for c in cities if c in self._city_code]
+        if len(codes) == 1:
+            return self._street_labels[self._city_streets[codes[0]]].tolist()
+        merged = np.unique(np.concatenate([self._city_streets[code] for code in codes] or [_EMPTY]))
+        return self._street_labels[merged].tolist()
+
+    @staticmethod
+    def _rows(values, code_of: dict, order: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+        """Зростаючі позиції рядків з будь-яким зі значень (невідомі значення пропускаються)."""
+        codes = [code_of[v] for v in values if v in code_of]
+        if len(codes) == 1:
+            return order[offsets[codes[0]]:offsets[codes[0] + 1]]
+        parts = [order[offsets[code]:offsets[code + 1]] for code in codes]
+        return np.sort(np.concatenate(parts)) if parts else _EMPTY
+
+    def positions(self, cities=None, streets=None):
+        """Зростаючі позиції рядків за фільтрами; None — фільтрів немає (усі рядки)."""
+        if not cities and not streets:
+            return None
+        rows = None
+        if cities:
+            rows = self._rows(cities, self._city_code, self._city_order, self._city_offsets)
+        if streets:
+            street_rows = self._rows(streets, self._street_code, self._street_order, self._street_offsets)
+            rows = street_rows if rows is None else np.intersect1d(rows, street_rows, assume_unique=True)
+        return rows
+
+    def count(self, cities=None, streets=None) -> int:
+        """Кількість рядків за фільтрами без вибірки самих рядків."""
+        rows = self.positions(cities, streets)
+        return self.n_rows if rows is None else len(rows)
+
+    def apply(self, df: pd.DataFrame, cities=None, streets=None) -> pd.DataFrame:
+        """Рядки df (кадр, з якого побудовано індекс) за фільтрами, у вихідному порядку."""
+        rows = self.positions(cities, streets)
+        if rows is None:
+            return df
+        if len(rows) and rows[-1] - rows[0] + 1 == len(rows):
+            return df.iloc[rows[0]:rows[-1] + 1]
+        return df.take(rows)
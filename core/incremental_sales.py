@@ -0,0 +1,229 @@
+import numpy as np
+import pandas as pd
+
+from core.data_processing import (
+    ACTUAL_SALES_COLUMNS, ACTUAL_SALES_GROUP_KEYS, ACTUAL_SALES_SORT_KEYS, actual_sales_seed,
+    prepare_actual_sales_input
+)
+from core.filter_index import FilterIndex
+from core.sales_queries import REVISION_COLUMN
+
+# Серія — ключ, у межах якого кумулятивні декади віднімаються одна від одної
+SERIES_KEYS = ACTUAL_SALES_SORT_KEYS[:-1]
+
+# Додаткові колонки, що зберігаються разом із фактичними продажами для локальних фільтрів
+# (місто та вулиця однозначно визначаються адресою)
+ATTRIBUTE_COLUMNS = ['city', 'street']
+
+# Якщо нових рядків більше цієї частки набору, повний перерахунок факторизованим рушієм (from_frame)
+# швидший за update() (очищення і groupby pandas по нових рядках)
+INCREMENTAL_MAX_SHARE = 0.25
+
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _series_hash(frame: pd.DataFrame) -> np.ndarray:
+    """
+    64-бітний хеш ключа серії (SERIES_KEYS) для кожного рядка frame. Хешуються лише унікальні
+    значення кожної колонки; рік і місяць зводяться до float64, текст — до str, тож хеш
+    не залежить від того, яким шляхом (факторизований рушій чи groupby) побудовано кадр.
+    """
+    combined = np.zeros(len(frame), dtype=np.uint64)
+    for col in SERIES_KEYS:
+        values = frame[col]
+        if col in ('year', 'month'):
+            codes, uniques = pd.factorize(pd.to_numeric(values).astype('float64'))
+            unique_hash = pd.util.hash_array(np.asarray(uniques, dtype='float64'))
+        else:
+            codes, uniques = pd.factorize(values)
+            unique_hash = pd.util.hash_array(np.asarray(uniques, dtype=object))
+        combined = pd.util.hash_array(combined * _HASH_MULTIPLIER + unique_hash[codes])
+    return combined
+
+
+class ActualSalesState:
+    """
+    Інкрементальний розрахунок фактичних продажів.
+
+    Зберігає останній кумулятивний знімок для кожної серії
+    (дистриб'ютор, продукт, адреса, рік, місяць, клієнт) і накопичену таблицю
+    фактичних продажів. Коли надходить наступна декада, update() рахує різниці
+    лише для нових рядків, тому вартість оновлення пропорційна їх кількості.
+    Результат збігається з compute_actual_sales на всіх даних разом,
+    якщо декади кожної серії надходять у порядку зростання.
+    Рядки, змінені вже після врахування (повторне завантаження зберігає їхні id), помічаються
+    за ревізією (sql/sales_data_revision.sql): такий набір covers() не покриває.
+
+    Початковий стан (from_frame) рахується факторизованим рушієм compute_actual_sales разом
+    зі знімком серій. Знімок — відсортовані масиви NumPy (хеш серії, декада, кількість),
+    тож update() шукає попередні значення серій бінарним пошуком, без циклу по групах.
+    dataset_key — ключ набору даних, для якого побудовано стан (DatasetHandle.key).
+    """
+
+    def __init__(self, dataset_key=None):
+        self.dataset_key = dataset_key
+        self._series = np.zeros(0, dtype=np.uint64)
+        self._decades = np.zeros(0, dtype=np.int64)
+        self._quantities = np.zeros(0, dtype=np.float64)
+        self.high_water_mark = None
+        self.revision_mark = None
+        self.row_count = 0
+        self._parts = []
+        self._table = None
+        self._filter_index = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, dataset_key=None) -> "ActualSalesState":
+        state = cls(dataset_key)
+        seed = actual_sales_seed(df, ATTRIBUTE_COLUMNS)
+        if seed is None:
+            state.update(df)
+            return state
+        actual, snapshot = seed
+        state._store_snapshot(_series_hash(snapshot), snapshot['decade'].to_numpy(dtype=np.int64),
+                              snapshot['quantity'].to_numpy(dtype=np.float64))
+        state._parts = [actual]
+        state._record_rows(df)
+        return state
+
+    @property
+    def series_count(self) -> int:
+        return len(self._series)
+
+    def covers(self, df: pd.DataFrame, dataset_key=None) -> bool:
+        """
+        Чи є вже враховані рядки підмножиною df: той самий набір даних (dataset_key), усі враховані
+        рядки (id <= high_water_mark) на місці і жоден з них не змінений після врахування
+        (ревізія не новіша за revision_mark).
+        """
+        if dataset_key != self.dataset_key or self.high_water_mark is None or 'id' not in df.columns:
+            return False
+        counted = df['id'] <= self.high_water_mark
+        if int(counted.sum()) != self.row_count:
+            return False
+        if REVISION_COLUMN in df.columns:
+            if self.revision_mark is None:
+                return False
+            return not bool((df.loc[counted, REVISION_COLUMN] > self.revision_mark).any())
+        return True
+
+    def new_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Рядки df, які ще не враховані (id > high_water_mark)."""
+        if self.high_water_mark is None:
+            return df
+        return df[df['id'] > self.high_water_mark]
+
+    def _lookup(self, series: np.ndarray) -> tuple:
+        """Збережені (декада, кількість, чи знайдено) для хешів серій."""
+        positions = np.searchsorted(self._series, series)
+        found = positions < len(self._series)
+        found[found] = self._series[positions[found]] == series[found]
+        positions = np.where(found, positions, 0)
+        if not len(self._series):
+            return np.zeros(len(series), dtype=np.int64), np.zeros(len(series)), found
+        return self._decades[positions], self._quantities[positions], found
+
+    def _store_snapshot(self, series: np.ndarray, decades: np.ndarray, quantities: np.ndarray):
+        """Записує (замінює або додає) останні декади серій і зберігає знімок відсортованим за хешем."""
+        positions = np.searchsorted(self._series, series)
+        found = positions < len(self._series)
+        found[found] = self._series[positions[found]] == series[found]
+        self._decades[positions[found]] = decades[found]
+        self._quantities[positions[found]] = quantities[found]
+        if not found.all():
+            series = np.concatenate([self._series, series[~found]])
+            order = np.argsort(series, kind='stable')
+            self._series = series[order]
+            self._decades = np.concatenate([self._decades, decades[~found]])[order]
+            self._quantities = np.concatenate([self._quantities, quantities[~found]])[order]
+
+    def update(self, df_new: pd.DataFrame) -> pd.DataFrame:
+        """
+        Додає нові сирі рядки (наступну кумулятивну декаду) і повертає
+        фактичні продажі, розраховані лише для них.
+        """
+        if df_new.empty:
+            return pd.DataFrame(columns=ACTUAL_SALES_COLUMNS + ATTRIBUTE_COLUMNS)
+
+        df = prepare_actual_sales_input(df_new.copy())
+        totals = df.groupby(ACTUAL_SALES_GROUP_KEYS, as_index=False, observed=True).agg(
+            quantity=('quantity', 'sum'), **{col: (col, 'first') for col in ATTRIBUTE_COLUMNS}
+        ).sort_values(by=ACTUAL_SALES_SORT_KEYS, ignore_index=True)
+
+        # Рядки однієї серії стоять поспіль (сортування за SERIES_KEYS, потім декадою)
+        series = _series_hash(totals)
+        decades = totals['decade'].to_numpy(dtype=np.int64)
+        quantities = totals['quantity'].to_numpy(dtype=np.float64)
+        first = np.r_[True, series[1:] != series[:-1]]
+        last = np.r_[first[1:], True]
+
+        # Попереднє кумулятивне значення: попередня декада в цій же порції або збережений знімок
+        stored_decades, stored_quantities, found = self._lookup(series[first])
+        stale = found & (stored_decades >= decades[first])
+        if stale.any():
+            row = np.flatnonzero(first)[np.argmax(stale)]
+            key = tuple(totals.loc[row, SERIES_KEYS])
+            raise ValueError(
+                f"Декада {decades[row]} для {key} вже врахована (останній знімок — декада "
+                f"{stored_decades[np.argmax(stale)]}). Потрібен повний перерахунок."
+            )
+        prev_quantity = np.r_[0.0, quantities[:-1]]
+        prev_quantity[first] = np.where(found, stored_quantities, 0.0)
+
+        self._store_snapshot(series[last], decades[last], quantities[last])
+        self._record_rows(df_new)
+
+        totals['actual_quantity'] = totals['quantity'] - prev_quantity
+        totals['decade'] = totals['decade'].astype(str)
+        new_actual = totals.loc[totals['actual_quantity'] != 0, ACTUAL_SALES_COLUMNS + ATTRIBUTE_COLUMNS]
+        self._parts.append(new_actual)
+        self._table = None
+        self._filter_index = None
+        return new_actual
+
+    def _record_rows(self, df_new: pd.DataFrame):
+        """Зсуває high-water mark, позначку ревізії і лічильник рядків на враховані рядки df_new."""
+        if 'id' in df_new.columns:
+            max_id = int(df_new['id'].max())
+            self.high_water_mark = max_id if self.high_water_mark is None else max(self.high_water_mark, max_id)
+        max_revision = df_new[REVISION_COLUMN].max() if REVISION_COLUMN in df_new.columns else None
+        if pd.notna(max_revision):
+            self.revision_mark = (int(max_revision) if self.revision_mark is None
+                                  else max(self.revision_mark, int(max_revision)))
+        self.row_count += len(df_new)
+
+    def actual_sales(self) -> pd.DataFrame:
+        """Уся накопичена таблиця фактичних продажів."""
+        if self._table is None:
+            if not self._parts:
+                return pd.DataFrame(columns=ACTUAL_SALES_COLUMNS + ATTRIBUTE_COLUMNS)
+            # Зливаємо частини в одну, щоб наступні виклики не копіювали дані повторно
+            self._table = pd.concat(self._parts, ignore_index=True)
+            self._parts = [self._table]
+        return self._table
+
+    def filter_index(self) -> FilterIndex:
+        """Індекс міст і вулиць накопиченої таблиці; перебудовується лише після update()."""
+        if self._filter_index is None:
+            self._filter_index = FilterIndex(self.actual_sales())
+        return self._filter_index
+
+
+def refresh_state(state, df: pd.DataFrame, dataset_key=None) -> ActualSalesState:
+    """
+    Стан фактичних продажів для df (набір dataset_key): наявний state, доповнений новими рядками,
+    або новий, розрахований векторно, — якщо state належить іншому набору, враховані рядки змінилися,
+    нових рядків забагато для покрокового оновлення або нова порція містить уже враховану декаду.
+    """
+    if state is None or not state.covers(df, dataset_key):
+        return ActualSalesState.from_frame(df, dataset_key)
+    new_rows = state.new_rows(df)
+    if new_rows.empty:
+        return state
+    if len(new_rows) > INCREMENTAL_MAX_SHARE * len(df):
+        return ActualSalesState.from_frame(df, dataset_key)
+    try:
+        state.update(new_rows)
+    except ValueError:
+        return ActualSalesState.from_frame(df, dataset_key)
+    return state
@@ -0,0 +1,284 @@
+"""
+Локальне колонкове сховище sales_data (Parquet), розбите за регіоном, роком і місяцем.
+
+Для кожного регіону зберігається high-water mark — найбільший id, що вже є локально,
+і позначка ревізії — найбільша revision серед локальних рядків (sql/sales_data_revision.sql).
+Синхронізація дочитує з Supabase лише рядки з id > high-water mark (нові файли декад)
+і рядки з id <= high-water mark, чия ревізія новіша за позначку (виправлені повторним
+завантаженням: upsert за відбитком зберігає їхні id); розділи зі зміненими рядками переписуються.
+Порції core.bulk_writer фіксуються кількома потоками не по порядку, тож обидві позначки читаються
+із запасом SYNC_LAG: рядки пізньої порції з меншими id і ревізіями теж дочитуються, а вже наявні
+локально з тією ж ревізією відкидаються. Після синхронізації кількість локальних рядків звіряється
+з точною кількістю в базі (id <= high-water mark); при розбіжності (пропущені чи видалені в базі рядки)
+регіон перебудовується. Тому завантаження дашборду здебільшого зводиться до локального читання.
+
+Командний рядок (з кореня репозиторію):
+    python -m core.local_store sync --region "Назва регіону"
+    python -m core.local_store rebuild --region "Назва регіону"
+    python -m core.local_store verify --region "Назва регіону"
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import threading
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from core import bulk_writer, sales_queries
+
+STORE_DIR = os.environ.get("SALES_STORE_DIR", ".sales_store")
+STATE_FILE = "_state.json"
+# Запас (в id і ревізіях) під порції, які паралельні потоки запису фіксують не по порядку
+SYNC_LAG = bulk_writer.WRITE_MAX_WORKERS * bulk_writer.BATCH_SIZE
+
+SALES_COLUMNS = sales_queries.SALES_COLUMNS
+_INTEGER_COLUMNS = ("id", "quantity", sales_queries.REVISION_COLUMN)
+STORE_SCHEMA = pa.schema([
+    (c, pa.int64() if c in _INTEGER_COLUMNS else pa.string()) for c in SALES_COLUMNS
+])
+# Всередині каталогу регіону файли розкладаються за year=/month=
+PARTITIONING = ds.partitioning(pa.schema([("year", pa.string()), ("month", pa.string())]), flavor="hive")
+
+_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def _region_dir(region_name: str) -> str:
+    return os.path.join(STORE_DIR, "sales_data", f"region={quote(region_name, safe='')}")
+
+
+def _load_state(region_name: str) -> dict:
+    path = os.path.join(_region_dir(region_name), STATE_FILE)
+    if not os.path.exists(path):
+        return {"region": region_name, "high_water_mark": None, "revision_mark": None, "row_count": 0}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_state(region_name: str, state: dict):
+    path = os.path.join(_region_dir(region_name), STATE_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _frame_to_table(df: pd.DataFrame) -> pa.Table:
+    """Приводить кадр з Supabase до фіксованої схеми сховища (id/quantity/revision — цілі, решта — текст)."""
+    df = df.reindex(columns=SALES_COLUMNS)
+    text_cols = [c for c in SALES_COLUMNS if c not in _INTEGER_COLUMNS]
+    df[text_cols] = df[text_cols].astype("string")
+    return pa.Table.from_pandas(df, schema=STORE_SCHEMA, preserve_index=False)
+
+
+def _table_to_frame(table: pa.Table, columns: list = SALES_COLUMNS) -> pd.DataFrame:
+    if table.num_rows == 0:
+        return pd.DataFrame()
+    df = table.to_pandas(ignore_metadata=True)
+    return df[columns].sort_values("id").reset_index(drop=True)
+
+
+def _fetch_changed(client, region_name: str, high_water_mark: int, revision_mark) -> pd.DataFrame:
+    """
+    Рядки регіону з id <= high_water_mark, змінені після позначки ревізії (revision_mark=None — усі:
+    сховище створене до появи ревізій). Таких рядків зазвичай мало, тож вони читаються одним потоком.
+    """
+    def make_query():
+        query = client.table("sales_data").select(sales_queries.SALES_SELECT_QUERY).eq("region", region_name)
+        return query if revision_mark is None else query.gt(sales_queries.REVISION_COLUMN, revision_mark)
+
+    table = sales_queries.fetch_table_keyset(make_query, up_to_id=high_water_mark)
+    if table.num_rows == 0:
+        return pd.DataFrame()
+    df = table.to_pandas()
+    df['quantity'] = df['quantity'].fillna(0).astype(int)
+    return df
+
+
+def _rewrite_partitions(region_dir: str, changed: pa.Table) -> int:
+    """
+    Замінює в сховищі рядки з id із changed на їхні нові версії. Переписуються лише розділи,
+    де ці рядки лежали або куди вони потрапляють тепер. Повертає кількість замінених старих рядків.
+    """
+    dataset = ds.dataset(region_dir, format="parquet", partitioning=PARTITIONING, schema=STORE_SCHEMA)
+    ids = changed.column("id")
+    previous = dataset.to_table(columns=["year", "month"], filter=ds.field("id").isin(ids))
+    partitions = set(zip(previous.column("year").to_pylist(), previous.column("month").to_pylist()))
+    partitions |= set(zip(changed.column("year").to_pylist(), changed.column("month").to_pylist()))
+    revision = pc.max(changed.column(sales_queries.REVISION_COLUMN)).as_py()
+
+    for year, month in sorted(partitions):
+        in_partition = (ds.field("year") == year) & (ds.field("month") == month)
+        kept = dataset.to_table(filter=in_partition & ~ds.field("id").isin(ids))
+        moved_in = changed.filter(pc.and_(pc.equal(changed.column("year"), year),
+                                          pc.equal(changed.column("month"), month)))
+        partition_dir = os.path.join(region_dir, f"year={year}", f"month={month}")
+        old_files = os.listdir(partition_dir) if os.path.isdir(partition_dir) else []
+        # Спершу пишемо новий файл розділу, потім видаляємо старі — розділ не буває порожнім
+        ds.write_dataset(
+            pa.concat_tables([kept, moved_in.select(kept.column_names)]).sort_by("id"), region_dir,
+            format="parquet", partitioning=PARTITIONING, basename_template=f"part-r{revision}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore"
+        )
+        for name in old_files:
+            if not name.startswith(f"part-r{revision}-"):
+                os.remove(os.path.join(partition_dir, name))
+    return previous.num_rows
+
+
+def _local_revisions(region_dir: str, ids: list) -> pd.Series:
+    """Ревізії локальних рядків з id з ids (індекс — id)."""
+    dataset = ds.dataset(region_dir, format="parquet", partitioning=PARTITIONING, schema=STORE_SCHEMA)
+    table = dataset.to_table(columns=["id", sales_queries.REVISION_COLUMN], filter=ds.field("id").isin(ids))
+    return pd.Series(table.column(sales_queries.REVISION_COLUMN).to_numpy(zero_copy_only=False),
+                     index=table.column("id").to_numpy(), dtype="float64")
+
+
+def _sync(client, region_name: str, max_workers: int) -> int:
+    state = _load_state(region_name)
+    region_dir = _region_dir(region_name)
+    high_water_mark = state["high_water_mark"]
+    revision_mark = state.get("revision_mark")
+    changed = new = pd.DataFrame()
+    if high_water_mark is not None:
+        # Змінені рядки читаються до нових: рядок, змінений між двома запитами, отримає ревізію,
+        # новішу за позначку, і буде дочитаний наступною синхронізацією
+        changed = _fetch_changed(client, region_name, high_water_mark,
+                                 revision_mark - SYNC_LAG if revision_mark is not None else None)
+    # Рядки з id у межах запасу нижче high-water mark — кандидати на пропущені, решта — нові
+    df = sales_queries.fetch_sales_frame(
+        client, region_name, "Всі", "Всі", [], max_workers=max_workers,
+        after_id=high_water_mark - SYNC_LAG if high_water_mark is not None else None
+    )
+    if not df.empty:
+        below = df["id"] <= high_water_mark if high_water_mark is not None else pd.Series(False, index=df.index)
+        new = df[~below]
+        if below.any():
+            changed = pd.concat([frame for frame in (changed, df[below]) if not frame.empty])
+    if not changed.empty:
+        changed = changed.drop_duplicates("id", keep="last")
+        # Рядки, що вже є локально з тією ж ревізією, не переписуються
+        local = changed["id"].map(_local_revisions(region_dir, changed["id"].tolist()))
+        changed = changed[local.isna() | (local != changed[sales_queries.REVISION_COLUMN])]
+    if new.empty and changed.empty:
+        return 0
+
+    revisions = [frame[sales_queries.REVISION_COLUMN].max() for frame in (new, changed) if not frame.empty]
+    if revision_mark is not None:
+        revisions.append(revision_mark)
+    if not changed.empty:
+        state["row_count"] += len(changed) - _rewrite_partitions(region_dir, _frame_to_table(changed))
+    if not new.empty:
+        high_water_mark = int(new["id"].max())
+        os.makedirs(region_dir, exist_ok=True)
+        ds.write_dataset(
+            _frame_to_table(new), region_dir, format="parquet", partitioning=PARTITIONING,
+            basename_template=f"part-{high_water_mark}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore"
+        )
+        state["row_count"] += len(new)
+    state["high_water_mark"] = high_water_mark
+    state["revision_mark"] = int(max(revisions))
+    _save_state(region_name, state)
+    return len(new) + len(changed)
+
+
+def _row_count_matches(client, region_name: str) -> bool:
+    """Чи збігається кількість локальних рядків з точною кількістю в базі (id <= high-water mark)."""
+    state = _load_state(region_name)
+    if state["high_water_mark"] is None:
+        return True
+    bounds = sales_queries.sales_id_bounds(client, region_name, "Всі", "Всі", [], up_to_id=state["high_water_mark"])
+    return state["row_count"] == (bounds[2] if bounds is not None else 0)
+
+
+def sync_region(client, region_name: str, max_workers: int = sales_queries.FETCH_MAX_WORKERS) -> int:
+    """
+    Дочитує з Supabase рядки регіону з id, більшим за локальний high-water mark, і рядки,
+    змінені після позначки ревізії (обидві — із запасом SYNC_LAG), та оновлює ними сховище.
+    Якщо після цього кількість рядків не збігається з базою, регіон перебудовується.
+    Повертає кількість нових і змінених рядків (після перебудови — усіх рядків регіону).
+    """
+    with _lock:
+        synced = _sync(client, region_name, max_workers)
+        if _row_count_matches(client, region_name):
+            return synced
+        logger.warning("Локальне сховище регіону %s розходиться з базою за кількістю рядків, перебудовуємо",
+                       region_name)
+        shutil.rmtree(_region_dir(region_name), ignore_errors=True)
+        return _sync(client, region_name, max_workers)
+
+
+def read_sales(region_name: str, territory: str, line: str, months: list, columns=None,
+               up_to_id=None) -> pd.DataFrame:
+    """
+    Читає дані регіону зі сховища з тими ж фільтрами, що й fetch_all_sales_data.
+    columns — лише ці колонки (id додається завжди), up_to_id — лише рядки з id <= up_to_id.
+    """
+    region_dir = _region_dir(region_name)
+    if not os.path.exists(region_dir):
+        return pd.DataFrame()
+
+    dataset = ds.dataset(region_dir, format="parquet", partitioning=PARTITIONING, schema=STORE_SCHEMA)
+    condition = ds.field("region") == region_name
+    if territory != "Всі":
+        condition = condition & (ds.field("territory") == territory)
+    if line != "Всі":
+        condition = condition & (ds.field("product_line") == line)
+    if months:
+        condition = condition & ds.field("month").isin(months)
+    if up_to_id is not None:
+        condition = condition & (ds.field("id") <= up_to_id)
+    columns = sales_queries.select_columns(columns)
+    return _table_to_frame(dataset.to_table(columns=columns, filter=condition), columns)
+
+
+def rebuild_region(client, region_name: str, max_workers: int = sales_queries.FETCH_MAX_WORKERS) -> int:
+    """Видаляє локальні дані регіону і завантажує їх заново."""
+    with _lock:
+        shutil.rmtree(_region_dir(region_name), ignore_errors=True)
+    return sync_region(client, region_name, max_workers=max_workers)
+
+
+def verify_region(client, region_name: str) -> bool:
+    """
+    Порівнює локальні дані регіону з повним повторним завантаженням із Supabase.
+    Розбіжність означає зміни, яких sync не помітив, — тоді потрібен rebuild.
+    """
+    local_df = read_sales(region_name, "Всі", "Всі", [])
+    remote_df = sales_queries.fetch_sales_frame(client, region_name, "Всі", "Всі", [])
+    remote_df = _table_to_frame(_frame_to_table(remote_df)) if not remote_df.empty else pd.DataFrame()
+    return local_df.equals(remote_df)
+
+
+def main():
+    from core.supabase_client import create_client_from_config
+
+    parser = argparse.ArgumentParser(description="Локальне сховище sales_data")
+    parser.add_argument("command", choices=["sync", "rebuild", "verify"])
+    parser.add_argument("--region", required=True, action="append", help="Назва регіону (можна кілька разів)")
+    args = parser.parse_args()
+
+    client = create_client_from_config()
+    failed = False
+    for region_name in args.region:
+        if args.command == "sync":
+            print(f"{region_name}: додано або оновлено {sync_region(client, region_name)} рядків")
+        elif args.command == "rebuild":
+            print(f"{region_name}: завантажено {rebuild_region(client, region_name)} рядків")
+        else:
+            ok = verify_region(client, region_name)
+            failed = failed or not ok
+            print(f"{region_name}: {'збігається з базою' if ok else 'РОЗБІЖНІСТЬ, виконайте rebuild'}")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
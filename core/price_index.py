@@ -0,0 +1,63 @@
+"""
+Індекс цін регіону: щільний масив продукт × місяць для обчислення доходу без merge.
+
+Ціни таблиці 'price' задаються на місяць (1–12). Місяць без ціни отримує останню відому
+ціну попереднього місяця (as-of), тому продукт, для якого ціну ще не оновили, не випадає
+з розрахунку доходу. До першої відомої ціни продукту ціна — NaN.
+"""
+import numpy as np
+import pandas as pd
+
+MONTHS = range(1, 13)
+
+
+class PriceIndex:
+    """prices[код продукту, місяць] — ціна з as-of заповненням; стовпець 0 не використовується."""
+
+    def __init__(self, products: pd.Index, prices: np.ndarray):
+        self.products = products
+        self.prices = prices
+
+    @classmethod
+    def from_frame(cls, price_df: pd.DataFrame) -> "PriceIndex":
+        """Будує індекс з кадру product_name/month/price (як повертає data_access.load_price_data)."""
+        if price_df.empty:
+            return cls(pd.Index([], dtype=object), np.full((0, 13), np.nan))
+        months = pd.to_numeric(price_df['month'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        valid = np.isin(months, MONTHS)
+        codes, products = pd.factorize(price_df['product_name'].to_numpy()[valid])
+        prices = np.full((len(products), 13), np.nan)
+        # Дублікати (продукт, місяць) — перемагає останній рядок, як у drop_duplicates(keep='last')
+        prices[codes, months[valid].astype(np.intp)] = pd.to_numeric(
+            price_df['price'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)[valid]
+        prices[:, 1:] = pd.DataFrame(prices[:, 1:]).ffill(axis=1).to_numpy()
+        return cls(pd.Index(products), prices)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.products) == 0
+
+    def product_codes(self, product_names) -> np.ndarray:
+        """Коди продуктів у індексі (-1 — продукту немає); для категорій шукаються лише категорії."""
+        names = pd.Series(product_names)
+        if isinstance(names.dtype, pd.CategoricalDtype):
+            category_codes = self.products.get_indexer(names.cat.categories)
+            return np.append(category_codes, -1)[names.cat.codes.to_numpy()]
+        return self.products.get_indexer(names)
+
+    def lookup(self, product_names, months) -> np.ndarray:
+        """Ціни для пар (продукт, місяць); NaN, якщо продукту немає або ціна ще невідома."""
+        codes = self.product_codes(product_names)
+        month_values = pd.to_numeric(pd.Series(months), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        valid = (codes >= 0) & np.isin(month_values, MONTHS)
+        result = np.full(len(codes), np.nan)
+        result[valid] = self.prices[codes[valid], month_values[valid].astype(np.intp)]
+        return result
+
+    def add_revenue(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Копія кадру (copy-on-write) з колонками price і revenue = quantity × price."""
+        df = df.copy(deep=False)
+        df['price'] = self.lookup(df['product_name'], df['month'])
+        df['revenue'] = pd.to_numeric(df['quantity'], errors='coerce').to_numpy(dtype=float, na_value=np.nan) * \
+            df['price'].to_numpy()
+        return df
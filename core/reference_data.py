@@ -0,0 +1,122 @@
+"""
+Кеш довідників для завантаження файлів: "золоті" адреси регіону та довідник клієнтів.
+
+Таблиці читаються повністю (keyset-пагінація за id), а готові структури для пошуку
+(таблиця адрес з нормалізованим ключем, індекс n-грам, client_map) зберігаються
+в пам'яті процесу та на диску. Перед використанням кешу робиться один легкий запит
+версії — (кількість рядків, найбільший id); якщо версія не змінилась, таблиця
+повторно не читається. Процеси пулу (core/batch_etl.py) будують відсутній запис під спільним
+блокуванням (use_process_lock): перший процес читає таблицю, решта беруть готовий файл з диска.
+"""
+import contextlib
+import os
+import pickle
+import threading
+
+from core.address_matching import GoldenAddressIndex, build_golden_frame
+from core.sales_queries import fetch_rows_keyset
+
+CACHE_DIR = os.environ.get("REFERENCE_CACHE_DIR", ".reference_cache")
+
+GOLDEN_TABLE = "golden_addres"
+CLIENT_TABLE = "client"
+CLIENT_SELECT_QUERY = "id,client,new_client"
+
+_memory_cache = {}
+_lock = threading.Lock()
+# Блокування між процесами (multiprocessing.Lock), під яким будуються відсутні записи
+_process_lock = None
+
+
+def _cache_path(key: tuple) -> str:
+    return os.path.join(CACHE_DIR, "-".join(str(part) for part in key) + ".pkl")
+
+
+def _table_query(client, table_name: str, select_query: str, region_id=None, count=None):
+    query = client.table(table_name).select(select_query, count=count)
+    if region_id is not None:
+        query = query.eq("region_id", region_id)
+    return query
+
+
+def table_version(client, table_name: str, region_id=None) -> tuple:
+    """
+    Версія таблиці (чи її частини для регіону): (кількість рядків, найбільший id).
+    Змінюється при додаванні та видаленні рядків.
+    """
+    response = _table_query(client, table_name, "id", region_id, count="exact").order("id", desc=True).limit(1).execute()
+    max_id = response.data[0]["id"] if response.data else None
+    return response.count, max_id
+
+
+def use_process_lock(lock):
+    """Задає блокування між процесами для побудови записів кешу (викликається в ініціалізаторі процесу пулу)."""
+    global _process_lock
+    _process_lock = lock
+
+
+def _read_entry(key: tuple):
+    try:
+        with open(_cache_path(key), "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+
+def _write_entry(key: tuple, entry: dict):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Унікальне тимчасове ім'я: процеси й потоки не пишуть в один файл, os.replace публікує лише повний запис
+    tmp_path = f"{_cache_path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(entry, f)
+    os.replace(tmp_path, _cache_path(key))
+
+
+def _get_cached(key: tuple, version: tuple, build):
+    """Повертає збережений результат для key, якщо його версія збігається, інакше будує й зберігає новий."""
+    with _lock:
+        entry = _memory_cache.get(key)
+    if entry is None or entry["version"] != version:
+        entry = _read_entry(key)
+    if entry is None or entry["version"] != version:
+        with _process_lock if _process_lock is not None else contextlib.nullcontext():
+            # Поки чекали на блокування, запис міг побудувати інший процес
+            entry = _read_entry(key)
+            if entry is None or entry["version"] != version:
+                entry = {"version": version, "data": build()}
+                _write_entry(key, entry)
+    with _lock:
+        _memory_cache[key] = entry
+    return entry["data"]
+
+
+def get_golden_reference(client, region_id) -> dict:
+    """
+    "Золоті" адреси регіону: {'golden_df': таблиця з індексом за нормалізованою адресою,
+    'golden_index': GoldenAddressIndex для нечітких підказок}.
+    """
+    def build():
+        rows = fetch_rows_keyset(lambda: _table_query(client, GOLDEN_TABLE, "*", region_id))
+        golden_df = build_golden_frame(rows)
+        return {"golden_df": golden_df, "golden_index": GoldenAddressIndex(golden_df["address"])}
+
+    return _get_cached((GOLDEN_TABLE, region_id), table_version(client, GOLDEN_TABLE, region_id), build)
+
+
+def get_client_map(client) -> dict:
+    """Довідник клієнтів {назва клієнта з файлу: new_client} з усіх рядків таблиці client."""
+    def build():
+        rows = fetch_rows_keyset(lambda: _table_query(client, CLIENT_TABLE, CLIENT_SELECT_QUERY))
+        return {str(row.get("client")).strip(): row.get("new_client") for row in rows}
+
+    return _get_cached((CLIENT_TABLE,), table_version(client, CLIENT_TABLE), build)
+
+
+def clear_cache():
+    """Очищує кеш у пам'яті та на диску (наприклад, після ручного редагування довідників)."""
+    with _lock:
+        _memory_cache.clear()
+    if os.path.isdir(CACHE_DIR):
+        for name in os.listdir(CACHE_DIR):
+            if name.endswith(".pkl"):
+                os.remove(os.path.join(CACHE_DIR, name))
@@ -0,0 +1,309 @@
+"""
+Зведені таблиці продажів (sales_rollup), що підтримуються під час завантаження файлів.
+
+Ключ зведення: регіон, територія, лінійка, продукт, місто, рік, місяць, декада. Значення:
+    quantity        — кумулятивна кількість на кінець декади (сума сирих рядків sales_data);
+    actual_quantity — фактичні продажі за декаду: сума додатних приростів рядів
+                      (дистриб'ютор, продукт, адреса, рік, місяць, клієнт) відносно попередньої декади,
+                      як у вкладці "Деталізація по адресах".
+Після запису файлу перераховуються лише зачеплені розділи (регіон, рік, місяць) — з усіх сирих рядків
+цього місяця, тож пізній чи повторний файл декади не псує приростів сусідніх декад. Розділ замінюється
+однією транзакцією (функція sales_rollup_replace_partition), яка також позначає його покриття
+(sales_rollup_coverage); load_rollup повертає зведення лише тоді, коли покрито кожен розділ (рік, місяць)
+запитаного діапазону, для якого є сирі рядки. Обсяг вибірки зведення визначається кількістю ключів,
+а не кількістю сирих рядків. Сторінка аналізу читає зведення, коли не обрано вулицю (огляд і загальна
+таблиця фактичних продажів); інакше, або якщо зведення неповні, показники рахуються із сирих рядків.
+Таблиці і функція — sql/sales_rollup.sql.
+
+Командний рядок (з кореня репозиторію):
+    python -m core.rollups rebuild --region "Назва регіону"
+    python -m core.rollups verify --region "Назва регіону"
+"""
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+
+import pandas as pd
+import pyarrow as pa
+
+from core import bulk_writer, sales_queries
+from core.data_processing import ACTUAL_SALES_SORT_KEYS, create_full_address
+from core.schema import CLEANED_TEXT_COLUMNS
+
+ROLLUP_TABLE = "sales_rollup"
+COVERAGE_TABLE = "sales_rollup_coverage"
+REPLACE_FUNCTION = "sales_rollup_replace_partition"
+ROLLUP_KEY_COLUMNS = ['region', 'territory', 'product_line', 'product_name', 'city', 'year', 'month', 'decade']
+ROLLUP_VALUE_COLUMNS = ['quantity', 'actual_quantity']
+ROLLUP_COLUMNS = ROLLUP_KEY_COLUMNS + ROLLUP_VALUE_COLUMNS
+# Колонки sales_data, з яких будується зведення
+SOURCE_COLUMNS = ['region', 'territory', 'product_line', 'product_name', 'city', 'street', 'house_number',
+                  'distributor', 'new_client', 'year', 'month', 'decade', 'quantity']
+# Ряд фактичних продажів (ключі compute_actual_sales без декади) разом з атрибутами ключа зведення;
+# у даних територія визначається адресою, а лінійка — продуктом, тож ряди не дробляться
+_SERIES_KEYS = ACTUAL_SALES_SORT_KEYS[:-1] + ['region', 'territory', 'product_line', 'city']
+# Рік, місяць і декада в таблиці — текст, як у sales_data (фільтри ті самі)
+_PERIOD_COLUMNS = ['year', 'month', 'decade']
+ROLLUP_CSV_TYPES = {
+    c: pa.int64() if c in ['id'] + ROLLUP_VALUE_COLUMNS else pa.string() for c in ['id'] + ROLLUP_COLUMNS
+}
+
+logger = logging.getLogger(__name__)
+
+
+def build_rollup(raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Зведення з сирих рядків sales_data (будь-яка підмножина регіонів і місяців).
+    Текстові поля очищуються так само, як у компактній схемі; рядки без року, місяця
+    чи декади не враховуються. Рік, місяць і декада в результаті — цілі числа.
+    """
+    if raw.empty:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+
+    df = raw.reindex(columns=SOURCE_COLUMNS)
+    for col in SOURCE_COLUMNS:
+        if col in CLEANED_TEXT_COLUMNS:
+            df[col] = df[col].astype(object).fillna('').astype(str).str.strip()
+        elif col in ('region', 'territory', 'product_line'):
+            df[col] = df[col].astype(object).fillna('').astype(str)
+    for col in _PERIOD_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df = df.dropna(subset=_PERIOD_COLUMNS).astype({col: 'int64' for col in _PERIOD_COLUMNS})
+    df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce').fillna(0).astype('int64')
+
+    cumulative = df.groupby(ROLLUP_KEY_COLUMNS)['quantity'].sum()
+
+    # Приріст ряду між сусідніми декадами; рядки без адреси, як і в compute_actual_sales, не враховуються
+    df = create_full_address(df)
+    per_decade = df[df['full_address'] != ''].groupby(_SERIES_KEYS + ['decade'])['quantity'].sum()
+    delta = per_decade - per_decade.groupby(level=_SERIES_KEYS).shift(1).fillna(0)
+    actual = delta[delta > 0].groupby(level=ROLLUP_KEY_COLUMNS).sum().rename('actual_quantity')
+
+    rollup = cumulative.to_frame().join(actual, how='left')
+    rollup['actual_quantity'] = rollup['actual_quantity'].fillna(0).astype('int64')
+    return rollup.reset_index()[ROLLUP_COLUMNS]
+
+
+def latest_decade_rows(rollup: pd.DataFrame) -> pd.DataFrame:
+    """Рядки останньої декади кожного місяця (рядки вкладки "Загальний огляд")."""
+    if rollup.empty:
+        return rollup
+    return rollup[rollup['decade'] == rollup.groupby(['year', 'month'])['decade'].transform('max')]
+
+
+def period_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Сумарна кількість по (рік, місяць, декада) — для зведення або сирих рядків з числовими year/month/decade.
+    Однакові суми означають, що зведення і набір рядків — той самий знімок даних.
+    """
+    totals = df.groupby(_PERIOD_COLUMNS)['quantity'].sum().reset_index()
+    return totals.astype({col: 'int64' for col in totals.columns}).sort_values(_PERIOD_COLUMNS, ignore_index=True)
+
+
+def upload_partitions(sales_rows: pd.DataFrame) -> list:
+    """Розділи (регіон, рік, місяць), яких торкаються рядки завантаження."""
+    periods = sales_rows[['region', 'year', 'month']].dropna().drop_duplicates()
+    return sorted((str(region), int(year), int(month)) for region, year, month in periods.itertuples(index=False))
+
+
+def _table_rows(rollup: pd.DataFrame) -> pd.DataFrame:
+    # Рік, місяць і декада — у текстовому форматі sales_data ('2025', '05', '10')
+    rows = rollup[ROLLUP_COLUMNS].copy()
+    rows['year'] = rows['year'].astype(str)
+    rows['month'] = rows['month'].map('{:02d}'.format)
+    rows['decade'] = rows['decade'].astype(str)
+    return rows
+
+
+def _from_table(table: pa.Table) -> pd.DataFrame:
+    df = table.to_pandas()[ROLLUP_COLUMNS]
+    for col in ROLLUP_KEY_COLUMNS:
+        if col in _PERIOD_COLUMNS:
+            df[col] = pd.to_numeric(df[col]).astype('int64')
+        else:
+            # NULL і порожній рядок у CSV не розрізняються — у зведенні це завжди ''
+            df[col] = df[col].fillna('').astype(str)
+    return df
+
+
+def covered_partitions(client, region_name: str) -> set:
+    """Розділи (рік, місяць) регіону, зведення яких повністю перераховано."""
+    response = client.table(COVERAGE_TABLE).select("year,month").eq("region", region_name).execute()
+    return {(int(row["year"]), int(row["month"])) for row in response.data or []}
+
+
+def _source_years(client, region_name: str, months: list) -> list:
+    """Роки від найменшого до найбільшого, за які в sales_data регіону є рядки запитаних місяців."""
+    def make_probe():
+        query = client.table("sales_data").select("year")
+        return sales_queries.apply_sales_filters(query, region_name, "Всі", "Всі", months)
+
+    first = make_probe().order("year").limit(1).execute()
+    if not first.data:
+        return []
+    last = make_probe().order("year", desc=True).limit(1).execute()
+    return list(range(int(first.data[0]["year"]), int(last.data[0]["year"]) + 1))
+
+
+def _has_rows(client, region_name: str, year: int, month: int) -> bool:
+    response = (client.table("sales_data").select("id").eq("region", region_name)
+                .eq("year", str(year)).eq("month", f"{month:02d}").limit(1).execute())
+    return bool(response.data)
+
+
+def missing_partitions(client, region_name: str, months: list, covered: set = None,
+                       max_workers: int = sales_queries.FETCH_MAX_WORKERS) -> list:
+    """
+    Розділи (рік, місяць) запитаного діапазону (months; порожній — усі місяці), для яких у sales_data
+    є рядки, але немає покриття. Існування рядків перевіряється лише для непокритих розділів,
+    паралельно (до max_workers запитів).
+    """
+    covered = covered_partitions(client, region_name) if covered is None else covered
+    wanted = sorted({int(month) for month in months}) or list(range(1, 13))
+    years = _source_years(client, region_name, list(months))
+    candidates = [(year, month) for year in years for month in wanted if (year, month) not in covered]
+    if not candidates:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(candidates))) as pool:
+        found = list(pool.map(lambda p: _has_rows(client, region_name, *p), candidates))
+    return [partition for partition, has_rows in zip(candidates, found) if has_rows]
+
+
+def load_rollup(client, region_name: str, territory: str, line: str, months: list,
+                page_size: int = sales_queries.PAGE_SIZE) -> pd.DataFrame | None:
+    """
+    Зведення з таблиці sales_rollup з тими ж фільтрами, що й вибірка sales_data.
+    None — якщо регіон не має покриття або хоч один розділ (рік, місяць) запитаного діапазону
+    з сирими рядками не покритий (див. missing_partitions); тоді показники треба рахувати із сирих рядків.
+    Рядки непокритих розділів без сирих рядків (залишки видалених даних) відкидаються.
+    """
+    covered = covered_partitions(client, region_name)
+    if not covered or missing_partitions(client, region_name, months, covered):
+        return None
+
+    def make_query():
+        query = client.table(ROLLUP_TABLE).select(",".join(ROLLUP_CSV_TYPES))
+        return sales_queries.apply_sales_filters(query, region_name, territory, line, months)
+
+    rollup = _from_table(sales_queries.fetch_table_keyset(make_query, page_size, column_types=ROLLUP_CSV_TYPES))
+    partition = pd.Series(list(zip(rollup['year'], rollup['month'])), index=rollup.index, dtype=object)
+    return rollup[partition.isin(covered)].reset_index(drop=True)
+
+
+def _delete(client, region_name: str):
+    # Спершу покриття, щоб під час видалення читачі вже не довіряли рядкам регіону
+    client.table(COVERAGE_TABLE).delete().eq("region", region_name).execute()
+    client.table(ROLLUP_TABLE).delete().eq("region", region_name).execute()
+
+
+def _uncover(client, region_name: str, year: int, month: int):
+    """Знімає позначку покриття з розділу, зведення якого не вдалося замінити."""
+    try:
+        (client.table(COVERAGE_TABLE).delete().eq("region", region_name)
+         .eq("year", str(year)).eq("month", f"{month:02d}").execute())
+    except Exception:
+        logger.warning("Не вдалося зняти покриття розділу %s %d-%02d", region_name, year, month, exc_info=True)
+
+
+def _replace_partition(client, region_name: str, year: int, month: int, rollup: pd.DataFrame,
+                       max_retries: int = bulk_writer.MAX_RETRIES,
+                       backoff: float = bulk_writer.BACKOFF_SECONDS) -> Exception | None:
+    """
+    Замінює розділ (регіон, рік, місяць) рядками rollup одним викликом sales_rollup_replace_partition
+    (upsert, видалення застарілих ключів і позначка покриття в одній транзакції). Виклик ідемпотентний,
+    тож повторюється з паузою, як запис порцій у bulk_writer. Повертає помилку останньої спроби або None.
+    """
+    params = {"p_region": region_name, "p_year": str(year), "p_month": f"{month:02d}",
+              "p_rows": _table_rows(rollup).to_dict(orient='records')}
+    for attempt in range(max_retries + 1):
+        try:
+            client.rpc(REPLACE_FUNCTION, params).execute()
+            return None
+        except Exception as e:
+            if attempt == max_retries:
+                return e
+            time.sleep(backoff * 2 ** attempt)
+
+
+def refresh_partitions(client, partitions: list, max_workers: int = sales_queries.FETCH_MAX_WORKERS) -> dict:
+    """
+    Перераховує зведення для розділів (регіон, рік, місяць) із сирих рядків sales_data
+    і замінює ними відповідні рядки sales_rollup. Викликається після запису файлу.
+    Розділ, який не вдалося замінити, лишається зі старими рядками, але без покриття.
+    Повертає {"partitions", "rows_written", "rows_failed"}.
+    """
+    summary = {"partitions": 0, "rows_written": 0, "rows_failed": 0}
+    for region_name, periods in groupby(sorted(partitions), key=lambda p: p[0]):
+        periods = [(year, month) for _, year, month in periods]
+        months = sorted({f"{month:02d}" for _, month in periods})
+        raw = sales_queries.fetch_sales_frame(client, region_name, "Всі", "Всі", months, max_workers=max_workers,
+                                              columns=SOURCE_COLUMNS)
+        rollup = build_rollup(raw)
+        for year, month in periods:
+            part = rollup[(rollup['year'] == year) & (rollup['month'] == month)]
+            error = _replace_partition(client, region_name, year, month, part)
+            summary["partitions"] += 1
+            if error is None:
+                summary["rows_written"] += len(part)
+            else:
+                logger.warning("Зведення розділу %s %d-%02d не оновлено: %s", region_name, year, month, error)
+                _uncover(client, region_name, year, month)
+                # Розділ без рядків (усі ключі зникли) теж рахується як незаписаний
+                summary["rows_failed"] += max(len(part), 1)
+    return summary
+
+
+def rebuild_region(client, region_name: str, max_workers: int = sales_queries.FETCH_MAX_WORKERS) -> int:
+    """Видаляє зведення регіону і будує їх заново з усіх сирих рядків. Повертає кількість рядків зведення."""
+    raw = sales_queries.fetch_sales_frame(client, region_name, "Всі", "Всі", [], max_workers=max_workers,
+                                          columns=SOURCE_COLUMNS)
+    rollup = build_rollup(raw)
+    _delete(client, region_name)
+    rows_written = 0
+    for (year, month), part in rollup.groupby(['year', 'month']):
+        error = _replace_partition(client, region_name, year, month, part)
+        if error is not None:
+            raise RuntimeError(f"не записано зведення розділу {year}-{month:02d}: {error}")
+        rows_written += len(part)
+    return rows_written
+
+
+def verify_region(client, region_name: str, max_workers: int = sales_queries.FETCH_MAX_WORKERS) -> bool:
+    """
+    Порівнює збережені зведення регіону з побудованими заново із сирих рядків sales_data.
+    Непокриті розділи вважаються відсутніми, тож теж дають розбіжність.
+    """
+    raw = sales_queries.fetch_sales_frame(client, region_name, "Всі", "Всі", [], max_workers=max_workers,
+                                          columns=SOURCE_COLUMNS)
+    expected = build_rollup(raw).sort_values(ROLLUP_KEY_COLUMNS, ignore_index=True)
+    stored = load_rollup(client, region_name, "Всі", "Всі", [])
+    if stored is None:
+        return expected.empty
+    stored = stored.sort_values(ROLLUP_KEY_COLUMNS, ignore_index=True)
+    return expected.astype(str).equals(stored.astype(str))
+
+
+def main():
+    from core.supabase_client import create_client_from_config
+
+    parser = argparse.ArgumentParser(description="Зведені таблиці продажів (sales_rollup)")
+    parser.add_argument("command", choices=["rebuild", "verify"])
+    parser.add_argument("--region", required=True, action="append", help="Назва регіону (можна кілька разів)")
+    args = parser.parse_args()
+
+    client = create_client_from_config()
+    failed = False
+    for region_name in args.region:
+        if args.command == "rebuild":
+            print(f"{region_name}: записано {rebuild_region(client, region_name)} рядків зведення")
+        else:
+            ok = verify_region(client, region_name)
+            failed = failed or not ok
+            print(f"{region_name}: {'збігається з sales_data' if ok else 'РОЗБІЖНІСТЬ, виконайте rebuild'}")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
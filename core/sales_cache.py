@@ -0,0 +1,163 @@
+"""
+Кеш запитів до sales_data, що враховує вкладеність фільтрів.
+
+Запит (регіон, територія, лінійка, місяці) покривається збереженим кадром того самого регіону
+з ширшими фільтрами ("Всі" території/лінійки, усі місяці або їх надмножина) — тоді відповідь
+береться фільтрацією в пам'яті, без мережевого запиту. Загальний обсяг кешу обмежений,
+найдавніше використані записи витісняються (LRU).
+
+Кадри можуть містити не всі колонки sales_data (проєкція під потреби сторінки): запис підходить
+лише тоді, коли в ньому є всі запитані колонки. Колонки FILTER_COLUMNS потрібні для фільтрації
+в пам'яті, тому завантажувач має включати їх у кожну проєкцію.
+
+Записи прив'язані до версії даних регіону (sync_version, напр. sales_queries.sales_data_version):
+поки версія та сама, вужчі запити обслуговуються з пам'яті; нова версія скидає записи регіону.
+
+Повернуті кадри спільні для всіх викликачів — їх не можна змінювати на місці.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from core.schema import frame_memory_mb
+
+ALL = "Всі"
+
+# Колонки, за якими ширший кадр фільтрується до вужчого запиту
+FILTER_COLUMNS = ['territory', 'product_line', 'month']
+
+# Типовий ліміт пам'яті кешу та час життя запису
+SALES_CACHE_MAX_MB = 1024
+SALES_CACHE_TTL = 3600
+
+
+def _months_key(months) -> tuple:
+    return tuple(sorted(f"{int(m):02d}" for m in months or []))
+
+
+def covers(cached: tuple, requested: tuple) -> bool:
+    """Чи містить кадр з фільтрами cached усі рядки запиту requested (обидва — (регіон, територія, лінійка, місяці))."""
+    region, territory, line, months = cached
+    req_region, req_territory, req_line, req_months = requested
+    if region != req_region:
+        return False
+    if territory != ALL and territory != req_territory:
+        return False
+    if line != ALL and line != req_line:
+        return False
+    if months and (not req_months or not set(req_months) <= set(months)):
+        return False
+    return True
+
+
+def has_columns(df: pd.DataFrame, columns) -> bool:
+    """Чи є в кадрі всі колонки columns (None — без вимог)."""
+    return columns is None or set(columns) <= set(df.columns)
+
+
+def filter_sales_frame(df: pd.DataFrame, territory: str, line: str, months) -> pd.DataFrame:
+    """Відбирає з ширшого кадру рядки запиту (ті самі умови, що й apply_sales_filters)."""
+    mask = pd.Series(True, index=df.index)
+    if territory != ALL:
+        mask &= df['territory'] == territory
+    if line != ALL:
+        mask &= df['product_line'] == line
+    if months:
+        mask &= pd.to_numeric(df['month'], errors='coerce').isin([int(m) for m in months])
+    return df[mask].reset_index(drop=True)
+
+
+class SalesQueryCache:
+    """LRU-кеш кадрів продажів з обмеженням загального обсягу пам'яті (max_mb) і часом життя (ttl, с)."""
+
+    def __init__(self, max_mb: float = SALES_CACHE_MAX_MB, ttl: float = SALES_CACHE_TTL):
+        self.max_mb = max_mb
+        self.ttl = ttl
+        self._entries = OrderedDict()  # ключ -> (кадр, МБ, час запису)
+        self._versions = {}  # регіон -> версія даних, з якої завантажено його записи
+        self._lock = threading.Lock()
+        self.hits = self.subset_hits = self.misses = 0
+
+    @staticmethod
+    def make_key(region_name: str, territory: str, line: str, months) -> tuple:
+        return region_name, territory, line, _months_key(months)
+
+    @property
+    def total_mb(self) -> float:
+        return sum(size for _, size, _ in self._entries.values())
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.monotonic() - stored_at > self.ttl
+
+    def lookup(self, region_name: str, territory: str, line: str, months, columns=None):
+        """
+        Повертає кадр для запиту (точний або відфільтрований з ширшого) чи None.
+        columns — колонки, які мають бути в кадрі (None — без вимог).
+        """
+        key = self.make_key(region_name, territory, line, months)
+        with self._lock:
+            for cached_key in list(self._entries):
+                df, _, stored_at = self._entries[cached_key]
+                if self._expired(stored_at):
+                    del self._entries[cached_key]
+                    continue
+                if (cached_key == key or covers(cached_key, key)) and has_columns(df, columns):
+                    self._entries.move_to_end(cached_key)
+                    break
+            else:
+                self.misses += 1
+                return None
+        if cached_key == key:
+            self.hits += 1
+            return df
+        self.subset_hits += 1
+        return filter_sales_frame(df, territory, line, months)
+
+    def store(self, region_name: str, territory: str, line: str, months, df: pd.DataFrame):
+        """Зберігає кадр; записи, які він покриває (за рядками й колонками), стають зайвими і видаляються."""
+        key = self.make_key(region_name, territory, line, months)
+        size = frame_memory_mb(df)
+        with self._lock:
+            for cached_key in [k for k in self._entries
+                               if k != key and covers(key, k) and has_columns(df, self._entries[k][0].columns)]:
+                del self._entries[cached_key]
+            self._entries[key] = (df, size, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > 1 and self.total_mb > self.max_mb:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, region_name: str, territory: str, line: str, months, load, columns=None) -> pd.DataFrame:
+        """Відповідає з кешу, якщо можливо, інакше викликає load() і зберігає результат."""
+        df = self.lookup(region_name, territory, line, months, columns)
+        if df is None:
+            df = load()
+            if not df.empty:
+                self.store(region_name, territory, line, months, df)
+        return df
+
+    def sync_version(self, region_name: str, data_version) -> bool:
+        """
+        Прив'язує записи регіону до версії даних data_version. Якщо версія відрізняється від тієї,
+        з якої їх завантажено, записи регіону видаляються. Повертає True, якщо записи скинуто.
+        """
+        with self._lock:
+            if region_name in self._versions and self._versions[region_name] == data_version:
+                return False
+            self._versions[region_name] = data_version
+            stale = [k for k in self._entries if k[0] == region_name]
+            for cached_key in stale:
+                del self._entries[cached_key]
+            return bool(stale)
+
+    def invalidate(self, region_name: str):
+        """Видаляє всі записи регіону (наприклад, перед примусовим перезавантаженням)."""
+        with self._lock:
+            for cached_key in [k for k in self._entries if k[0] == region_name]:
+                del self._entries[cached_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
@@ -0,0 +1,239 @@
+"""
+Куб продажів сторінки аналізу: будується один раз на набір даних, після чого кожна взаємодія
+з фільтрами — зріз і сума по цілочисельних кодах у NumPy замість groupby/pivot_table по рядках.
+
+Виміри: продукт × місто × вулиця × рік-місяць × декада.
+    by_city — щільний масив місто × продукт × період × декада (кількість і наявність рядків):
+              без фільтра і з фільтром лише за містами зріз — це вибір рядків масиву;
+    cells   — розріджені непорожні клітинки з вулицею (коди вимірів, кількість, число рядків),
+              впорядковані за вулицею: з фільтром за вулицями сумуються лише діапазони обраних вулиць.
+Дохід у кубі не зберігається: ціна залежить лише від продукту й місяця, тож він рахується
+на агрегаті продукт × період через PriceIndex у момент запиту.
+Пари (клієнт, адреса) для KPI "Унікальні клієнти" зберігаються окремо, з кодами міста й вулиці.
+Рядки огляду — остання декада кожного місяця (як groupby(['year', 'month'])['decade'].transform('max')).
+"""
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from core.aggregation import OverviewAggregates
+from core.price_index import PriceIndex
+
+DIMENSIONS = ['city', 'product_name', 'period', 'decade']
+
+
+def _factorize(values, valid: np.ndarray = None) -> tuple:
+    """Коди (int64) і відсортовані мітки; пропуск стає окремою міткою. valid — лише ці рядки."""
+    codes, labels = pd.factorize(values, sort=True, use_na_sentinel=False)
+    codes = codes.astype(np.int64)
+    return (codes if valid is None else codes[valid]), np.asarray(labels, dtype=object)
+
+
+def _flat(codes: dict, dims: list, sizes: list) -> np.ndarray:
+    """Один код на комбінацію вимірів (змішана система числення за розмірами вимірів)."""
+    flat = np.zeros(len(codes[dims[0]]), dtype=np.int64)
+    for dim, size in zip(dims, sizes):
+        flat = flat * size + codes[dim]
+    return flat
+
+
+class SalesCube:
+    """Куб продажів; будується SalesCube.from_frame і далі не змінюється."""
+
+    def __init__(self, labels: dict, by_city: np.ndarray, present: np.ndarray, cells: dict, pairs: dict,
+                 latest_decade: np.ndarray, row_latest: np.ndarray):
+        self.labels = labels                # вимір -> мітки кодів (period — year * 100 + month)
+        self.by_city = by_city              # кількість: місто × продукт × період × декада
+        self.present = present              # чи є рядки в клітинці by_city
+        self.cells = cells                  # city, street, product_name, period, decade, quantity, rows
+        self.pairs = pairs                  # city, street, latest — по позиції на пару (клієнт, адреса)
+        self.latest_decade = latest_decade  # код останньої декади кожного періоду
+        self.row_latest = row_latest        # рядки вхідного кадру, що належать останній декаді свого місяця
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "SalesCube":
+        """
+        Будує куб з кадру сторінки (data_processing.prepare_sales_frame: числові year/month/decade).
+        Рядки без року, місяця чи декади до куба не потрапляють. Без колонок new_client/full_address
+        пари не будуються (unique_clients тоді 0).
+        """
+        year = pd.to_numeric(df['year'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        month = pd.to_numeric(df['month'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        decade = pd.to_numeric(df['decade'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        valid = ~(np.isnan(year) | np.isnan(month) | np.isnan(decade))
+
+        codes, labels = {}, {}
+        for dim in ('product_name', 'city', 'street'):
+            codes[dim], labels[dim] = _factorize(df[dim], valid)
+        codes['period'], periods = _factorize((year[valid] * 100 + month[valid]).astype(np.int64))
+        codes['decade'], decades = _factorize(decade[valid].astype(np.int64))
+        labels['period'], labels['decade'] = periods.astype(np.int64), decades.astype(np.int64)
+        quantity = pd.to_numeric(df['quantity'], errors='coerce').to_numpy(dtype=float, na_value=0)[valid]
+
+        # Остання декада кожного місяця: найбільший код декади серед рядків періоду
+        latest_decade = pd.Series(codes['decade']).groupby(codes['period']).max().reindex(
+            range(len(periods)), fill_value=0).to_numpy(dtype=np.int64)
+        row_latest = np.zeros(len(df), dtype=bool)
+        row_latest[valid] = codes['decade'] == latest_decade[codes['period']]
+
+        shape = [len(labels[dim]) for dim in DIMENSIONS]
+        flat = _flat(codes, DIMENSIONS, shape)
+        size = int(np.prod(shape))
+        by_city = np.bincount(flat, weights=quantity, minlength=size).round().astype(np.int64).reshape(shape)
+        present = (np.bincount(flat, minlength=size) > 0).reshape(shape)
+
+        # Клітинки з вулицею: унікальні комбінації (вулиця, місто, продукт, період, декада)
+        street_dims = ['street'] + DIMENSIONS
+        street_sizes = [len(labels['street'])] + shape
+        keys, inverse = np.unique(_flat(codes, street_dims, street_sizes), return_inverse=True)
+        cells = {
+            'quantity': np.bincount(inverse, weights=quantity, minlength=len(keys)).round().astype(np.int64),
+            'rows': np.bincount(inverse, minlength=len(keys)),
+        }
+        for dim, dim_size in reversed(list(zip(street_dims, street_sizes))):
+            keys, cells[dim] = np.divmod(keys, dim_size)
+
+        pairs = {'city': np.zeros(0, dtype=np.int64), 'street': np.zeros(0, dtype=np.int64),
+                 'latest': np.zeros(0, dtype=bool)}
+        if {'new_client', 'full_address'} <= set(df.columns):
+            client_codes, _ = _factorize(df['new_client'], valid)
+            address_codes, addresses = _factorize(df['full_address'], valid)
+            pair_codes, _ = _factorize(client_codes * len(addresses) + address_codes)
+            _, first = np.unique(pair_codes, return_index=True)
+            # Місто й вулиця визначаються адресою, тож беремо їх з першого рядка пари
+            pairs = {'city': codes['city'][first], 'street': codes['street'][first],
+                     'latest': np.bincount(pair_codes[row_latest[valid]], minlength=len(first)) > 0}
+
+        return cls(labels, by_city, present, cells, pairs, latest_decade, row_latest)
+
+    @property
+    def max_decade(self):
+        """Найбільша декада в наборі (None — даних немає)."""
+        return int(self.labels['decade'][self.latest_decade.max()]) if len(self.latest_decade) else None
+
+    @property
+    def memory_mb(self) -> float:
+        arrays = [self.by_city, self.present, self.latest_decade, self.row_latest]
+        arrays += list(self.labels.values()) + list(self.cells.values()) + list(self.pairs.values())
+        return sum(a.nbytes for a in arrays) / 1024 ** 2
+
+    @cached_property
+    def locations(self) -> pd.DataFrame:
+        """Пари (місто, вулиця) рядків огляду — джерело списків для фільтрів міста й вулиці."""
+        latest = self.cells['decade'] == self.latest_decade[self.cells['period']]
+        n_streets = len(self.labels['street'])
+        codes = np.unique(self.cells['city'][latest] * n_streets + self.cells['street'][latest])
+        city, street = np.divmod(codes, n_streets)
+        return pd.DataFrame({'city': self.labels['city'][city], 'street': self.labels['street'][street]})
+
+    @cached_property
+    def _month_matrix(self) -> tuple:
+        """Матриця період -> його місяць (0/1) і відсортовані місяці."""
+        month_codes, months = _factorize(self.labels['period'] % 100)
+        matrix = np.zeros((len(self.labels['period']), len(months)), dtype=np.int64)
+        matrix[np.arange(len(month_codes)), month_codes] = 1
+        return matrix, months.astype(np.int64)
+
+    @cached_property
+    def _street_offsets(self) -> np.ndarray:
+        """Межі діапазонів клітинок кожної вулиці (клітинки відсортовані за кодом вулиці)."""
+        return np.searchsorted(self.cells['street'], np.arange(len(self.labels['street']) + 1))
+
+    def _selection(self, dim: str, values) -> np.ndarray:
+        """Булевий вектор по кодах виміру; порожній вибір — усі значення."""
+        if not values:
+            return np.ones(len(self.labels[dim]), dtype=bool)
+        return np.isin(self.labels[dim], list(values))
+
+    def _slice(self, cities, streets) -> tuple:
+        """
+        Кількість і наявність рядків місто × продукт × період × декада для фільтрів
+        (міста поза вибором — нулі/False або відкинуті). Повертає (коди міст, кількість, наявність).
+        """
+        if streets:
+            # Клітинки впорядковані за вулицею: беремо лише діапазони обраних вулиць
+            street_codes = np.flatnonzero(self._selection('street', streets))
+            rows = np.concatenate([np.arange(self._street_offsets[code], self._street_offsets[code + 1])
+                                   for code in street_codes] or [np.zeros(0, dtype=np.int64)])
+            rows = rows[self._selection('city', cities)[self.cells['city'][rows]]]
+            selected = {dim: self.cells[dim][rows] for dim in DIMENSIONS}
+            shape = list(self.by_city.shape)
+            flat = _flat(selected, DIMENSIONS, shape)
+            size = int(np.prod(shape))
+            quantity = np.bincount(flat, weights=self.cells['quantity'][rows], minlength=size)
+            present = np.bincount(flat, weights=self.cells['rows'][rows], minlength=size) > 0
+            return (np.arange(shape[0]), quantity.round().astype(np.int64).reshape(shape),
+                    present.reshape(shape))
+        if cities:
+            city_codes = np.flatnonzero(self._selection('city', cities))
+            return city_codes, self.by_city[city_codes], self.present[city_codes]
+        return np.arange(self.by_city.shape[0]), self.by_city, self.present
+
+    def _prices(self, price_index: PriceIndex) -> np.ndarray:
+        """Ціни продукт × період (NaN — ціни немає)."""
+        products, periods = self.labels['product_name'], self.labels['period']
+        months = np.tile(periods % 100, len(products))
+        return price_index.lookup(np.repeat(products, len(periods)), months).reshape(len(products), len(periods))
+
+    def _latest(self, values: np.ndarray) -> np.ndarray:
+        """Зріз [..., період, декада] -> [..., період] по останній декаді кожного періоду."""
+        return values[..., np.arange(len(self.latest_decade)), self.latest_decade]
+
+    def overview(self, cities=None, streets=None) -> OverviewAggregates:
+        """Агрегати вкладки "Загальний огляд" (як aggregation.frame_aggregates по рядках огляду)."""
+        city_codes, quantity, present = self._slice(cities, streets)
+        quantity, present = self._latest(quantity), self._latest(present)
+        month_matrix, months = self._month_matrix
+
+        by_month = quantity.sum(axis=0) @ month_matrix
+        seen = (present.any(axis=0).astype(np.int64) @ month_matrix) > 0
+        product, month = np.nonzero(seen)
+        product_month = pd.DataFrame({
+            'product_name': pd.array(self.labels['product_name'][product], dtype=str),
+            'month': months[month],
+            'quantity': by_month[product, month],
+        })
+
+        by_city = quantity.sum(axis=2)
+        city, product = np.nonzero(present.any(axis=2))
+        city_product = pd.DataFrame({
+            'city': pd.array(self.labels['city'][city_codes[city]], dtype=str),
+            'product_name': pd.array(self.labels['product_name'][product], dtype=str),
+            'quantity': by_city[city, product],
+        })
+
+        return OverviewAggregates(product_month, city_product, self.unique_clients(cities, streets))
+
+    def unique_clients(self, cities=None, streets=None) -> int:
+        """Кількість унікальних пар (клієнт, адреса) в рядках огляду зрізу."""
+        pair_mask = self.pairs['latest'] & self._selection('city', cities)[self.pairs['city']]
+        if streets:
+            pair_mask &= self._selection('street', streets)[self.pairs['street']]
+        return int(pair_mask.sum())
+
+    def dynamics(self, price_index: PriceIndex, cities=None, streets=None) -> pd.DataFrame:
+        """
+        Кількість і дохід по (рік, місяць, декада) — вхід visualizations.plot_sales_dynamics.
+        revenue — NaN у всій колонці, якщо жоден продукт зрізу не має ціни.
+        """
+        _, quantity, present = self._slice(cities, streets)
+        quantity, present = quantity.sum(axis=0), present.any(axis=0)
+        prices = self._prices(price_index)[:, :, None]
+        priced = present & ~np.isnan(prices)
+        revenue = np.where(priced, quantity * np.nan_to_num(prices), 0).sum(axis=0)
+        period, decade = np.nonzero(present.any(axis=0))
+        year, month = np.divmod(self.labels['period'][period], 100)
+        return pd.DataFrame({
+            'year': year, 'month': month, 'decade': self.labels['decade'][decade],
+            'quantity': quantity.sum(axis=0)[period, decade],
+            'revenue': revenue[period, decade] if priced.any() else np.nan,
+        })
+
+    def latest_decade_revenue(self, price_index: PriceIndex) -> float:
+        """Дохід рядків останньої декади набору (KPI "Загальний дохід"; без локальних фільтрів)."""
+        if self.max_decade is None:
+            return 0.0
+        quantity = self._latest(self.by_city.sum(axis=0))
+        in_max_decade = self.latest_decade == self.latest_decade.max()
+        return float(np.nansum(quantity[:, in_max_decade] * self._prices(price_index)[:, in_max_decade]))
@@ -0,0 +1,244 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+# Колонки, які завантажуються з таблиці sales_data для сторінки аналізу.
+# 'id' потрібен для keyset-пагінації, 'revision' — щоб помітити змінені рядки (sql/sales_data_revision.sql).
+SALES_SELECT_QUERY = "id,distributor,client,new_client, product_name, quantity, city, street, house_number, territory, adding, product_line, delivery_address, year, month, decade, region, revision"
+
+# Максимальна кількість рядків, яку PostgREST віддає за один запит
+PAGE_SIZE = 1000
+
+# Кількість одночасних запитів сторінок (можна змінити параметром max_workers)
+FETCH_MAX_WORKERS = 8
+
+# Формат відповіді для масового читання: "csv" (text/csv, сторінка одразу розбирається в колонки)
+# або "json" (масив словників, як раніше)
+WIRE_FORMAT = "csv"
+
+SALES_COLUMNS = [c.strip() for c in SALES_SELECT_QUERY.split(",")]
+# id потрібен завжди: за ним працює пагінація і дочитування колонок
+KEY_COLUMN = "id"
+# Ревізія рядка теж читається завжди: за нею локальне сховище й фактичні продажі помічають
+# рядки, змінені upsert'ом повторного завантаження (id таких рядків не змінюється)
+REVISION_COLUMN = "revision"
+# Типи колонок при розборі CSV: id, revision і quantity — числа, решта — текст
+CSV_COLUMN_TYPES = {
+    c: pa.int64() if c in (KEY_COLUMN, REVISION_COLUMN) else pa.float64() if c == "quantity" else pa.string()
+    for c in SALES_COLUMNS
+}
+
+
+def select_columns(columns=None) -> list:
+    """Колонки для вибірки у порядку SALES_COLUMNS: id і revision плюс запитані (None — усі)."""
+    if columns is None:
+        return list(SALES_COLUMNS)
+    return [c for c in SALES_COLUMNS if c in (KEY_COLUMN, REVISION_COLUMN) or c in columns]
+
+
+def apply_sales_filters(query, region_name: str, territory: str, line: str, months: list):
+    """Додає до запиту фільтри регіону, території, лінійки та місяців."""
+    # Фільтруємо за назвою регіону, якщо вона обрана
+    if region_name and region_name != "Оберіть регіон...":
+        query = query.eq('region', region_name)
+
+    if territory != "Всі":
+        query = query.eq("territory", territory)
+    if line != "Всі":
+        query = query.eq("product_line", line)
+    if months:
+        query = query.in_("month", months)
+    return query
+
+
+def fetch_rows_keyset(make_query, page_size: int = PAGE_SIZE, after_id=None, up_to_id=None) -> list:
+    """
+    Keyset-пагінація за первинним ключем: id > last_seen ORDER BY id LIMIT page_size.
+    make_query() має повертати новий запит з уже застосованими фільтрами.
+    На відміну від .range(offset, ...), час кожної сторінки не залежить від глибини,
+    а паралельна вставка рядків не призводить до пропусків чи дублікатів.
+    after_id / up_to_id обмежують діапазон ключів (after_id < id <= up_to_id).
+    """
+    rows = []
+    last_id = after_id
+    while True:
+        query = make_query()
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        if up_to_id is not None:
+            query = query.lte("id", up_to_id)
+        page = query.order("id").limit(page_size).execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            break
+        last_id = page[-1]["id"]
+    return rows
+
+
+def sales_id_bounds(client, region_name: str, territory: str, line: str, months: list, after_id=None,
+                    up_to_id=None):
+    """
+    Повертає (мінімальний id, максимальний id, точна кількість рядків) за фільтрами
+    або None, якщо рядків немає. after_id / up_to_id обмежують пошук рядками з after_id < id <= up_to_id.
+    """
+    def make_probe(count=None):
+        query = client.table("sales_data").select("id", count=count)
+        if after_id is not None:
+            query = query.gt("id", after_id)
+        if up_to_id is not None:
+            query = query.lte("id", up_to_id)
+        return apply_sales_filters(query, region_name, territory, line, months)
+
+    first = make_probe(count="exact").order("id").limit(1).execute()
+    if not first.data:
+        return None
+    last = make_probe().order("id", desc=True).limit(1).execute()
+    return first.data[0]["id"], last.data[0]["id"], first.count or 0
+
+
+def sales_data_version(client, region_name: str) -> tuple:
+    """
+    Версія даних регіону: (кількість рядків, найбільший id, найбільша ревізія). Змінюється при вставці,
+    видаленні та виправленні рядків (sql/sales_data_revision.sql). Три легкі запити за індексами.
+    """
+    bounds = sales_id_bounds(client, region_name, "Всі", "Всі", [])
+    if bounds is None:
+        return 0, None, None
+    response = (client.table("sales_data").select(REVISION_COLUMN).eq("region", region_name)
+                .order(REVISION_COLUMN, desc=True).limit(1).execute())
+    max_revision = response.data[0][REVISION_COLUMN] if response.data else None
+    return bounds[2], bounds[1], max_revision
+
+
+def _segment_edges(client, region_name: str, territory: str, line: str, months: list, max_workers: int,
+                   page_size: int, after_id=None, up_to_id=None):
+    """
+    Межі сегментів id для паралельного читання: список з n+1 значень (сегмент k — edges[k] < id <= edges[k+1])
+    або None, якщо рядків немає. Рядки, вставлені після визначення max id, у сегменти не потрапляють.
+    """
+    bounds = sales_id_bounds(client, region_name, territory, line, months, after_id=after_id, up_to_id=up_to_id)
+    if bounds is None:
+        return None
+    min_id, max_id, total = bounds
+    n_segments = max(1, min(max_workers, -(-total // page_size)))
+    span = max_id - min_id + 1
+    return [min_id - 1 + span * k // n_segments for k in range(n_segments + 1)]
+
+
+def _fetch_segments(edges: list, fetch_segment) -> list:
+    """Читає сегменти в окремих потоках; результати — у порядку зростання id."""
+    n_segments = len(edges) - 1
+    with ThreadPoolExecutor(max_workers=n_segments) as pool:
+        return list(pool.map(lambda k: fetch_segment(edges[k], edges[k + 1]), range(n_segments)))
+
+
+def _make_sales_query(client, region_name: str, territory: str, line: str, months: list, columns=None):
+    select = SALES_SELECT_QUERY if columns is None else ",".join(select_columns(columns))
+
+    def make_query():
+        query = client.table("sales_data").select(select)
+        return apply_sales_filters(query, region_name, territory, line, months)
+    return make_query
+
+
+def fetch_sales_rows(client, region_name: str, territory: str, line: str, months: list,
+                     max_workers: int = FETCH_MAX_WORKERS, page_size: int = PAGE_SIZE, after_id=None,
+                     up_to_id=None, columns=None) -> list:
+    """
+    Завантажує рядки sales_data, впорядковані за id.
+    Діапазон ключів [min id, max id] ділиться на сегменти (не більше max_workers),
+    кожен сегмент читається keyset-пагінацією в окремому потоці, а результати
+    з'єднуються у порядку сегментів. Рядки, вставлені після визначення max id,
+    у результат не потрапляють, тож вибірка узгоджена навіть під час завантаження файлу.
+    after_id дозволяє дочитати лише рядки, новіші за вже відомий id, up_to_id — не читати новіші за нього.
+    columns обмежує вибірку колонками (id додається завжди; None — усі колонки SALES_SELECT_QUERY).
+    """
+    edges = _segment_edges(client, region_name, territory, line, months, max_workers, page_size, after_id,
+                           up_to_id)
+    if edges is None:
+        return []
+    make_query = _make_sales_query(client, region_name, territory, line, months, columns)
+    segments = _fetch_segments(
+        edges, lambda lo, hi: fetch_rows_keyset(make_query, page_size, after_id=lo, up_to_id=hi)
+    )
+    return [row for segment in segments for row in segment]
+
+
+def decode_csv_page(text: str, columns=None, column_types: dict = None) -> pa.Table:
+    """
+    Розбирає сторінку text/csv з PostgREST одразу в колонки Arrow (типи — CSV_COLUMN_TYPES).
+    NULL і порожній рядок у CSV не розрізняються (обидва стають null).
+    columns — колонки запиту sales_data (потрібні лише для схеми порожньої сторінки);
+    column_types — колонки й типи іншої таблиці замість них.
+    """
+    if column_types is None:
+        column_types = {c: CSV_COLUMN_TYPES[c] for c in select_columns(columns)}
+    if not text or not text.strip():
+        return pa.schema(list(column_types.items())).empty_table()
+    return pa_csv.read_csv(
+        BytesIO(text.encode("utf-8")),
+        convert_options=pa_csv.ConvertOptions(column_types=column_types, strings_can_be_null=True)
+    )
+
+
+def fetch_table_keyset(make_query, page_size: int = PAGE_SIZE, after_id=None, up_to_id=None,
+                       columns=None, column_types: dict = None) -> pa.Table:
+    """
+    Те саме, що fetch_rows_keyset, але сторінки запитуються у форматі text/csv (.csv())
+    і одразу розбираються в колонки; сторінки з'єднуються один раз наприкінці.
+    """
+    pages = []
+    last_id = after_id
+    while True:
+        query = make_query()
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        if up_to_id is not None:
+            query = query.lte("id", up_to_id)
+        page = decode_csv_page(query.order("id").limit(page_size).csv().execute().data, columns, column_types)
+        pages.append(page)
+        if page.num_rows < page_size:
+            break
+        last_id = page.column("id")[-1].as_py()
+    return pa.concat_tables(pages)
+
+
+def fetch_sales_frame(client, region_name: str, territory: str, line: str, months: list,
+                      max_workers: int = FETCH_MAX_WORKERS, page_size: int = PAGE_SIZE, after_id=None,
+                      up_to_id=None, columns=None, wire_format: str = WIRE_FORMAT) -> pd.DataFrame:
+    """
+    Завантажує sales_data одразу у DataFrame (ті самі сегменти й порядок, що й fetch_sales_rows).
+    wire_format="csv" не створює проміжних словників на кожен рядок: пікова пам'ять
+    близька до розміру самого кадру. "json" — попередній шлях через fetch_sales_rows.
+    """
+    if wire_format == "json":
+        return rows_to_sales_frame(fetch_sales_rows(
+            client, region_name, territory, line, months, max_workers, page_size, after_id, up_to_id, columns))
+    edges = _segment_edges(client, region_name, territory, line, months, max_workers, page_size, after_id,
+                           up_to_id)
+    if edges is None:
+        return pd.DataFrame()
+    make_query = _make_sales_query(client, region_name, territory, line, months, columns)
+    segments = _fetch_segments(
+        edges, lambda lo, hi: fetch_table_keyset(make_query, page_size, after_id=lo, up_to_id=hi, columns=columns)
+    )
+    table = pa.concat_tables(segments)
+    if table.num_rows == 0:
+        return pd.DataFrame()
+    df = table.to_pandas()
+    if 'quantity' in df.columns:
+        df['quantity'] = df['quantity'].fillna(0).astype(int)
+    return df
+
+
+def rows_to_sales_frame(rows: list) -> pd.DataFrame:
+    """Перетворює рядки sales_data у DataFrame з числовою колонкою 'quantity'."""
+    if not rows:
+        return pd.DataFrame()
+    df = pd.DataFrame(rows)
+    if 'quantity' in df.columns:
+        df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce').fillna(0).astype(int)
+    return df
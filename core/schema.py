@@ -0,0 +1,60 @@
+import pandas as pd
+
+# Текстові поля, які очищуються так само, як у compute_actual_sales (strip + fillna(''))
+CLEANED_TEXT_COLUMNS = ['distributor', 'product_name', 'city', 'street', 'house_number', 'new_client']
+
+# Усі текстові колонки sales_data, що можуть зберігатися як category
+TEXT_COLUMNS = [
+    'distributor', 'client', 'new_client', 'product_name', 'city', 'street', 'house_number',
+    'territory', 'product_line', 'delivery_address', 'region', 'adding'
+]
+
+# Колонка стає category, якщо унікальних значень не більше цієї частки від кількості рядків
+CATEGORICAL_MAX_RATIO = 0.5
+
+# Найменші цілі типи для числових колонок
+INTEGER_COLUMNS = {'year': 'int16', 'month': 'int8', 'decade': 'int8', 'quantity': 'int32'}
+
+
+def frame_memory_mb(df: pd.DataFrame) -> float:
+    """Повертає фактичний обсяг пам'яті DataFrame у мегабайтах (з урахуванням рядків)."""
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def compact_sales_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводить DataFrame продажів до компактної схеми:
+    - очищує текстові поля (strip, порожні значення -> ''), як це робить compute_actual_sales;
+    - перетворює текстові колонки з невеликою кількістю унікальних значень на category;
+    - зберігає year/month/decade/quantity у найменших цілих типах
+      (nullable Int*, якщо в колонці є пропуски).
+    """
+    if df.empty:
+        return df
+
+    df = df.copy()
+    for col in CLEANED_TEXT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].fillna('').astype(str).str.strip()
+
+    for col in TEXT_COLUMNS:
+        if col in df.columns and df[col].nunique(dropna=True) <= CATEGORICAL_MAX_RATIO * len(df):
+            df[col] = df[col].astype('category')
+
+    for col, dtype in INTEGER_COLUMNS.items():
+        if col in df.columns:
+            values = pd.to_numeric(df[col], errors='coerce')
+            if values.isna().any():
+                # Int8 / Int16 / Int32 — nullable-варіанти тих самих типів
+                dtype = dtype.capitalize()
+            df[col] = values.astype(dtype)
+
+    return df
+
+
+def memory_report(df_before: pd.DataFrame, df_after: pd.DataFrame) -> str:
+    """Формує рядок зі звітом про зміну обсягу пам'яті."""
+    before = frame_memory_mb(df_before)
+    after = frame_memory_mb(df_after)
+    saved = (1 - after / before) * 100 if before else 0
+    return f"Пам'ять: {before:.1f} МБ -> {after:.1f} МБ (-{saved:.0f}%)"
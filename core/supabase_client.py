@@ -0,0 +1,36 @@
+import os
+import threading
+import tomllib
+
+SECRETS_PATH = os.path.join(".streamlit", "secrets.toml")
+
+
+def create_client_from_config(secrets_path: str = SECRETS_PATH):
+    """
+    Створює клієнт Supabase поза Streamlit (для командних скриптів).
+    Спочатку читає змінні середовища SUPABASE_URL / SUPABASE_KEY,
+    інакше — секцію [supabase] з .streamlit/secrets.toml.
+    """
+    from supabase import create_client
+
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_KEY")
+    if not (url and key):
+        with open(secrets_path, "rb") as f:
+            secrets = tomllib.load(f)["supabase"]
+        url, key = secrets["url"], secrets["key"]
+    return create_client(url, key)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Спільний для процесу клієнт Supabase; створюється під час першого звернення."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_client_from_config()
+    return _client
@@ -1,39 +1,34 @@
 import streamlit as st
-import pandas as pd
+
+from core.filter_index import FilterIndex
 
 def display_kpi_card(title: str, value: str, help_text: str = ""):
     """Відображає стильну картку KPI з можливістю додати підказку."""
     st.metric(label=title, value=value, help=help_text)
 
-def render_local_filters(df: pd.DataFrame, key_prefix: str) -> tuple:
+def render_local_filters(filter_index: FilterIndex, key_prefix: str) -> tuple:
     """
     Створює локальні фільтри для міста та вулиці.
+    Списки беруться з індексу фільтрів (core.filter_index), побудованого один раз на набір даних.
     Повертає обрані значення.
     """
 
     filter_cols = st.columns(2)
 
     with filter_cols[0]:
-        unique_cities = sorted(df['city'].dropna().unique().tolist())
+        # Порожній рядок — це очищене відсутнє значення, індекс його у списки не включає
         selected_cities = st.multiselect(
             "Місто:",
-            unique_cities,
+            filter_index.cities,
             default=[],
             key=f"{key_prefix}_city_filter"
         )
 
     with filter_cols[1]:
-        # якщо вибрані міста – фільтруємо по них
-        if selected_cities:
-            streets_in_selected_cities = df[df['city'].isin(selected_cities)]['street'].dropna().unique()
-            unique_streets = sorted(streets_in_selected_cities.tolist())
-        else:
-            # якщо не вибрано жодного міста – показуємо всі вулиці
-            unique_streets = sorted(df['street'].dropna().unique().tolist())
-
+        # якщо вибрані міста – лише їхні вулиці, інакше – всі вулиці
         selected_streets = st.multiselect(
             "Вулиця:",
-            unique_streets,
+            filter_index.streets(selected_cities),
             default=[],
             key=f"{key_prefix}_street_filter"
         )
@@ -41,7 +36,7 @@ def render_local_filters(df: pd.DataFrame, key_prefix: str) -> tuple:
     return selected_cities, selected_streets
 
 def apply_filters(df, cities, streets):
-    filtered_df = df.copy()
+    filtered_df = df
     if cities:  # якщо список не порожній
         filtered_df = filtered_df[filtered_df['city'].isin(cities)]
     if streets:
@@ -0,0 +1,224 @@
+"""
+Стандартизація файлів дистриб'юторів: зіставлення з "золотими" адресами та довідником клієнтів,
+лінія продукту, рік/місяць/декада з назви файлу.
+
+Файл розбирається один раз (результат кешується за хешем вмісту), ділиться за колонкою 'Регіон',
+і всі регіони обробляються паралельно.
+"""
+import hashlib
+import os
+import pickle
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+from io import BytesIO
+
+import pandas as pd
+
+from core.address_matching import ADDRESS_COLUMN, match_golden_addresses
+
+REQUIRED_COLUMNS = ['Регіон', 'Факт.адреса доставки', 'Найменування', 'Клієнт']
+
+# Відповідність колонок обробленого файлу колонкам таблиці sales_data
+SALES_COLUMN_MAP = {
+    "Дистриб'ютор": "distributor", "Регіон": "region", "Місто": "city_xls",
+    "ЄДРПОУ": "edrpou", "Клієнт": "client", "Юр. адреса клієнта": "client_legal_address",
+    "Факт.адреса доставки": "delivery_address", "Найменування": "product_name",
+    "Кількість": "quantity", "Adding": "adding", "City": "city",
+    "Street": "street", "House_Number": "house_number", "Territory": "territory",
+    "Product_Line": "product_line", "year": "year", "month": "month", "decade": "decade",
+    "new_client": "new_client"
+}
+
+SALES_UPLOAD_COLUMNS = [
+    "distributor", "region", "city_xls", "edrpou", "client",
+    "client_legal_address", "delivery_address", "product_name",
+    "quantity", "adding", "city", "street", "house_number",
+    "territory", "product_line", "year", "month", "decade", "new_client"
+]
+
+# calamine (python-calamine, є в requirements.txt) читає xlsx у рази швидше за openpyxl;
+# без нього (старе оточення) — рушій pandas за замовчуванням
+EXCEL_ENGINE = "calamine" if find_spec("python_calamine") else None
+
+CACHE_DIR = os.environ.get("UPLOAD_CACHE_DIR", ".upload_cache")
+# Межі дискового кешу розібраних файлів: загальний обсяг і вік (від останнього використання)
+UPLOAD_CACHE_MAX_MB = float(os.environ.get("UPLOAD_CACHE_MAX_MB", 1024))
+UPLOAD_CACHE_MAX_AGE = 7 * 24 * 3600
+# Скільки розібраних файлів тримати в пам'яті процесу (решта — лише на диску)
+MEMORY_CACHE_FILES = 8
+PIPELINE_MAX_WORKERS = 4
+
+_memory_cache = {}
+_lock = threading.Lock()
+
+
+def content_hash(file_bytes: bytes) -> str:
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def _evict_disk_cache(now: float = None):
+    """
+    Видаляє з дискового кешу файли, не використані довше за UPLOAD_CACHE_MAX_AGE, а потім
+    найдавніше використані, доки обсяг не менший за UPLOAD_CACHE_MAX_MB. Покинуті тимчасові
+    файли видаляються за віком.
+    """
+    now = time.time() if now is None else now
+    entries = []
+    try:
+        names = os.listdir(CACHE_DIR)
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(CACHE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        if now - stat.st_mtime > UPLOAD_CACHE_MAX_AGE:
+            _remove(path)
+        elif name.endswith(".pkl"):
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= UPLOAD_CACHE_MAX_MB * 1024 ** 2:
+            break
+        _remove(path)
+        total -= size
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def read_workbook(file_bytes: bytes) -> pd.DataFrame:
+    """
+    Читає перший аркуш файлу. Результат кешується за SHA-256 вмісту в пам'яті та на диску,
+    тож повторна обробка того самого файлу не розбирає його знову. Дисковий кеш обмежений
+    за обсягом і віком (_evict_disk_cache).
+    """
+    key = content_hash(file_bytes)
+    with _lock:
+        cached = _memory_cache.get(key)
+    if cached is not None:
+        return cached
+
+    path = os.path.join(CACHE_DIR, f"{key}.pkl")
+    df = None
+    if os.path.exists(path):
+        try:
+            df = pd.read_pickle(path)
+            # Час зміни — час останнього використання, за ним працює витіснення
+            os.utime(path)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            df = None
+    if df is None:
+        df = pd.read_excel(BytesIO(file_bytes), engine=EXCEL_ENGINE)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Унікальне тимчасове ім'я: паралельні читачі того самого файлу не пишуть в один файл
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        _evict_disk_cache()
+
+    with _lock:
+        _memory_cache[key] = df
+        while len(_memory_cache) > MEMORY_CACHE_FILES:
+            _memory_cache.pop(next(iter(_memory_cache)))
+    return df
+
+
+def missing_columns(df: pd.DataFrame) -> list:
+    return [col for col in REQUIRED_COLUMNS if col not in df.columns]
+
+
+def split_by_region(df: pd.DataFrame) -> dict:
+    """Ділить файл на частини за колонкою 'Регіон' {назва регіону: рядки}."""
+    return {region: part.copy() for region, part in df.groupby('Регіон', sort=False)}
+
+
+def parse_file_period(file_name: str) -> dict:
+    """Adding, рік, місяць і декада з назви файлу виду ..._2025_05_10.xlsx (None, якщо не знайдено)."""
+    date_match = re.search(r'(\d{4}_\d{2}(_\d{2})?)', file_name)
+    if not date_match:
+        return {'Adding': None, 'year': None, 'month': None, 'decade': None}
+    date_parts = date_match.group(0).split("_")
+    return {
+        'Adding': date_match.group(0), 'year': date_parts[0], 'month': date_parts[1],
+        'decade': date_parts[2] if len(date_parts) > 2 else None
+    }
+
+
+def standardize_region(df_region: pd.DataFrame, golden_df: pd.DataFrame, client_map: dict, file_name: str,
+                       products_dict: dict) -> pd.DataFrame:
+    """Зіставляє рядки одного регіону з "золотими" адресами та клієнтами і додає службові колонки."""
+    df_region = df_region.reset_index(drop=True)
+    parsed_df = match_golden_addresses(df_region[ADDRESS_COLUMN], golden_df)
+    parsed_df = parsed_df.rename(
+        columns={'city': 'City', 'street': 'Street', 'number': 'House_Number', 'territory': 'Territory'})
+    df_region = df_region.drop(columns=['Вулиця', 'Номер будинку', 'Територія', 'Adding'], errors='ignore')
+    result_df = pd.concat([df_region, parsed_df], axis=1)
+
+    for column, value in parse_file_period(file_name).items():
+        result_df[column] = value
+    result_df['Product_Line'] = result_df['Найменування'].str[3:].map(products_dict)
+
+    if client_map:
+        result_df['new_client'] = result_df['Клієнт'].astype(str).str.strip().map(client_map)
+    else:
+        result_df['new_client'] = None
+    return result_df
+
+
+def standardize_regions(parts: dict, golden_loader, client_map: dict, file_name: str, products_dict: dict,
+                        max_workers: int = PIPELINE_MAX_WORKERS) -> dict:
+    """
+    Обробляє кілька регіонів паралельно.
+    parts — {регіон: рядки}; golden_loader(регіон) повертає довідник "золотих" адрес
+    (як reference_data.get_golden_reference) і виконується в тому ж потоці, що й обробка регіону.
+    Повертає {регіон: (result_df, golden_reference)}.
+    """
+    def process(region):
+        golden_reference = golden_loader(region)
+        result_df = standardize_region(parts[region], golden_reference['golden_df'], client_map, file_name,
+                                       products_dict)
+        return result_df, golden_reference
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(parts)))) as executor:
+        results = dict(zip(parts, executor.map(process, parts)))
+    return results
+
+
+def combine_results(results: dict) -> tuple:
+    """
+    Об'єднує результати регіонів у один кадр і збирає нечіткі підказки для незнайдених адрес.
+    Повертає (result_df, suggestions) з узгодженим наскрізним індексом.
+    """
+    frames, suggestion_frames, offset = [], [], 0
+    for result_df, golden_reference in results.values():
+        result_df.index = pd.RangeIndex(offset, offset + len(result_df))
+        offset += len(result_df)
+        frames.append(result_df)
+        suggestion_frames.append(address_suggestions(result_df, golden_reference))
+    if not frames:
+        return pd.DataFrame(), pd.DataFrame(columns=['suggestion', 'score'])
+    return pd.concat(frames), pd.concat(suggestion_frames)
+
+
+def address_suggestions(result_df: pd.DataFrame, golden_reference: dict) -> pd.DataFrame:
+    """Нечіткі підказки для адрес, яких немає серед "золотих" (порожній кадр, якщо таких немає)."""
+    unmatched = result_df.loc[result_df['City'].isna(), ADDRESS_COLUMN]
+    if unmatched.empty or golden_reference['golden_df'].empty:
+        return pd.DataFrame(columns=['suggestion', 'score'])
+    return golden_reference['golden_index'].suggest_frame(unmatched)
+
+
+def to_sales_rows(result_df: pd.DataFrame) -> pd.DataFrame:
+    """Перейменовує колонки обробленого файлу на колонки sales_data і залишає лише ті, що завантажуються."""
+    upload_df = result_df.rename(columns=SALES_COLUMN_MAP)
+    return upload_df[[col for col in SALES_UPLOAD_COLUMNS if col in upload_df.columns]]
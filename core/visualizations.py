@@ -11,21 +11,22 @@ UKRAINIAN_MONTHS = {
 }
 
 
-def plot_top_products_summary(df: pd.DataFrame):
+def plot_top_products_summary(product_month: pd.DataFrame):
     """
     Створює зведену таблицю по всіх продуктах та стовпчасту діаграму для ТОП-5.
+    product_month — кількість по продуктах і місяцях (core.aggregation.OverviewAggregates.product_month).
     """
-    if df.empty:
+    if product_month.empty:
         st.info("Немає даних для побудови зведення по продуктах.")
         return
 
-    product_summary = df.groupby('product_name')['quantity'].sum().sort_values(ascending=False).reset_index()
+    product_summary = product_month.groupby('product_name', observed=True)['quantity'].sum().sort_values(ascending=False).reset_index()
     product_summary.rename(columns={'quantity': 'Загальна кількість'}, inplace=True)
     top5_products = product_summary.head(5)
 
-    df_top5_details = df[df['product_name'].isin(top5_products['product_name'])].copy()
+    df_top5_details = product_month[product_month['product_name'].isin(top5_products['product_name'])].copy()
     df_top5_details['month_name'] = pd.to_numeric(df_top5_details['month']).map(UKRAINIAN_MONTHS)
-    df_top5_agg = df_top5_details.groupby(['product_name', 'month_name'])['quantity'].sum().reset_index()
+    df_top5_agg = df_top5_details.groupby(['product_name', 'month_name'], observed=True)['quantity'].sum().reset_index()
 
     st.markdown("---")
     st.subheader("Аналіз продажів за продуктами")
@@ -50,7 +51,7 @@ def plot_top_products_summary(df: pd.DataFrame):
             color_discrete_sequence=['#00656e']
         )
         fig_top.update_traces(textfont_color='black')
-        totals_top = df_top5_agg.groupby('product_name')['quantity'].sum()
+        totals_top = df_top5_agg.groupby('product_name', observed=True)['quantity'].sum()
         for product in top_order:
             total_val = totals_top.get(product, 0)
             fig_top.add_annotation(
@@ -0,0 +1,68 @@
+import calendar
+import os
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+from workalendar.europe import Ukraine  # Бібліотека для розрахунку робочих днів в Україні
+
+# Діапазон років, для якого індекс будується заздалегідь (можна змінити змінними середовища)
+CALENDAR_START_YEAR = int(os.environ.get("WORK_CALENDAR_START_YEAR", 2020))
+CALENDAR_END_YEAR = int(os.environ.get("WORK_CALENDAR_END_YEAR", 2035))
+
+
+class WorkdayIndex:
+    """
+    Індекс робочих днів України за діапазон років.
+    cumulative[i] — кількість робочих днів від початку діапазону до дати start + i (не включно),
+    тому кількість робочих днів у будь-якому проміжку — різниця двох елементів.
+    """
+
+    def __init__(self, start_year: int, end_year: int):
+        self.start = date(start_year, 1, 1)
+        self.end = date(end_year, 12, 31)
+        cal = Ukraine()
+        n_days = (self.end - self.start).days + 1
+        is_working = np.fromiter(
+            (cal.is_working_day(self.start + timedelta(days=i)) for i in range(n_days)), dtype=bool, count=n_days
+        )
+        self.cumulative = np.concatenate(([0], np.cumsum(is_working, dtype=np.int32)))
+
+    def covers(self, day: date) -> bool:
+        return self.start <= day <= self.end
+
+    def workdays_between(self, first: date, last: date) -> int:
+        """Кількість робочих днів у проміжку [first, last] (обидві дати включно)."""
+        if last < first:
+            return 0
+        return int(self.cumulative[(last - self.start).days + 1] - self.cumulative[(first - self.start).days])
+
+
+@lru_cache(maxsize=None)
+def get_workday_index(start_year: int = CALENDAR_START_YEAR, end_year: int = CALENDAR_END_YEAR) -> WorkdayIndex:
+    """Повертає індекс робочих днів; будується один раз на процес для кожного діапазону."""
+    return WorkdayIndex(start_year, end_year)
+
+
+def _index_for_year(year: int) -> WorkdayIndex:
+    index = get_workday_index()
+    if index.covers(date(year, 1, 1)):
+        return index
+    # Рік поза налаштованим діапазоном — окремий індекс лише для нього (теж кешується)
+    return get_workday_index(year, year)
+
+
+def workdays_passed_and_left(year: int, month: int, last_decade: int):
+    """
+    Повертає (робочих днів минуло, робочих днів лишилось) у місяці станом на день last_decade включно.
+    Якщо такої дати немає (наприклад, 30 лютого), повертає None.
+    """
+    try:
+        period_end = date(year, month, last_decade)
+    except ValueError:
+        return None
+    index = _index_for_year(year)
+    last_day = date(year, month, calendar.monthrange(year, month)[1])
+    passed = index.workdays_between(date(year, month, 1), period_end)
+    left = index.workdays_between(period_end + timedelta(days=1), last_day)
+    return passed, left
@@ -1,8 +1,14 @@
+import pandas as pd
 import streamlit as st
 from streamlit_option_menu import option_menu
-from core.data_loader import fetch_all_sales_data
+from core.data_loader import load_sales_dataset, load_territories_for_region
+from core.schema import frame_memory_mb
 from pages_logic import sales_page, upload_page
-from utils import supabase
+
+# Спільні набори даних (core/dataset_store.py) покладаються на copy-on-write:
+# у pandas 3 він увімкнений завжди, у pandas 2 вмикаємо один раз для всього застосунку
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
 
 # --- Налаштування сторінки ---
 st.set_page_config(
@@ -12,21 +18,6 @@ st.set_page_config(
 )
 
 
-# --- Функція для завантаження територій ---
-@st.cache_data(ttl=3600)
-def load_territories_for_region(region_id):
-    """Завантажує території для конкретного регіону."""
-    if not region_id:
-        return []
-    try:
-        # Припущення: у вас є таблиця 'territory' з колонками 'name', 'technical_name', 'region_id'
-        response = supabase.table("territory").select("name, technical_name").eq("region_id", region_id).execute()
-        return response.data
-    except Exception as e:
-        st.error(f"Помилка завантаження територій: {e}")
-        return []
-
-
 # --- Бічна панель з меню та глобальними фільтрами ---
 with st.sidebar:
     selected_page = option_menu(
@@ -88,15 +79,24 @@ with st.sidebar:
                 st.session_state.selected_territory_value = territory_to_pass
 
                 with st.spinner("Завантаження даних... Це може зайняти деякий час."):
-                    st.session_state.sales_df_full = fetch_all_sales_data(
+                    # Сесія тримає лише дескриптор спільного набору та поверхневу копію кадру
+                    st.session_state.sales_dataset = load_sales_dataset(
                         region_name=selected_region_name,
                         territory=territory_to_pass,
                         line=selected_line,
-                        months=months_to_load
+                        months=months_to_load,
+                        columns=sales_page.view_columns()
+                    )
+                    st.session_state.sales_df_full = (
+                        st.session_state.sales_dataset.frame if st.session_state.sales_dataset is not None
+                        else pd.DataFrame()
                     )
                 st.success("Дані успішно завантажено!")
                 if 'sales_df_full' in st.session_state and not st.session_state.sales_df_full.empty:
-                    st.info(f"Завантажено {len(st.session_state.sales_df_full)} записів.")
+                    st.info(
+                        f"Завантажено {len(st.session_state.sales_df_full)} записів "
+                        f"({frame_memory_mb(st.session_state.sales_df_full):.1f} МБ у пам'яті)."
+                    )
                 else:
                     st.warning("За обраними фільтрами дані не знайдено.")
     else:
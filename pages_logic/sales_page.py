@@ -1,7 +1,52 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from core import data_processing, ui_components, visualizations, data_loader
+from core import aggregation, data_processing, rollups, ui_components, visualizations, data_loader
+from core.filter_index import FilterIndex
+from core.incremental_sales import ActualSalesState, refresh_state
+from core.sales_cube import SalesCube
+
+VIEW_OVERVIEW = "📈 Загальний огляд"
+VIEW_ADDRESSES = "🏠 Деталізація по адресах"
+VIEW_REVENUE = "💰 550"
+
+# Колонки sales_data, які читає кожне подання (id додається завжди). Спільна частина потрібна
+# підготовці кадру (full_address, рік/місяць/декада) і розрахунку доходу; прогноз у поданні "550"
+# читає ті самі колонки, що й дохід. Завантажується лише об'єднання колонок відкритих подань.
+PAGE_COLUMNS = ['product_name', 'quantity', 'city', 'street', 'house_number', 'year', 'month', 'decade']
+VIEW_COLUMNS = {
+    VIEW_OVERVIEW: PAGE_COLUMNS + ['new_client'],
+    VIEW_ADDRESSES: PAGE_COLUMNS + ['distributor', 'new_client'],
+    VIEW_REVENUE: PAGE_COLUMNS,
+}
+
+
+def view_columns(view: str = None) -> list:
+    """Колонки для подання view (за замовчуванням — відкритого в сесії)."""
+    return VIEW_COLUMNS[view or st.session_state.get('sales_view', VIEW_OVERVIEW)]
+
+
+def get_actual_sales_state(df_full: pd.DataFrame, dataset_key=None) -> ActualSalesState:
+    """
+    Повертає стан фактичних продажів для поточного набору даних (dataset_key) із сесії.
+    Якщо набір даних лише доповнився новими рядками, дораховує тільки їх.
+    """
+    state = refresh_state(st.session_state.get('actual_sales_state'), df_full, dataset_key)
+    st.session_state.actual_sales_state = state
+    return state
+
+
+def get_rollup(dataset, prepared: tuple) -> pd.DataFrame | None:
+    """
+    Зведення (core/rollups.py) для набору даних, якщо воно з того самого знімка, що й набір:
+    суми кількості по декадах зведення і підготовленого кадру (prepared) мають збігатися.
+    None — зведення неповні, застарілі чи недоступні; тоді показники рахуються із сирих рядків.
+    """
+    rollup = data_loader.fetch_sales_rollup(*dataset.key, data_loader.get_dataset_store().data_version(dataset.key))
+    if rollup is None:
+        return None
+    totals = dataset.derive('period_totals', rollups.period_totals, prepared)
+    return rollup if rollups.period_totals(rollup).equals(totals) else None
 
 
 def show():
@@ -20,49 +65,54 @@ def show():
             "Будь ласка, поверніться до панелі управління, оберіть фільтри та натисніть 'Отримати дані' ще раз.")
         st.stop()
 
-    df_full = st.session_state.sales_df_full
-    df_full = data_processing.create_full_address(df_full.copy())
-    address_client_map = data_processing.create_address_client_map(df_full)
-
-    # Ensure 'year', 'month', 'decade' are numeric for consistent processing
-    df_full['year'] = pd.to_numeric(df_full['year'], errors='coerce')
-    df_full['month'] = pd.to_numeric(df_full['month'], errors='coerce')
-    df_full['decade'] = pd.to_numeric(df_full['decade'], errors='coerce')
-
-    df_full_with_revenue = df_full.copy()
-    all_months_in_data = df_full_with_revenue['month'].dropna().unique().tolist()
-    region_id_to_load = st.session_state.get('selected_region_id')
-
-    if all_months_in_data and region_id_to_load:
-        price_df_full = data_loader.fetch_price_data(
-            region_id=region_id_to_load,
-            months=[f"{int(m):02d}" for m in all_months_in_data]
-        )
-        if not price_df_full.empty:
-            df_full_with_revenue['month'] = df_full_with_revenue['month'].astype('Int64')
-            df_full_with_revenue = pd.merge(df_full_with_revenue, price_df_full, on=['product_name', 'month'],
-                                            how='left')
-            df_full_with_revenue['revenue'] = df_full_with_revenue['quantity'] * df_full_with_revenue['price']
-
-    max_decade_per_month = df_full.groupby(['year', 'month'])['decade'].transform('max')
-    is_latest_for_month = (df_full['decade'] == max_decade_per_month)
-    df_for_overview = df_full[is_latest_for_month].copy()
-
-    df_latest_decade = pd.DataFrame()
-    max_decade = None
-    if not df_for_overview.empty and 'decade' in df_for_overview.columns:
-        max_decade = int(df_for_overview['decade'].max())
-        df_latest_decade = df_for_overview[df_for_overview['decade'] == max_decade].copy()
-
-    tab1, tab2, tab3 = st.tabs(["📈 Загальний огляд", "🏠 Деталізація по адресах", "💰 550"])
-
-    with tab1:
+    # Рендериться лише обране подання, тож колонки інших подань не завантажуються, доки їх не відкриють
+    selected_view = st.radio("Розділ", list(VIEW_COLUMNS), horizontal=True, label_visibility="collapsed",
+                             key="sales_view")
+
+    # Підготовлений кадр і куб спільні для всіх сесій з тим самим набором даних; далі — лише
+    # copy-on-write копії кадру і зрізи куба, без groupby по рядках на кожну взаємодію
+    dataset = st.session_state.get('sales_dataset')
+    if dataset is not None:
+        if not data_loader.ensure_sales_columns(dataset, view_columns(selected_view)):
+            # Без колонок подання (напр. distributor для адрес) розрахунки нижче впадуть; помилку вже показано
+            st.stop()
+        # Куб і індекси будуються з підготовленого кадру того самого знімка набору (source), а не із замикань
+        prepared = ('sales_page', data_processing.prepare_sales_frame)
+        sales_cube = ('sales_cube', SalesCube.from_frame, prepared)
+        df_full = dataset.derive(*prepared)
+        cube = dataset.derive(*sales_cube)
+        # Індекси фільтрів міста й вулиці: рядки огляду (з куба) і повний кадр
+        overview_filters = dataset.derive('overview_filter_index', lambda c: FilterIndex(c.locations), sales_cube)
+        row_filters = dataset.derive('sales_filter_index', FilterIndex, prepared)
+    else:
+        df_full = data_processing.prepare_sales_frame(st.session_state.sales_df_full)
+        cube = SalesCube.from_frame(df_full)
+        overview_filters = FilterIndex(cube.locations)
+        row_filters = FilterIndex(df_full)
+
+    # Одна вибірка цін на регіон; дохід — векторний збір з індексу продукт × місяць
+    price_index = data_loader.fetch_price_index(st.session_state.get('selected_region_id'))
+    max_decade = cube.max_decade
+
+    if selected_view == VIEW_OVERVIEW:
         st.header("Загальний огляд продажів за обраний період")
-        selected_city, selected_street = ui_components.render_local_filters(df_for_overview, key_prefix="tab1")
-        df_display = ui_components.apply_filters(df_for_overview, selected_city, selected_street)
-        df_for_dynamics = ui_components.apply_filters(df_full_with_revenue, selected_city, selected_street)
-
-        if df_display.empty:
+        selected_city, selected_street = ui_components.render_local_filters(overview_filters, key_prefix="tab1")
+
+        # KPI, зведення по продуктах і таблиця місто × продукт — з агрегатів бази (бекенд "rpc") або зрізу куба
+        overview = None
+        rollup = get_rollup(dataset, prepared) if dataset is not None and not selected_street else None
+        if rollup is not None:
+            # Без фільтра за вулицею — з рядків зведення (їх стільки, скільки ключів); клієнти — з куба
+            latest = ui_components.apply_filters(rollups.latest_decade_rows(rollup), selected_city, None)
+            overview = aggregation.frame_aggregates(latest, unique_clients=cube.unique_clients(selected_city))
+        elif dataset is not None:
+            # Агрегати бази — за тим самим знімком (id <= найбільшого id набору), що й решта сторінки
+            overview = data_loader.fetch_overview_aggregates(
+                *dataset.key, tuple(selected_city or ()), tuple(selected_street or ()), int(df_full['id'].max()))
+        if overview is None:
+            overview = cube.overview(selected_city, selected_street)
+
+        if overview.product_month.empty:
             st.warning("За обраними фільтрами дані відсутні.")
         else:
             st.markdown("""
@@ -76,42 +126,40 @@ def show():
                 }
                 </style>
             """, unsafe_allow_html=True)
-            kpis = data_processing.calculate_main_kpis(df_display)
+            kpis = aggregation.overview_kpis(overview)
             st.subheader("Ключові показники")
             kpi_cols = st.columns(5)
             kpi_cols[0].metric("Загальна кількість", f"{kpis['total_quantity']:,}")
             kpi_cols[1].metric("Унікальні продукти", f"{kpis['unique_products']:,}")
             kpi_cols[2].metric("Унікальні клієнти", f"{kpis['unique_clients']:,}")
             kpi_cols[3].metric("Частка ТОП-5 (%)", f"{kpis['top5_share']:.1f}%")
-            total_revenue_fact = df_latest_decade.merge(price_df_full, on=['product_name', 'month'], how='left')
-            total_revenue_fact['revenue'] = total_revenue_fact['quantity'] * total_revenue_fact['price']
-            fact_revenue_sum = total_revenue_fact['revenue'].sum() if 'revenue' in total_revenue_fact.columns else 0
+            fact_revenue_sum = cube.latest_decade_revenue(price_index)
             kpi_cols[4].metric("Загальний дохід", f"{fact_revenue_sum:,.2f} грн")
 
-            visualizations.plot_sales_dynamics(df_for_dynamics)
-            visualizations.plot_top_products_summary(df_display)
+            visualizations.plot_sales_dynamics(cube.dynamics(price_index, selected_city, selected_street))
+            visualizations.plot_top_products_summary(overview.product_month)
 
             st.subheader("Зведена таблиця: Міста та Продукти")
-            city_product_pivot = df_display.pivot_table(index='city', columns='product_name', values='quantity',
-                                                        aggfunc='sum', fill_value=0)
+            city_product_pivot = aggregation.city_product_pivot(overview)
             if not city_product_pivot.empty:
-                city_product_pivot = city_product_pivot.loc[
-                    city_product_pivot.sum(axis=1).sort_values(ascending=False).index]
                 st.dataframe(city_product_pivot.style.applymap(
                     lambda val: 'background-color: #4B6F44' if val > 0 else '').format('{:.0f}'))
 
 
-    with tab2:
+    if selected_view == VIEW_ADDRESSES:
         st.header("Деталізація фактичних замовлень по унікальних адресах")
-        city_client, street_client = ui_components.render_local_filters(df_full, key_prefix="tab2")
-        df_display_client_filtered = ui_components.apply_filters(df_full, city_client, street_client)
+        city_client, street_client = ui_components.render_local_filters(row_filters, key_prefix="tab2")
 
         with st.spinner("Розрахунок фактичних продажів..."):
-            if not df_display_client_filtered.empty:
-                df_actual_sales = data_processing.compute_actual_sales(df_display_client_filtered.copy())
+            # Наявність рядків за фільтрами — перетин позицій індексу, без вибірки самих рядків
+            if row_filters.count(city_client, street_client) > 0:
+                # Фактичні продажі рахуються один раз на набір даних і лише дораховуються для нових рядків;
+                # місто й вулиця визначаються адресою, тому фільтр можна застосувати до результату
+                actual_sales_state = get_actual_sales_state(df_full, dataset.key if dataset is not None else None)
+                df_actual_sales = actual_sales_state.filter_index().apply(
+                    actual_sales_state.actual_sales(), city_client, street_client)
                 # Фільтруємо лише фактичні продажі (>0)
                 df_actual_sales = df_actual_sales[df_actual_sales['actual_quantity'] > 0]
-                # --- Кінець секції відладки ---
             else:
                 df_actual_sales = pd.DataFrame()
 
@@ -122,8 +170,15 @@ def show():
                 return f'background-color: {"#4B6F44" if val > 0 else ""}'
 
             st.subheader("Загальна зведена таблиця по фактичних продажах")
-            summary_pivot_table = df_actual_sales.pivot_table(index='product_name', columns=['year', 'month', 'decade'],
-                                                              values='actual_quantity', aggfunc='sum', fill_value=0)
+            # Без фільтра за вулицею загальна таблиця будується з приростів, збережених у зведенні
+            rollup = get_rollup(dataset, prepared) if dataset is not None and not street_client else None
+            if rollup is not None:
+                summary_source = ui_components.apply_filters(rollup[rollup['actual_quantity'] > 0], city_client, None)
+                summary_source = summary_source.assign(decade=summary_source['decade'].astype(str))
+            else:
+                summary_source = df_actual_sales
+            summary_pivot_table = summary_source.pivot_table(index='product_name', columns=['year', 'month', 'decade'],
+                                                             values='actual_quantity', aggfunc='sum', fill_value=0)
             st.dataframe(summary_pivot_table.style.applymap(highlight_positive_dark_green).format('{:.0f}'))
             st.markdown("---")
 
@@ -138,8 +193,12 @@ def show():
                                                     values='actual_quantity', aggfunc='sum', fill_value=0)
                     st.dataframe(pivot_table.style.applymap(highlight_positive_dark_green).format('{:.0f}'))
 
-    with tab3:
+    if selected_view == VIEW_REVENUE:
         st.header(f"Аналіз доходу за останню декаду ({max_decade if max_decade else 'N/A'})")
+        df_latest_decade = pd.DataFrame()
+        if max_decade is not None:
+            in_latest_decade = df_full['decade'].eq(max_decade).to_numpy(dtype=bool, na_value=False)
+            df_latest_decade = price_index.add_revenue(df_full[cube.row_latest & in_latest_decade])
 
         if df_latest_decade.empty:
             st.warning("Немає даних за останню декаду для розрахунку доходу.")
@@ -149,29 +208,17 @@ def show():
             if not months_in_data:
                 st.warning("В даних за останню декаду не знайдено інформації про місяці.")
             else:
-                with st.spinner("Завантаження даних про ціни..."):
-                    region_id_to_load = st.session_state.selected_region_id
-                    price_df = data_loader.fetch_price_data(
-                        region_id=region_id_to_load,
-                        months=months_in_data
-                    )
-
-                if price_df.empty:
+                if price_index.empty:
                     st.error("Не вдалося завантажити дані про ціни для обраних місяців. Розрахунок доходу неможливий.")
                 else:
-                    sales_df_for_merge = df_latest_decade.copy()
-                    sales_df_for_merge['month'] = pd.to_numeric(sales_df_for_merge['month'], errors='coerce').astype(
-                        'Int64')
-                    merged_df = pd.merge(sales_df_for_merge, price_df, on=['product_name', 'month'], how='left')
-                    products_no_price = merged_df[merged_df['price'].isnull()]['product_name'].unique()
+                    products_no_price = df_latest_decade.loc[df_latest_decade['price'].isnull(), 'product_name'].unique()
 
                     if products_no_price.size > 0:
                         with st.expander("⚠️ Увага: Не для всіх продуктів знайдено ціну"):
                             st.write("Для наступних продуктів не знайдено ціну за відповідний місяць:")
                             for prod in products_no_price: st.markdown(f"- {prod}")
 
-                    merged_df['revenue'] = merged_df['quantity'] * merged_df['price']
-                    final_df = merged_df.dropna(subset=['revenue'])
+                    final_df = df_latest_decade.dropna(subset=['revenue'])
 
                     if final_df.empty:
                         st.warning("Після об'єднання з цінами не залишилось даних для аналізу доходу.")
@@ -186,7 +233,7 @@ def show():
 
                         st.markdown("---")
                         st.markdown("##### Деталізація доходу по продуктах (факт)")
-                        revenue_summary = final_df.groupby('product_name').agg(
+                        revenue_summary = final_df.groupby('product_name', observed=True).agg(
                             total_quantity=('quantity', 'sum'),
                             total_revenue=('revenue', 'sum')
                         ).sort_values(by='total_revenue', ascending=False)
@@ -269,6 +316,14 @@ def show():
                                                                                         format="%.2f грн"),
                                         "forecast_revenue": st.column_config.NumberColumn("Прогноз (дохід)",
                                                                                           format="%.2f грн"),
+                                        "forecast_quantity_low": st.column_config.NumberColumn(
+                                            "К-сть, 95% від", format="%.1f уп."),
+                                        "forecast_quantity_high": st.column_config.NumberColumn(
+                                            "К-сть, 95% до", format="%.1f уп."),
+                                        "forecast_revenue_low": st.column_config.NumberColumn(
+                                            "Дохід, 95% від", format="%.2f грн"),
+                                        "forecast_revenue_high": st.column_config.NumberColumn(
+                                            "Дохід, 95% до", format="%.2f грн"),
                                         "daily_quantity_rate": None,
                                         "daily_revenue_rate": None,
                                     },
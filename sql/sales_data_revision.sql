@@ -0,0 +1,28 @@
+-- Ревізія рядка sales_data (core/local_store.py, core/incremental_sales.py).
+-- Кожна вставка і кожна зміна рядка отримує новий номер із послідовності, тож виправлений
+-- повторним завантаженням рядок (upsert за row_fingerprint зберігає id) видно за revision,
+-- навіть коли його id не перевищує high-water mark.
+-- Наявні рядки отримують ревізії під час додавання колонки.
+
+CREATE SEQUENCE IF NOT EXISTS sales_data_revision_seq;
+
+ALTER TABLE sales_data
+    ADD COLUMN IF NOT EXISTS revision bigint NOT NULL DEFAULT nextval('sales_data_revision_seq');
+
+CREATE OR REPLACE FUNCTION sales_data_bump_revision()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.revision := nextval('sales_data_revision_seq');
+    RETURN NEW;
+END;
+$$;
+
+-- Повторне завантаження без змін значень ревізію не змінює
+DROP TRIGGER IF EXISTS sales_data_revision ON sales_data;
+CREATE TRIGGER sales_data_revision
+    BEFORE UPDATE ON sales_data
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+    EXECUTE FUNCTION sales_data_bump_revision();
+
+-- Дочитування змінених рядків регіону: region + revision > позначки
+CREATE INDEX IF NOT EXISTS sales_data_region_revision ON sales_data (region, revision);
@@ -0,0 +1,4 @@
+-- Відбиток рядка для ідемпотентного завантаження (core/bulk_writer.py):
+-- upsert за row_fingerprint оновлює вже завантажені рядки замість вставки дублікатів.
+ALTER TABLE sales_data ADD COLUMN IF NOT EXISTS row_fingerprint text;
+CREATE UNIQUE INDEX IF NOT EXISTS sales_data_row_fingerprint_key ON sales_data (row_fingerprint);
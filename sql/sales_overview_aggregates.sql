@@ -0,0 +1,77 @@
+-- Агрегати вкладки "Загальний огляд" на боці бази (core/aggregation.py, RpcAggregation).
+-- Рядки огляду: остання декада кожного місяця після фільтрів набору (регіон, територія, лінійка, місяці)
+-- і локальних фільтрів (міста, вулиці). 'Всі' і порожній масив означають "без фільтра".
+-- p_max_id обмежує рядки тими, що є в завантаженому наборі даних (id <= найбільшого id набору), тож
+-- агрегати і решта сторінки рахуються з одного знімка; NULL — без обмеження.
+-- Текстові поля очищуються так само, як у компактній схемі (strip, NULL -> '').
+
+-- Попередні версії: окремі функції на кожен агрегат і sales_overview_rows без p_max_id
+DROP FUNCTION IF EXISTS sales_overview_product_month(text, text, text, text[], text[], text[]);
+DROP FUNCTION IF EXISTS sales_overview_city_product(text, text, text, text[], text[], text[]);
+DROP FUNCTION IF EXISTS sales_overview_unique_clients(text, text, text, text[], text[], text[]);
+DROP FUNCTION IF EXISTS sales_overview_rows(text, text, text, text[], text[], text[]);
+
+CREATE OR REPLACE FUNCTION sales_overview_rows(
+    p_region text, p_territory text, p_line text, p_months text[], p_cities text[], p_streets text[],
+    p_max_id bigint DEFAULT NULL
+)
+RETURNS TABLE (product_name text, city text, new_client text, full_address text, month integer, quantity bigint)
+LANGUAGE sql STABLE AS $$
+    WITH filtered AS (
+        SELECT
+            btrim(coalesce(s.product_name, '')) AS product_name,
+            btrim(coalesce(s.city, '')) AS city,
+            btrim(coalesce(s.street, '')) AS street,
+            btrim(coalesce(s.new_client, '')) AS new_client,
+            btrim(btrim(coalesce(s.city, '')) || ', ' || btrim(coalesce(s.street, '')) || ', '
+                  || btrim(coalesce(s.house_number, '')), ' ,') AS full_address,
+            s.year::integer AS year, s.month::integer AS month, s.decade::integer AS decade,
+            coalesce(s.quantity, 0)::bigint AS quantity
+        FROM sales_data s
+        WHERE s.region = p_region
+          AND (p_territory = 'Всі' OR s.territory = p_territory)
+          AND (p_line = 'Всі' OR s.product_line = p_line)
+          AND (cardinality(p_months) = 0 OR s.month = ANY (p_months))
+          AND (p_max_id IS NULL OR s.id <= p_max_id)
+          AND s.year IS NOT NULL AND s.month IS NOT NULL AND s.decade IS NOT NULL
+    ),
+    latest AS (
+        SELECT f.*, max(f.decade) OVER (PARTITION BY f.year, f.month) AS max_decade FROM filtered f
+    )
+    SELECT l.product_name, l.city, l.new_client, l.full_address, l.month, l.quantity
+    FROM latest l
+    WHERE l.decade = l.max_decade
+      AND (cardinality(p_cities) = 0 OR l.city = ANY (p_cities))
+      AND (cardinality(p_streets) = 0 OR l.street = ANY (p_streets))
+$$;
+
+-- Усі три агрегати одним викликом: рядки огляду обчислюються один раз.
+-- Повертає {"product_month": [{product_name, month, quantity}], "city_product": [{city, product_name, quantity}],
+--           "unique_clients": кількість пар (клієнт, адреса)}.
+CREATE OR REPLACE FUNCTION sales_overview_aggregates(
+    p_region text, p_territory text, p_line text, p_months text[], p_cities text[], p_streets text[],
+    p_max_id bigint DEFAULT NULL
+)
+RETURNS jsonb
+LANGUAGE sql STABLE AS $$
+    WITH r AS MATERIALIZED (
+        SELECT * FROM sales_overview_rows(p_region, p_territory, p_line, p_months, p_cities, p_streets, p_max_id)
+    )
+    SELECT jsonb_build_object(
+        'product_month', (
+            SELECT coalesce(jsonb_agg(pm), '[]'::jsonb) FROM (
+                SELECT r.product_name, r.month, sum(r.quantity)::bigint AS quantity
+                FROM r GROUP BY r.product_name, r.month
+            ) pm
+        ),
+        'city_product', (
+            SELECT coalesce(jsonb_agg(cp), '[]'::jsonb) FROM (
+                SELECT r.city, r.product_name, sum(r.quantity)::bigint AS quantity
+                FROM r GROUP BY r.city, r.product_name
+            ) cp
+        ),
+        'unique_clients', (
+            SELECT count(*) FROM (SELECT DISTINCT r.new_client, r.full_address FROM r) pairs
+        )
+    )
+$$;
@@ -0,0 +1,76 @@
+-- Зведення продажів (core/rollups.py): один рядок на регіон, територію, лінійку, продукт, місто,
+-- рік, місяць і декаду. quantity — кумулятивна кількість на кінець декади, actual_quantity —
+-- сума додатних приростів рядів (дистриб'ютор, продукт, адреса, клієнт) відносно попередньої декади.
+-- Розділ (регіон, рік, місяць) перераховується після кожного завантаження файлу;
+-- повна перебудова і перевірка: python -m core.rollups rebuild|verify --region "...".
+-- Текстові ключі очищені (strip, NULL -> ''), рік/місяць/декада — текст у форматі sales_data.
+
+CREATE TABLE IF NOT EXISTS sales_rollup (
+    id bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    region text NOT NULL,
+    territory text NOT NULL,
+    product_line text NOT NULL,
+    product_name text NOT NULL,
+    city text NOT NULL,
+    year text NOT NULL,
+    month text NOT NULL,
+    decade text NOT NULL,
+    quantity bigint NOT NULL DEFAULT 0,
+    actual_quantity bigint NOT NULL DEFAULT 0,
+    -- Ключ upsert (on_conflict у bulk_writer.write_rows)
+    CONSTRAINT sales_rollup_key UNIQUE (region, territory, product_line, product_name, city, year, month, decade)
+);
+
+-- Заміна розділу після завантаження і вибірка сторінкою аналізу (region + month, далі keyset за id)
+CREATE INDEX IF NOT EXISTS sales_rollup_region_month ON sales_rollup (region, year, month);
+
+-- Покриття: розділи (регіон, рік, місяць), зведення яких повністю перераховано з sales_data.
+-- Читач зведення (rollups.load_rollup) використовує його лише тоді, коли покрито кожен запитаний місяць.
+CREATE TABLE IF NOT EXISTS sales_rollup_coverage (
+    region text NOT NULL,
+    year text NOT NULL,
+    month text NOT NULL,
+    refreshed_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (region, year, month)
+);
+
+-- Заміна розділу однією транзакцією (rollups.refresh_partitions): спочатку upsert нових рядків,
+-- потім видалення ключів, яких у новому зведенні немає, і позначка покриття. Збій на будь-якому
+-- кроці відкочує все, тож розділ ніколи не лишається порожнім чи обрізаним.
+-- p_rows — JSON-масив рядків зведення (колонки sales_rollup без id). Повертає кількість записаних рядків.
+CREATE OR REPLACE FUNCTION sales_rollup_replace_partition(p_region text, p_year text, p_month text, p_rows jsonb)
+RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+    written integer;
+BEGIN
+    CREATE TEMP TABLE incoming ON COMMIT DROP AS
+    SELECT r.territory, r.product_line, r.product_name, r.city, r.decade, r.quantity, r.actual_quantity
+    FROM jsonb_to_recordset(p_rows) AS r(region text, territory text, product_line text, product_name text,
+                                         city text, year text, month text, decade text,
+                                         quantity bigint, actual_quantity bigint)
+    WHERE r.region = p_region AND r.year = p_year AND r.month = p_month;
+
+    INSERT INTO sales_rollup (region, territory, product_line, product_name, city, year, month, decade,
+                              quantity, actual_quantity)
+    SELECT p_region, territory, product_line, product_name, city, p_year, p_month, decade, quantity, actual_quantity
+    FROM incoming
+    ON CONFLICT ON CONSTRAINT sales_rollup_key
+    DO UPDATE SET quantity = EXCLUDED.quantity, actual_quantity = EXCLUDED.actual_quantity;
+    GET DIAGNOSTICS written = ROW_COUNT;
+
+    DELETE FROM sales_rollup s
+    WHERE s.region = p_region AND s.year = p_year AND s.month = p_month
+      AND NOT EXISTS (
+          SELECT 1 FROM incoming i
+          WHERE i.territory = s.territory AND i.product_line = s.product_line
+            AND i.product_name = s.product_name AND i.city = s.city AND i.decade = s.decade
+      );
+
+    INSERT INTO sales_rollup_coverage (region, year, month, refreshed_at)
+    VALUES (p_region, p_year, p_month, now())
+    ON CONFLICT (region, year, month) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at;
+
+    DROP TABLE incoming;
+    RETURN written;
+END;
+$$;